@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the per-tick hot paths.
+
+Replays test_results.json and a large synthetic card set through
+_parse_post, create_post_embed, the post text renderer and the
+seen-post diffing used by fetch_weibo_posts, and reports time and retained allocations per post.
+Results are compared against a stored baseline; the script exits with
+status 1 if any case is slower than the baseline by more than the
+tolerance. Baselines are machine-specific and not committed, so record
+one with --update-baseline on the machine that runs the comparison; the
+script exits with status 2 if there is no baseline to compare against.
+
+Usage:
+    python benchmarks/bench_hot_paths.py
+    python benchmarks/bench_hot_paths.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+# Add the bot directory to sys.path to import the bot modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.models import Account, Post
+from src.embeds import create_post_embed
+from src.html_renderer import render_markdown
+from src.seen_ledger import SeenPostLedger
+from benchmarks.weibo_stub_server import load_fixture_posts, post_to_mblog, FIRST_POST_ID
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hot_paths_baseline.json')
+
+def build_cards(count: int) -> List[Dict]:
+    """Build count container cards by cycling through the fixture posts."""
+    fixtures = load_fixture_posts()
+    return [
+        {'card_type': 9, 'mblog': post_to_mblog(fixtures[i % len(fixtures)], FIRST_POST_ID + count - i)}
+        for i in range(count)
+    ]
+
+def measure(run: Callable[[], int], rounds: int, outputs: List) -> Dict[str, float]:
+    """Time run() over several rounds and measure the memory it retains.
+    
+    run() stores its results in outputs and returns the number of posts it
+    processed. The best round is used for timing, which is the least
+    affected by scheduling noise.
+    """
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        count = run()
+        best = min(best, (time.perf_counter() - started) / count)
+        
+    outputs.clear()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    count = run()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    retained_bytes = sum(stat.size_diff for stat in stats)
+    retained_blocks = sum(stat.count_diff for stat in stats)
+    
+    return {
+        'us_per_post': best * 1e6,
+        'bytes_per_post': retained_bytes / count,
+        'blocks_per_post': retained_blocks / count
+    }
+
+def benchmark_cases(synthetic_count: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    """Run every hot-path case and return its measurements."""
+    fetcher = AsyncWeiboFetcher({
+        'WEIBO_ACCOUNTS': {},
+        'WEIBO_API_BASE_URL': '',
+        'CACHE_DURATION': 300,
+        'MAX_POSTS_PER_ACCOUNT': 5
+    })
+    account = Account('benchmark', 1000000000, 'benchmark', 'Benchmark', 'Benchmark account')
+    fixture_cards = build_cards(len(load_fixture_posts()))
+    synthetic_cards = build_cards(synthetic_count)
+    results: Dict[str, Dict[str, float]] = {}
+    
+    # Each case keeps its output alive so retained allocations can be measured
+    outputs: List = []
+    
+    def parse(cards: List[Dict]) -> Callable[[], int]:
+        def run() -> int:
+            outputs[:] = [fetcher._parse_post(card, account) for card in cards]
+            return len(cards)
+        return run
+    
+    results['parse_fixtures'] = measure(parse(fixture_cards), rounds, outputs)
+    results['parse_synthetic'] = measure(parse(synthetic_cards), rounds, outputs)
+    
+    posts: List[Post] = [fetcher._parse_post(card, account) for card in synthetic_cards]
+    
+    def render() -> int:
+        outputs[:] = [create_post_embed(post) for post in posts]
+        return len(posts)
+    
+    results['render_embed'] = measure(render, rounds, outputs)
+    
+    # The embed renderer memoizes post text, so time the markdown conversion itself
+    def render_text() -> int:
+        outputs[:] = [render_markdown(post.text) for post in posts]
+        return len(posts)
+    
+    results['render_text'] = measure(render_text, rounds, outputs)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger = SeenPostLedger(os.path.join(tmp_dir, 'seen_posts.db'))
+        # A full ledger and a page where only the first post is new, as on a typical tick
+        ledger.mark_seen('benchmark', [post.id for post in posts[1:ledger.max_per_account + 1]])
+        pages = [posts[i:i + 5] for i in range(0, len(posts), 5)]
+        
+        def diff() -> int:
+            outputs[:] = [ledger.filter_new('benchmark', page) for page in pages]
+            return len(posts)
+        
+        results['diff_new_posts'] = measure(diff, rounds, outputs)
+        ledger.close()
+        
+    outputs.clear()
+    return results
+
+def main():
+    """Run the microbenchmarks and compare them to the baseline."""
+    parser = argparse.ArgumentParser(description="Microbenchmarks for parse, render and diff hot paths")
+    parser.add_argument('--synthetic', type=int, default=5000, help="number of synthetic cards")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+    
+    results = benchmark_cases(args.synthetic, args.rounds)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+            
+    regressions = []
+    print(f"{'case':<16} {'us/post':>9} {'baseline':>9} {'bytes/post':>11} {'blocks/post':>12}")
+    for case, result in results.items():
+        expected = baseline.get(case, {}).get('us_per_post')
+        print(
+            f"{case:<16} {result['us_per_post']:>9.2f} "
+            f"{expected if expected is not None else float('nan'):>9.2f} "
+            f"{result['bytes_per_post']:>11.1f} {result['blocks_per_post']:>12.2f}"
+        )
+        if expected is not None and result['us_per_post'] > expected * (1 + args.tolerance):
+            regressions.append(case)
+            
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        sys.exit(2)
+        
+    if regressions:
+        print(f"Regression beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
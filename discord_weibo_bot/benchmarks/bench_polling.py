@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+End-to-end polling benchmark against the local Weibo stand-in.
+
+For each account count, starts StubWeiboServer in-process and runs polling
+ticks the way the bot's fetch_weibo_posts task does (concurrent incremental
+fetch, then diffing against the seen-post ledger), minus the Discord side.
+Reports tick latency, requests/sec and memory as the account count grows.
+
+Usage:
+    python benchmarks/bench_polling.py --accounts 10 100 1000 --ticks 5 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the bot directory to sys.path to import the bot modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.seen_ledger import SeenPostLedger
+from benchmarks.weibo_stub_server import StubWeiboServer, synthetic_accounts
+
+async def run_ticks(account_count: int, args) -> dict:
+    """Poll account_count synthetic accounts for the configured number of ticks."""
+    server = StubWeiboServer(
+        accounts=account_count, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, not_ok_rate=args.not_ok_rate,
+        new_post_rate=args.new_post_rate, seed=1
+    )
+    base_url = await server.start()
+    fetcher = AsyncWeiboFetcher({
+        'WEIBO_ACCOUNTS': synthetic_accounts(account_count),
+        'WEIBO_API_BASE_URL': base_url,
+        'CACHE_DURATION': 300,
+        'MAX_POSTS_PER_ACCOUNT': 5,
+        'REQUEST_TIMEOUT': 10,
+        'CONNECTION_POOL_SIZE': args.concurrency,
+        'MAX_CONCURRENT_FETCHES': args.concurrency
+    })
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger = SeenPostLedger(os.path.join(tmp_dir, 'seen_posts.db'))
+        tick_times = []
+        new_posts = 0
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            for _ in range(args.ticks):
+                tick_started = time.perf_counter()
+                async for username, posts in fetcher.iter_all_posts(force_refresh=True, incremental=True):
+                    if not posts:
+                        continue
+                    if not ledger.has_account(username):
+                        ledger.mark_seen(username, [post.id for post in posts])
+                        continue
+                    fresh = ledger.filter_new(username, posts)
+                    new_posts += len(fresh)
+                    ledger.mark_seen(username, [post.id for post in fresh])
+                tick_times.append(time.perf_counter() - tick_started)
+            elapsed = time.perf_counter() - started
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            ledger.close()
+            await fetcher.close()
+            await server.stop()
+            
+    return {
+        'accounts': account_count,
+        'tick_mean': statistics.mean(tick_times),
+        'tick_max': max(tick_times),
+        'requests_per_sec': server.requests / elapsed,
+        'new_posts': new_posts,
+        'failed': len(fetcher.failed_accounts),
+        'peak_traced_mb': peak_memory / 1024 / 1024
+    }
+
+def main():
+    """Run the benchmark for each account count and print a table."""
+    # Per-account fetch logging would dominate the run time
+    logging.getLogger('weibo_fetcher').setLevel(logging.WARNING)
+    logging.getLogger('seen_ledger').setLevel(logging.WARNING)
+    
+    parser = argparse.ArgumentParser(description="Polling benchmark against the local Weibo stand-in")
+    parser.add_argument('--accounts', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--not-ok-rate', type=float, default=0.0)
+    parser.add_argument('--new-post-rate', type=float, default=0.2)
+    args = parser.parse_args()
+    
+    print(f"{'accounts':>8} {'tick mean':>10} {'tick max':>10} {'req/s':>8} {'new posts':>9} {'failed':>6} {'peak MB':>8} {'max RSS MB':>10}")
+    for account_count in args.accounts:
+        result = asyncio.run(run_ticks(account_count, args))
+        max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f"{result['accounts']:>8} {result['tick_mean']:>9.3f}s {result['tick_max']:>9.3f}s "
+            f"{result['requests_per_sec']:>8.1f} {result['new_posts']:>9} {result['failed']:>6} "
+            f"{result['peak_traced_mb']:>8.2f} {max_rss_mb:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: module import times and restart-to-first-delivery.
+
+Import times are measured in a fresh interpreter per module. The restart
+benchmark runs a previous bot session against StubWeiboServer, leaves a
+warm start snapshot aged by --downtime seconds, and then restarts twice
+from the same state, minus the Discord side (connecting to Discord is
+simulated with --connect-delay):
+
+  cold  poll the due accounts once the bot is ready, with an empty post
+        cache and a fresh schedule
+  warm  restore the snapshot and poll the due accounts while connecting,
+        delivering as soon as the bot is ready
+
+Usage:
+    python benchmarks/bench_startup.py --accounts 200 --latency 0.05 --connect-delay 2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+# Add the bot directory to sys.path to import the bot modules
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BOT_DIR)
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.seen_ledger import SeenPostLedger
+from src.poll_scheduler import PollScheduler
+from src.warm_start import WarmStartSnapshot
+from src.storage import load_json, atomic_write_json
+from benchmarks.weibo_stub_server import StubWeiboServer, synthetic_accounts
+
+IMPORTED_MODULES = [
+    'discord', 'aiohttp', 'src.weibo_fetcher', 'src.embeds',
+    'src.delivery', 'src.media_cache', 'src.metrics', 'src.post_archive'
+]
+
+def import_time(module: str, runs: int) -> Optional[float]:
+    """Return the best time in seconds to import a module in a fresh interpreter, or None if it is not installed."""
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], cwd=BOT_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+def create_fetcher(base_url: str, accounts: Dict, concurrency: int) -> AsyncWeiboFetcher:
+    """Create a fetcher for the stub server's accounts."""
+    return AsyncWeiboFetcher({
+        'WEIBO_ACCOUNTS': accounts,
+        'WEIBO_API_BASE_URL': base_url,
+        'CACHE_DURATION': 300,
+        'MAX_POSTS_PER_ACCOUNT': 5,
+        'REQUEST_TIMEOUT': 10,
+        'CONNECTION_POOL_SIZE': concurrency,
+        'MAX_CONCURRENT_FETCHES': concurrency
+    })
+
+def age_snapshot(path: str, seconds: float):
+    """Shift every timestamp in a snapshot into the past, as if the bot had been down that long."""
+    data = load_json(path, None)
+    data['saved_at'] -= seconds
+    for entry in data['fetcher']['posts']:
+        entry[1] -= seconds
+    for state in data['scheduler'].values():
+        state['next_poll'] -= seconds
+        if state['last_poll'] is not None:
+            state['last_poll'] -= seconds
+    atomic_write_json(path, data)
+
+async def poll(fetcher: AsyncWeiboFetcher, scheduler: PollScheduler, ledger: SeenPostLedger,
+               usernames: List[str], ready: asyncio.Event, started: float) -> Dict[str, Optional[float]]:
+    """Poll accounts the way the bot does, holding deliveries until ready is set."""
+    result = {'first_delivery': None, 'all_delivered': None, 'new_posts': 0}
+    held = []
+    
+    def deliver(username: str, posts: List):
+        new_posts = ledger.filter_new(username, posts) if ledger.has_account(username) else []
+        ledger.mark_seen(username, [post.id for post in posts])
+        if new_posts and result['first_delivery'] is None:
+            result['first_delivery'] = time.perf_counter() - started
+        result['new_posts'] += len(new_posts)
+        scheduler.record(username, len(new_posts), error=username in fetcher.failed_accounts)
+    
+    async for username, posts in fetcher.iter_all_posts(usernames, force_refresh=True, incremental=True):
+        if ready.is_set():
+            deliver(username, posts)
+        else:
+            held.append((username, posts))
+    await ready.wait()
+    for username, posts in held:
+        deliver(username, posts)
+    result['all_delivered'] = time.perf_counter() - started
+    return result
+
+async def restart(server: StubWeiboServer, base_url: str, accounts: Dict, state_dir: str,
+                  warm: bool, args) -> Dict[str, float]:
+    """Start a bot session from the saved state and measure how soon it delivers."""
+    requests_before = server.requests
+    started = time.perf_counter()
+    fetcher = create_fetcher(base_url, accounts, args.concurrency)
+    scheduler = PollScheduler(accounts, max_requests_per_minute=len(accounts))
+    ledger = SeenPostLedger(os.path.join(state_dir, 'seen_posts.db'))
+    for username in accounts:
+        if ledger.has_account(username):
+            fetcher.newest_post_ids[username] = ledger.newest(username)
+    if warm:
+        WarmStartSnapshot(os.path.join(state_dir, 'warm_start.json')).load(fetcher, scheduler)
+    restored = time.perf_counter() - started
+    cached_accounts = len(fetcher.cache)
+    
+    ready = asyncio.Event()
+    
+    async def connect():
+        await asyncio.sleep(args.connect_delay)
+        ready.set()
+    
+    try:
+        if warm:
+            connecting = asyncio.ensure_future(connect())
+            result = await poll(fetcher, scheduler, ledger, scheduler.due(), ready, started)
+            await connecting
+        else:
+            # Polling only starts once the bot is ready
+            await connect()
+            result = await poll(fetcher, scheduler, ledger, scheduler.due(), ready, started)
+    finally:
+        ledger.close()
+        await fetcher.close()
+    
+    result.update({
+        'restore': restored,
+        'cached_accounts': cached_accounts,
+        'requests': server.requests - requests_before
+    })
+    return result
+
+async def run(warm: bool, args) -> Dict[str, float]:
+    """Run a previous session, then restart from its state.
+    
+    Each mode gets its own identically seeded stub server, so both restarts
+    see the same timelines.
+    """
+    server = StubWeiboServer(
+        accounts=args.accounts, latency=args.latency, jitter=args.jitter,
+        new_post_rate=args.new_post_rate, seed=1
+    )
+    base_url = await server.start()
+    accounts = synthetic_accounts(args.accounts)
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            fetcher = create_fetcher(base_url, accounts, args.concurrency)
+            scheduler = PollScheduler(accounts, max_requests_per_minute=len(accounts))
+            ledger = SeenPostLedger(os.path.join(state_dir, 'seen_posts.db'))
+            ready = asyncio.Event()
+            ready.set()
+            await poll(fetcher, scheduler, ledger, scheduler.due(), ready, time.perf_counter())
+            snapshot_path = os.path.join(state_dir, 'warm_start.json')
+            WarmStartSnapshot(snapshot_path).save(fetcher, scheduler)
+            ledger.close()
+            await fetcher.close()
+            age_snapshot(snapshot_path, args.downtime)
+            return await restart(server, base_url, accounts, state_dir, warm, args)
+    finally:
+        await server.stop()
+
+def main():
+    """Run the startup benchmark and print its tables."""
+    # Per-account fetch logging would dominate the run time
+    for name in ('weibo_fetcher', 'seen_ledger', 'warm_start'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    
+    parser = argparse.ArgumentParser(description="Startup benchmark against the local Weibo stand-in")
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--new-post-rate', type=float, default=0.2)
+    parser.add_argument('--connect-delay', type=float, default=2.0, help="simulated time to connect to Discord")
+    parser.add_argument('--downtime', type=float, default=900, help="how long the bot was down before restarting")
+    parser.add_argument('--import-runs', type=int, default=5)
+    parser.add_argument('--skip-imports', action='store_true')
+    args = parser.parse_args()
+    
+    if not args.skip_imports:
+        print(f"{'module':<20} {'import ms':>10}")
+        for module in IMPORTED_MODULES:
+            seconds = import_time(module, args.import_runs)
+            print(f"{module:<20} {'not installed' if seconds is None else f'{seconds * 1000:.1f}':>10}")
+        print()
+    
+    results = {mode: asyncio.run(run(mode == 'warm', args)) for mode in ('cold', 'warm')}
+    print(f"{'start':<6} {'restore':>8} {'cached':>7} {'first post':>11} {'all polled':>11} {'requests':>9} {'new posts':>9}")
+    for mode, result in results.items():
+        first = result['first_delivery']
+        print(
+            f"{mode:<6} {result['restore']:>7.3f}s {result['cached_accounts']:>7} "
+            f"{f'{first:.3f}s' if first is not None else '-':>11} {result['all_delivered']:>10.3f}s "
+            f"{result['requests']:>9} {result['new_posts']:>9}"
+        )
+
+if __name__ == "__main__":
+    main()
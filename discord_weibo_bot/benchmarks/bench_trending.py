@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Engagement tracking benchmark: !trending ranking with many tracked posts.
+
+Fills an EngagementTracker with synthetic posts spread over the last
+--track-hours, re-sampled on the tracker's schedule with random engagement
+growth, then times filling it, due(), record() and trending() against a
+per-post Python loop over the same samples, and exits with an error if
+the two rank the top posts differently. Needs numpy.
+
+Usage:
+    python benchmarks/bench_trending.py --posts 10000 50000 100000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# Add the bot directory to sys.path to import the bot modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.engagement import EngagementTracker, HAS_NUMPY
+from src.models import Account, Post
+
+def build_tracker(path: str, count: int, accounts: int, track_hours: float,
+                  now: float, seed: int) -> Tuple[EngagementTracker, Dict[str, List[Tuple[float, int]]]]:
+    """Track count posts first seen over the last track_hours, sampled on schedule.
+    
+    Also returns each post's samples as (time, engagement) lists for the
+    per-post loop.
+    """
+    rng = random.Random(seed)
+    tracker = EngagementTracker(path, max_posts=count, track_duration=track_hours * 3600)
+    account_objects = [Account(f"account{i}", i, f"account{i}", f"Account {i}", '') for i in range(accounts)]
+    series = {}
+    for i in range(count):
+        first_seen = now - track_hours * 3600 * (count - i) / count
+        post = Post(
+            id=str(5200000000000000 + i), created_at='', text='', source='',
+            reposts_count=0, comments_count=0, attitudes_count=0,
+            account=account_objects[i % accounts], images=(), retweeted=None, is_long_text=False
+        )
+        tracker.track([post], now=first_seen)
+        rate = rng.expovariate(1 / 50)  # engagement per hour
+        samples = [(first_seen, 0)]
+        for age in tracker._ages:
+            if first_seen + age > now:
+                break
+            total = int(rate * age / 3600)
+            tracker.record(post.id, (total // 4, total // 4, total - 2 * (total // 4)), now=first_seen + age)
+            samples.append((first_seen + age, total))
+        series[post.id] = samples
+    return tracker, series
+
+def loop_trending(series: Dict[str, List[Tuple[float, int]]], window: float, now: float,
+                  min_span: float, limit: int) -> List[Tuple[float, str]]:
+    """Rank posts the same way as EngagementTracker.trending with a loop over posts."""
+    cutoff = now - window
+    ranked = []
+    for post_id, samples in series.items():
+        if len(samples) < 2 or samples[-1][0] < cutoff:
+            continue
+        base = samples[0]
+        for sample in samples:
+            if sample[0] > cutoff:
+                break
+            base = sample
+        gain = samples[-1][1] - base[1]
+        if gain > 0:
+            ranked.append((gain * 3600 / max(samples[-1][0] - base[0], min_span), post_id))
+    ranked.sort(reverse=True)
+    return ranked[:limit]
+
+def best_time(run, rounds: int) -> float:
+    """Return the best wall time of run() in seconds."""
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    """Run the trending benchmark and print a table."""
+    logging.getLogger('engagement').setLevel(logging.WARNING)
+    
+    parser = argparse.ArgumentParser(description="Engagement tracking and !trending benchmark")
+    parser.add_argument('--posts', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--track-hours', type=float, default=24)
+    parser.add_argument('--window', type=float, default=6, help="trending window in hours")
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        sys.exit("This benchmark needs numpy (pip install numpy)")
+    
+    print(f"{'posts':>7} {'fill us/sample':>15} {'due ms':>7} {'record us':>10} {'trending ms':>12} {'loop ms':>8} {'same top':>9}")
+    mismatched = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.posts:
+            now = time.time()
+            started = time.perf_counter()
+            tracker, series = build_tracker(
+                os.path.join(directory, 'engagement.npz'), count, args.accounts, args.track_hours, now, seed=1
+            )
+            samples = sum(len(samples) for samples in series.values())
+            fill_us = (time.perf_counter() - started) / samples * 1e6
+            
+            window = args.window * 3600
+            trending = best_time(lambda: tracker.trending(window, now=now), args.rounds)
+            loop = best_time(lambda: loop_trending(series, window, now, tracker.first_resample, 10), args.rounds)
+            same = [trend.post_id for trend in tracker.trending(window, now=now)] == [
+                post_id for _, post_id in loop_trending(series, window, now, tracker.first_resample, 10)
+            ]
+            if not same:
+                mismatched.append(count)
+            
+            later = now + 600
+            # due() reschedules the posts it returns, so restore the schedule afterwards
+            next_due = tracker._next_due.copy()
+            started = time.perf_counter()
+            post_ids = tracker.due(later, limit=20)
+            due = time.perf_counter() - started
+            tracker._next_due[:] = next_due
+            started = time.perf_counter()
+            for post_id in post_ids:
+                tracker.record(post_id, (1, 1, 1), now=later)
+            record_us = (time.perf_counter() - started) / max(len(post_ids), 1) * 1e6
+            
+            print(
+                f"{count:>7} {fill_us:>15.1f} {due * 1000:>7.2f} {record_us:>10.1f} "
+                f"{trending * 1000:>12.2f} {loop * 1000:>8.1f} {'yes' if same else 'no':>9}"
+            )
+    if mismatched:
+        sys.exit(f"trending() ranked the top posts differently from the loop with {', '.join(map(str, mismatched))} posts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the m.weibo.cn container API.
+
+Serves getIndex responses built from test_results.json-style fixtures for
+any number of synthetic accounts, with configurable latency, HTTP error
+rate and rate of ok != 1 responses. Timelines longer than a page are
+paged with since_id like the real API. Used by the benchmarks so polling
+performance can be measured without touching Weibo.
+
+Run standalone:
+    python benchmarks/weibo_stub_server.py --accounts 1000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('weibo_stub_server')
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_results.json')
+FIRST_ACCOUNT_ID = 1000000000
+FIRST_POST_ID = 5200000000000000
+
+def load_fixture_posts(path: str = DEFAULT_FIXTURES) -> List[Dict]:
+    """Load every post dict from a test_results.json-style file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    return [post for result in results.values() for post in result.get('posts', [])]
+
+def post_to_mblog(post: Dict, post_id: int) -> Dict:
+    """Turn a saved post dict back into the mblog shape the container API returns."""
+    mblog = {
+        'id': str(post_id),
+        'created_at': post['created_at'],
+        'text': post['text'],
+        'source': post['source'],
+        'reposts_count': post['reposts_count'],
+        'comments_count': post['comments_count'],
+        'attitudes_count': post['attitudes_count'],
+        'user': {'id': post['user']['id'], 'screen_name': post['user']['screen_name']}
+    }
+    if post['images']:
+        mblog['pics'] = [{'large': {'url': url}} for url in post['images']]
+    if 'retweeted' in post:
+        retweeted = post['retweeted']
+        mblog['retweeted_status'] = {
+            'id': retweeted['id'],
+            'created_at': retweeted['created_at'],
+            'text': retweeted['text'],
+            'user': retweeted['user']
+        }
+        if 'images' in retweeted:
+            mblog['retweeted_status']['pics'] = [{'large': {'url': url}} for url in retweeted['images']]
+    return mblog
+
+def synthetic_accounts(count: int) -> Dict[str, Dict]:
+    """Build a WEIBO_ACCOUNTS-style dict of synthetic accounts served by the stub."""
+    return {
+        f"account{i}": {
+            'name': f"Account {i}",
+            'weibo_id': f"stub-account-{i}",
+            'numeric_id': str(FIRST_ACCOUNT_ID + i),
+            'description': "Synthetic benchmark account"
+        }
+        for i in range(count)
+    }
+
+class StubWeiboServer:
+    """aiohttp application that imitates m.weibo.cn's getIndex endpoint."""
+    
+    def __init__(self, accounts: int = 100, fixtures_path: str = DEFAULT_FIXTURES,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 not_ok_rate: float = 0.0, new_post_rate: float = 0.1,
+                 page_size: int = 10, history: Optional[int] = None, seed: Optional[int] = None):
+        """Configure the stand-in's accounts and failure behaviour."""
+        self.accounts = accounts
+        self.fixtures = load_fixture_posts(fixtures_path)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_ok_rate = not_ok_rate
+        self.new_post_rate = new_post_rate
+        self.page_size = page_size
+        self.history = history or page_size  # posts kept per timeline
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._next_post_id = FIRST_POST_ID
+        self._timelines: Dict[int, List[Dict]] = {}
+        self._runner = None
+        
+    def app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_get('/api/container/getIndex', self.handle_get_index)
+        return app
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start serving in the current event loop and return the getIndex URL."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/api/container/getIndex"
+    
+    async def stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    def _new_card(self) -> Dict:
+        """Create a card for a new post with the next post ID."""
+        self._next_post_id += 1
+        post = self.fixtures[self._next_post_id % len(self.fixtures)]
+        return {'card_type': 9, 'mblog': post_to_mblog(post, self._next_post_id)}
+    
+    def _timeline(self, user_id: int) -> List[Dict]:
+        """Return an account's cards, newest first, occasionally adding a new post."""
+        timeline = self._timelines.get(user_id)
+        if timeline is None:
+            timeline = [self._new_card() for _ in range(self.page_size)]
+            timeline.reverse()
+            self._timelines[user_id] = timeline
+        elif self.random.random() < self.new_post_rate:
+            self.add_posts(user_id, 1)
+        return timeline
+    
+    def add_posts(self, user_id: int, count: int):
+        """Publish count new posts on an account's timeline, e.g. to simulate downtime."""
+        timeline = self._timelines.setdefault(user_id, [])
+        for _ in range(count):
+            timeline.insert(0, self._new_card())
+        del timeline[self.history:]
+    
+    def _page(self, user_id: int, since_id: Optional[str]) -> Dict:
+        """Return the page of an account's timeline after since_id, with the cursor to the next page."""
+        # Only first page requests count as polls that may see a new post
+        timeline = self._timelines.get(user_id, []) if since_id else self._timeline(user_id)
+        start = 0
+        if since_id:
+            start = next((i for i, card in enumerate(timeline) if int(card['mblog']['id']) < int(since_id)), len(timeline))
+        cards = timeline[start:start + self.page_size]
+        data = {'cards': cards}
+        if cards and start + self.page_size < len(timeline):
+            data['cardlistInfo'] = {'since_id': int(cards[-1]['mblog']['id'])}
+        return data
+    
+    async def handle_get_index(self, request: web.Request) -> web.Response:
+        """Serve account timelines and screen-name searches."""
+        self.requests += 1
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+            
+        if self.random.random() < self.error_rate:
+            return web.Response(status=503, text="Service Unavailable")
+        if self.random.random() < self.not_ok_rate:
+            return web.json_response({'ok': 0, 'msg': '请求过于频繁'})
+            
+        container_id = request.query.get('containerid', '')
+        if container_id.startswith('107603'):
+            user_id = int(container_id[len('107603'):])
+            if not FIRST_ACCOUNT_ID <= user_id < FIRST_ACCOUNT_ID + self.accounts:
+                return web.json_response({'ok': 0, 'msg': '这里还没有内容'})
+            return web.json_response({'ok': 1, 'data': self._page(user_id, request.query.get('since_id'))})
+            
+        if container_id.startswith('100103'):
+            # Screen-name search: stub-account-<i> resolves to FIRST_ACCOUNT_ID + i
+            query = container_id.split('q=')[-1]
+            cards = []
+            if query.startswith('stub-account-'):
+                index = int(query[len('stub-account-'):])
+                cards.append({'card_type': 11, 'card_group': [
+                    {'user': {'id': FIRST_ACCOUNT_ID + index, 'screen_name': query}}
+                ]})
+            return web.json_response({'ok': 1, 'data': {'cards': cards}})
+            
+        return web.json_response({'ok': 0, 'msg': 'unknown container'})
+
+def main():
+    """Run the stand-in server until interrupted."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the m.weibo.cn container API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8848)
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    parser.add_argument('--latency', type=float, default=0.0, help="base response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of HTTP 503 responses")
+    parser.add_argument('--not-ok-rate', type=float, default=0.0, help="fraction of ok != 1 responses")
+    parser.add_argument('--new-post-rate', type=float, default=0.1, help="chance a poll sees a new post")
+    parser.add_argument('--history', type=int, default=None, help="posts kept per timeline (default: one page)")
+    args = parser.parse_args()
+    
+    server = StubWeiboServer(
+        accounts=args.accounts, fixtures_path=args.fixtures, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate, not_ok_rate=args.not_ok_rate,
+        new_post_rate=args.new_post_rate, history=args.history
+    )
+    logger.info(f"Serving {args.accounts} synthetic accounts on http://{args.host}:{args.port}/api/container/getIndex")
+    web.run_app(server.app(), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
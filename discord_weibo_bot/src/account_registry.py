@@ -0,0 +1,176 @@
+import bisect
+import sqlite3
+import time
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('account_registry')
+
+class AccountRegistry(Mapping):
+    """Runtime registry of tracked Weibo accounts, persisted in SQLite.
+    
+    Behaves like the WEIBO_ACCOUNTS dict (username -> account info) so it can
+    be handed to the fetcher and scheduler directly, with O(1) lookups by
+    username, numeric ID and screen name and prefix search over usernames.
+    Usernames are case-insensitive: they are stored lowercase and every
+    lookup is normalized the same way.
+    """
+    
+    def __init__(self, path: str, seed_accounts: Optional[Dict[str, Dict]] = None):
+        """Open the registry, seeding it from seed_accounts when it is empty."""
+        self.path = path
+        self._accounts: Dict[str, Dict] = {}
+        self._by_numeric_id: Dict[str, str] = {}
+        self._by_screen_name: Dict[str, str] = {}
+        self._sorted_usernames: List[str] = []
+        self._data_version = None  # changes when another connection commits to the database
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS accounts ("
+            "username TEXT PRIMARY KEY, name TEXT NOT NULL, weibo_id TEXT NOT NULL, "
+            "numeric_id TEXT, description TEXT NOT NULL, added_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_numeric_id ON accounts (numeric_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accounts_weibo_id ON accounts (weibo_id)")
+        self._conn.commit()
+        
+        if seed_accounts and not self._conn.execute("SELECT 1 FROM accounts LIMIT 1").fetchone():
+            for username, account in seed_accounts.items():
+                self.add(username, account['weibo_id'], account['numeric_id'], account['name'], account['description'])
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            logger.info(f"Seeded account registry with {len(seed_accounts)} accounts")
+        else:
+            self._load()
+            
+    def _load(self):
+        """Load every account into the in-memory indexes."""
+        rows = self._conn.execute("SELECT username, name, weibo_id, numeric_id, description FROM accounts")
+        for username, name, weibo_id, numeric_id, description in rows:
+            self._index(username, {
+                'name': name,
+                'weibo_id': weibo_id,
+                'numeric_id': numeric_id,
+                'description': description
+            })
+        self._sorted_usernames.sort()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        logger.info(f"Loaded {len(self._accounts)} tracked accounts")
+    
+    def reload(self) -> bool:
+        """Re-read the registry if another process changed it; return True if it was re-read."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return False
+        self._accounts.clear()
+        self._by_numeric_id.clear()
+        self._by_screen_name.clear()
+        self._sorted_usernames.clear()
+        self._load()
+        return True
+    
+    def _index(self, username: str, account: Dict):
+        """Add an account to the in-memory indexes (the sorted list is maintained by the caller)."""
+        username = self.normalize(username)
+        self._accounts[username] = account
+        self._by_screen_name[account['weibo_id']] = username
+        if account['numeric_id']:
+            self._by_numeric_id[str(account['numeric_id'])] = username
+        self._sorted_usernames.append(username)
+    
+    @staticmethod
+    def normalize(username: str) -> str:
+        """Return the key a username is stored under."""
+        return username.strip().lower()
+    
+    def __getitem__(self, username: str) -> Dict:
+        return self._accounts[self.normalize(username)]
+    
+    def __contains__(self, username: object) -> bool:
+        return isinstance(username, str) and self.normalize(username) in self._accounts
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sorted_usernames)
+    
+    def __len__(self) -> int:
+        return len(self._accounts)
+    
+    def find_by_numeric_id(self, numeric_id: Any) -> Optional[str]:
+        """Return the username tracking a numeric Weibo ID."""
+        return self._by_numeric_id.get(str(numeric_id))
+    
+    def find_by_screen_name(self, weibo_id: str) -> Optional[str]:
+        """Return the username tracking a Weibo screen name."""
+        return self._by_screen_name.get(weibo_id)
+    
+    def add(self, username: str, weibo_id: str, numeric_id: Any = None,
+            name: Optional[str] = None, description: str = "") -> bool:
+        """Start tracking an account. Returns False if the username or account is already tracked."""
+        username = self.normalize(username)
+        if (username in self._accounts or weibo_id in self._by_screen_name
+                or (numeric_id and str(numeric_id) in self._by_numeric_id)):
+            return False
+        account = {
+            'name': name or weibo_id,
+            'weibo_id': weibo_id,
+            'numeric_id': str(numeric_id) if numeric_id else None,
+            'description': description
+        }
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO accounts (username, name, weibo_id, numeric_id, description, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (username, account['name'], weibo_id, account['numeric_id'], description, time.time())
+            )
+        self._accounts[username] = account
+        self._by_screen_name[weibo_id] = username
+        if account['numeric_id']:
+            self._by_numeric_id[account['numeric_id']] = username
+        bisect.insort(self._sorted_usernames, username)
+        return True
+    
+    def remove(self, username: str) -> bool:
+        """Stop tracking an account. Returns False if it was not tracked."""
+        username = self.normalize(username)
+        account = self._accounts.pop(username, None)
+        if account is None:
+            return False
+        with self._conn:
+            self._conn.execute("DELETE FROM accounts WHERE lower(username) = ?", (username,))
+        self._by_screen_name.pop(account['weibo_id'], None)
+        if account['numeric_id']:
+            self._by_numeric_id.pop(str(account['numeric_id']), None)
+        index = bisect.bisect_left(self._sorted_usernames, username)
+        del self._sorted_usernames[index]
+        return True
+    
+    def set_numeric_id(self, username: str, numeric_id: Any):
+        """Persist a numeric ID resolved at runtime."""
+        username = self.normalize(username)
+        account = self._accounts.get(username)
+        if account is None:
+            return
+        # The previous ID no longer belongs to this account
+        if account['numeric_id'] and self._by_numeric_id.get(str(account['numeric_id'])) == username:
+            del self._by_numeric_id[str(account['numeric_id'])]
+        account['numeric_id'] = str(numeric_id)
+        self._by_numeric_id[str(numeric_id)] = username
+        with self._conn:
+            self._conn.execute("UPDATE accounts SET numeric_id = ? WHERE lower(username) = ?", (str(numeric_id), username))
+    
+    def search(self, prefix: str = "", offset: int = 0, limit: int = 10) -> Tuple[List[Tuple[str, Dict]], int]:
+        """Return a page of (username, account) whose username starts with prefix, and the total match count."""
+        prefix = self.normalize(prefix)
+        start = bisect.bisect_left(self._sorted_usernames, prefix)
+        end = bisect.bisect_left(self._sorted_usernames, prefix + '\uffff') if prefix else len(self._sorted_usernames)
+        page = self._sorted_usernames[start + offset:min(end, start + offset + limit)]
+        return [(username, self._accounts[username]) for username in page], end - start
+    
+    def close(self):
+        """Close the registry database."""
+        self._conn.close()
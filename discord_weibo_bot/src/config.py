@@ -6,7 +6,8 @@ DISCORD_TOKEN = "YOUR_DISCORD_BOT_TOKEN"
 # Command prefix for the bot
 COMMAND_PREFIX = "!"
 
-# Weibo accounts to track
+# Weibo accounts to track. These seed the account registry (accounts.db) on
+# first run; afterwards accounts are managed with the !track and !untrack commands.
 WEIBO_ACCOUNTS = {
     "yangbingyi": {
         "name": "Yang Bingyi",
@@ -61,15 +62,114 @@ WEIBO_ACCOUNTS = {
 # Weibo API settings
 WEIBO_API_BASE_URL = "https://m.weibo.cn/api/container/getIndex"
 
+# HTTP settings for requests to Weibo
+REQUEST_TIMEOUT = 10  # seconds per request
+CONNECTION_POOL_SIZE = 20  # maximum open keep-alive connections
+MAX_CONCURRENT_FETCHES = 5  # maximum requests in flight per host
+FETCH_TICK_DEADLINE = 300  # seconds before unfinished fetches in a tick are skipped
+
+# Limits on requests to Weibo, shared by all accounts
+REQUESTS_PER_SECOND = 2  # sustained request rate
+REQUEST_BURST = 5  # requests that may be sent at once after a quiet period
+# After this many throttling responses in a row (ok != 1, HTTP 403/418/429) requests
+# are paused, starting at CIRCUIT_RESET_TIMEOUT seconds and doubling up to the maximum
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60
+CIRCUIT_MAX_RESET_TIMEOUT = 1800
+
+# How often accounts without a numeric ID are looked up again (seconds).
+# Failed lookups also back off individually.
+ID_RESOLVE_INTERVAL = 1800
+
 # Cache settings
 CACHE_DURATION = 300  # 5 minutes in seconds
+CACHE_MAX_ACCOUNTS = 1024  # accounts kept in the post cache before the least recently used is evicted
+# Where fetched posts are cached: "memory" (this process only), "sqlite" (post_cache.db,
+# shared by every bot instance started from this directory) or "redis" (needs the redis package)
+CACHE_BACKEND = "memory"
+CACHE_REDIS_URL = "redis://localhost:6379/0"
+SHARED_CACHE_MAX_AGE = 60  # with a shared cache, posts another instance fetched this recently are reused (seconds)
 
 # Fetch interval (in seconds)
-FETCH_INTERVAL = 600  # 10 minutes
+FETCH_INTERVAL = 600  # 10 minutes, used until an account's posting rate is known
+
+# Adaptive polling settings
+POLL_MIN_INTERVAL = 60  # never poll an account more often than this (seconds)
+POLL_MAX_INTERVAL = 3600  # never poll an account less often than this (seconds)
+POLL_REQUEST_BUDGET = 30  # maximum account polls started per minute
+SCHEDULER_TICK = 15  # how often the scheduler checks for due accounts (seconds)
+
+# Polling mode: "local" polls in the bot process, "partitioned" leaves polling to
+# worker processes started with `python src/main.py --worker <id>`, which split the
+# accounts between them and send new posts to the bot over POST_QUEUE_ADDRESS.
+POLLING_MODE = "local"
+POST_QUEUE_ADDRESS = "post_queue.sock"  # Unix socket path, or "host:port" for workers on other machines
+WORKER_DIR = "workers"  # heartbeat files of live workers (shared directory for multi-machine setups)
+WORKER_HEARTBEAT_INTERVAL = 10  # how often workers announce themselves and rebalance (seconds)
+WORKER_TTL = 30  # a worker silent for this long is considered gone and its accounts are reassigned
+
+# Number of seen post IDs remembered per account to avoid duplicates
+SEEN_POSTS_PER_ACCOUNT = 200
 
 # Maximum number of posts to fetch per account
 MAX_POSTS_PER_ACCOUNT = 5
 
+# After downtime, an account's timeline is paged back to the newest post already
+# delivered, up to this many extra pages, so missed posts are delivered oldest first
+# (0 turns backfill off and only the newest MAX_POSTS_PER_ACCOUNT posts are sent)
+BACKFILL_MAX_PAGES = 10
+
+# Delivery settings
+DELIVERY_QUEUE_SIZE = 100  # embeds queued per channel before producers wait
+DELIVERY_CONCURRENCY = 5  # messages sent to Discord at the same time
+DELIVERY_MAX_ATTEMPTS = 5  # sends of a message before its posts are dropped
+
+# Digest mode: with !digest <minutes>, a channel gets its new posts batched into one
+# digest per interval instead of a message per post. Pending digests survive restarts.
+DIGEST_MIN_INTERVAL = 5  # minutes
+DIGEST_MAX_INTERVAL = 1440  # minutes
+DIGEST_TICK = 30  # how often due digests are sent (seconds)
+
+# Metrics endpoint (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_ENABLED = False
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+
+# Number of accounts shown per page by the !list command
+ACCOUNTS_PER_PAGE = 10
+
+# Every post the bot sees is archived for the !search command
+SEARCH_RESULTS_PER_PAGE = 5
+
+# Engagement tracking for !trending (needs the numpy package). Reposts, comments and
+# likes of recently seen posts are re-sampled ENGAGEMENT_FIRST_RESAMPLE seconds after a
+# post is first seen, then at intervals growing by ENGAGEMENT_RESAMPLE_GROWTH, until
+# the post is ENGAGEMENT_TRACK_DURATION seconds old. Each sample is one Weibo request,
+# so at most ENGAGEMENT_RESAMPLE_BATCH posts are re-sampled per ENGAGEMENT_RESAMPLE_TICK.
+ENGAGEMENT_ENABLED = True
+ENGAGEMENT_MAX_POSTS = 50000  # posts tracked at once; the oldest is dropped beyond this
+ENGAGEMENT_FIRST_RESAMPLE = 300
+ENGAGEMENT_RESAMPLE_GROWTH = 2
+ENGAGEMENT_TRACK_DURATION = 86400
+ENGAGEMENT_RESAMPLE_TICK = 60  # seconds
+ENGAGEMENT_RESAMPLE_BATCH = 20
+TRENDING_DEFAULT_WINDOW = "6h"  # used when !trending is given no window
+TRENDING_RESULTS = 10
+
+# Warm start: the post cache and polling schedule are saved periodically and on
+# shutdown, and restored at startup so a restart does not begin cold
+WARM_START_ENABLED = True
+WARM_START_SNAPSHOT_INTERVAL = 300  # seconds between snapshots
+
 # Discord embed settings
 EMBED_COLOR = 0x1DA1F2  # Twitter blue color
 EMBED_FOOTER = "SNH48 Weibo Bot"
+EMBED_CACHE_SIZE = 512  # rendered embeds kept for reuse across channels
+
+# Post images are downloaded and uploaded with the embed, because Discord often
+# cannot load Weibo image links itself. Multi-image posts are combined into one
+# grid thumbnail when Pillow is installed.
+MEDIA_CACHE_ENABLED = True
+MEDIA_CACHE_MAX_BYTES = 500 * 1024 * 1024  # disk space for cached images (bytes)
+MEDIA_FETCH_CONCURRENCY = 8  # images downloaded at the same time
+MEDIA_GRID_TILE = 300  # size of each image in a grid thumbnail (pixels)
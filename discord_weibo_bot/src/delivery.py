@@ -0,0 +1,200 @@
+import discord
+import asyncio
+import time
+import logging
+import sys
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Add the parent directory to sys.path to import the metrics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.media_cache import Attachment
+from src.metrics import SEND_LATENCY, DELIVERY_LATENCY
+from src.rate_limit import backoff_delay
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('delivery')
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_FILES_PER_MESSAGE = 10
+MAX_ATTACHMENT_BYTES_PER_MESSAGE = 8 * 1024 * 1024  # upload limit for servers without boosts
+
+# Backoff between attempts to send a message that failed, in seconds
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 60
+
+def discord_files(attachments: Sequence[Attachment]) -> List[discord.File]:
+    """Open attachments for one send; discord.File objects cannot be reused."""
+    return [
+        discord.File(attachment.path, filename=attachment.filename)
+        for attachment in attachments if os.path.exists(attachment.path)
+    ]
+
+class DeliveryDispatcher:
+    """Delivers embeds to Discord channels through per-channel queues.
+    
+    Each channel has its own bounded queue drained by its own worker, which
+    packs queued embeds into as few messages as Discord allows. Sending to a
+    channel is one rate-limit route, so one worker per channel never competes
+    with itself for a bucket, while discord.py waits out any 429s. A global
+    limit on concurrent sends keeps bursts to many channels under the global
+    rate limit, and full queues make producers wait (backpressure).
+    Posts are marked seen once they are queued, so a message that fails to
+    send is retried with backoff, up to max_attempts sends, before its posts
+    are dropped.
+    """
+    
+    def __init__(self, get_channel: Callable[[int], Any], queue_size: int = 100,
+                 max_concurrent_sends: int = 5, idle_timeout: float = 300, max_attempts: int = 5):
+        """Initialize the dispatcher with a function that resolves channel IDs."""
+        self.get_channel = get_channel
+        self.queue_size = queue_size
+        self.max_concurrent_sends = max_concurrent_sends
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._send_slots: Optional[asyncio.Semaphore] = None
+        
+        # Delivery metrics
+        self.messages_sent = 0
+        self.embeds_sent = 0
+        self.embeds_failed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        
+    async def enqueue(self, channel_id: str, embed: Any, attachments: Sequence[Attachment] = ()):
+        """Queue an embed and its attachments for a channel, waiting if the channel's queue is full."""
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[channel_id] = queue
+            self._workers[channel_id] = asyncio.ensure_future(self._worker(channel_id, queue))
+        await queue.put((time.monotonic(), embed, tuple(attachments)))
+    
+    def queue_depth(self) -> int:
+        """Return the number of embeds waiting across all channels."""
+        return sum(queue.qsize() for queue in self._queues.values())
+    
+    def stats(self) -> Dict[str, float]:
+        """Return delivery metrics."""
+        return {
+            'queue_depth': self.queue_depth(),
+            'active_channels': len(self._workers),
+            'messages_sent': self.messages_sent,
+            'embeds_sent': self.embeds_sent,
+            'embeds_failed': self.embeds_failed,
+            'average_latency': self.total_latency / self.embeds_sent if self.embeds_sent else 0.0,
+            'max_latency': self.max_latency
+        }
+    
+    async def _worker(self, channel_id: str, queue: asyncio.Queue):
+        """Drain a channel's queue, packing embeds into as few messages as possible."""
+        carry = None
+        while True:
+            if carry is not None:
+                item, carry = carry, None
+            else:
+                try:
+                    item = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        # Retire idle workers so quiet channels cost nothing
+                        del self._queues[channel_id]
+                        del self._workers[channel_id]
+                        return
+                    continue
+                    
+            batch = [item]
+            chars = len(item[1])
+            files = len(item[2])
+            file_bytes = sum(attachment.size for attachment in item[2])
+            while len(batch) < MAX_EMBEDS_PER_MESSAGE and not queue.empty():
+                next_item = queue.get_nowait()
+                next_bytes = sum(attachment.size for attachment in next_item[2])
+                if (chars + len(next_item[1]) > MAX_EMBED_CHARS_PER_MESSAGE
+                        or files + len(next_item[2]) > MAX_FILES_PER_MESSAGE
+                        or file_bytes + next_bytes > MAX_ATTACHMENT_BYTES_PER_MESSAGE):
+                    carry = next_item
+                    break
+                batch.append(next_item)
+                chars += len(next_item[1])
+                files += len(next_item[2])
+                file_bytes += next_bytes
+                
+            try:
+                # Retrying in the worker keeps the channel's posts in order
+                for attempt in range(1, self.max_attempts + 1):
+                    if await self._send(channel_id, batch, last_attempt=attempt == self.max_attempts):
+                        break
+                    await asyncio.sleep(backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY))
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _send(self, channel_id: str, batch: List[Tuple[float, Any, Tuple[Attachment, ...]]],
+                    last_attempt: bool = True) -> bool:
+        """Send a batch of embeds and their attachments to a channel as one message.
+        
+        Returns False if the send failed and should be retried, True once the
+        batch was sent or dropped.
+        """
+        if self._send_slots is None:
+            self._send_slots = asyncio.Semaphore(self.max_concurrent_sends)
+            
+        channel = self.get_channel(int(channel_id))
+        if channel is None:
+            logger.warning(f"Channel {channel_id} not found, dropping {len(batch)} embeds")
+            self.embeds_failed += len(batch)
+            return True
+            
+        try:
+            async with self._send_slots:
+                started = time.monotonic()
+                attachments = [attachment for _, _, item_attachments in batch for attachment in item_attachments]
+                if attachments:
+                    await channel.send(embeds=[embed for _, embed, _ in batch], files=discord_files(attachments))
+                else:
+                    await channel.send(embeds=[embed for _, embed, _ in batch])
+                SEND_LATENCY.observe(time.monotonic() - started)
+        except (discord.Forbidden, discord.NotFound) as e:
+            # Retrying cannot help when the bot may not post there or the channel is gone
+            logger.error(f"Error sending post to channel {channel_id}: {str(e)}")
+            self.embeds_failed += len(batch)
+            return True
+        except Exception as e:
+            if not last_attempt:
+                logger.warning(f"Error sending post to channel {channel_id}, retrying: {str(e)}")
+                return False
+            logger.error(f"Error sending post to channel {channel_id}, dropping {len(batch)} embeds: {str(e)}")
+            self.embeds_failed += len(batch)
+            return True
+            
+        now = time.monotonic()
+        self.messages_sent += 1
+        self.embeds_sent += len(batch)
+        for enqueued_at, _, _ in batch:
+            latency = now - enqueued_at
+            DELIVERY_LATENCY.observe(latency)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+        return True
+    
+    async def close(self, timeout: float = 10):
+        """Wait briefly for queued embeds to be sent, then stop all workers."""
+        queues = list(self._queues.values())
+        if queues:
+            try:
+                await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in queues)), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self.queue_depth()} undelivered embeds on shutdown")
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._queues.clear()
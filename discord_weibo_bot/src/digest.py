@@ -0,0 +1,174 @@
+import time
+import logging
+import sys
+import os
+from typing import Dict, List, Optional
+
+# Add the parent directory to sys.path to import storage helpers and the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage import load_json, WriteBehindJSON
+from src.models import Account, Post
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('digest')
+
+class DigestAggregator:
+    """Collects new posts for channels in digest mode until their next digest is due.
+    
+    Posts are added to each channel's pending digest as they are delivered,
+    and a post waiting in several channels' digests is stored once. Digest
+    settings and pending posts are written back in batches, off the event
+    loop, so a restart does not lose them.
+    """
+    
+    def __init__(self, path: str, flush_delay: float = 2.0):
+        """Load digest settings and pending posts from the given JSON file."""
+        self.path = path
+        self.flush_delay = flush_delay
+        self._intervals: Dict[str, float] = {}  # channel ID -> seconds between digests
+        self._next_due: Dict[str, float] = {}  # channel ID -> when its next digest is sent
+        self._pending: Dict[str, Dict[str, None]] = {}  # channel ID -> post IDs, oldest first
+        self._posts: Dict[str, Post] = {}  # post ID -> post waiting in at least one digest
+        self._waiting: Dict[str, int] = {}  # post ID -> number of digests it is waiting in
+        self._writer = WriteBehindJSON(path, self.to_dict, flush_delay, name='digests')
+        self._load()
+    
+    def _load(self):
+        """Restore digest settings and pending posts from the digest file."""
+        data = load_json(self.path, {})
+        accounts: Dict[str, Account] = {}
+        for post_id, entry in data.get('posts', {}).items():
+            try:
+                username = entry['username']
+                account = accounts.get(username)
+                if account is None:
+                    account = accounts[username] = Account.from_dict(username, entry['post']['user'])
+                self._posts[post_id] = Post.from_dict(entry['post'], account)
+            except Exception as e:
+                logger.error(f"Error loading pending digest post {post_id}: {str(e)}")
+        for channel_id, state in data.get('channels', {}).items():
+            self._intervals[channel_id] = state['interval']
+            self._next_due[channel_id] = state['next_due']
+            self._pending[channel_id] = dict.fromkeys(
+                post_id for post_id in state.get('posts', []) if post_id in self._posts
+            )
+            for post_id in self._pending[channel_id]:
+                self._waiting[post_id] = self._waiting.get(post_id, 0) + 1
+        self._posts = {post_id: post for post_id, post in self._posts.items() if post_id in self._waiting}
+        if self._intervals:
+            pending = sum(len(post_ids) for post_ids in self._pending.values())
+            logger.info(f"Loaded digest settings for {len(self._intervals)} channels with {pending} pending posts")
+    
+    def interval(self, channel_id: str) -> Optional[float]:
+        """Return the seconds between a channel's digests, or None if it gets every post as it arrives."""
+        return self._intervals.get(channel_id)
+    
+    def is_digest(self, channel_id: str) -> bool:
+        """Check whether a channel is in digest mode."""
+        return channel_id in self._intervals
+    
+    def pending_count(self, channel_id: str) -> int:
+        """Return the number of posts waiting for a channel's next digest."""
+        return len(self._pending.get(channel_id, ()))
+    
+    def next_due(self, channel_id: str) -> Optional[float]:
+        """Return when a channel's next digest is due, or None if it is not in digest mode."""
+        return self._next_due.get(channel_id)
+    
+    def enable(self, channel_id: str, interval: float, now: Optional[float] = None):
+        """Put a channel in digest mode, or change its interval; the next digest is due one interval from now."""
+        now = time.time() if now is None else now
+        self._intervals[channel_id] = interval
+        self._next_due[channel_id] = now + interval
+        self._pending.setdefault(channel_id, {})
+        self._mark_dirty()
+    
+    def disable(self, channel_id: str) -> List[Post]:
+        """Take a channel out of digest mode and return the posts that were waiting for its digest."""
+        if channel_id not in self._intervals:
+            return []
+        posts = self._take_posts(channel_id)
+        del self._intervals[channel_id]
+        del self._next_due[channel_id]
+        del self._pending[channel_id]
+        self._mark_dirty()
+        return posts
+    
+    def add(self, channel_id: str, posts: List[Post]):
+        """Add new posts, oldest first, to a channel's pending digest."""
+        pending = self._pending.get(channel_id)
+        if pending is None:
+            return
+        for post in posts:
+            self._posts[post.id] = post
+            if post.id not in pending:
+                pending[post.id] = None
+                self._waiting[post.id] = self._waiting.get(post.id, 0) + 1
+        if posts:
+            self._mark_dirty()
+    
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Return the channels whose next digest is due."""
+        now = time.time() if now is None else now
+        return [channel_id for channel_id, next_due in self._next_due.items() if next_due <= now]
+    
+    def take(self, channel_id: str, now: Optional[float] = None) -> List[Post]:
+        """Return a due channel's pending posts, oldest first, and schedule its next digest.
+        
+        Digests keep their cadence (e.g. on the hour): the next one is due at
+        the first multiple of the interval after now, counted from the last.
+        """
+        if channel_id not in self._intervals:
+            return []
+        now = time.time() if now is None else now
+        interval = self._intervals[channel_id]
+        next_due = self._next_due[channel_id]
+        if next_due <= now:
+            next_due += interval * ((now - next_due) // interval + 1)
+        self._next_due[channel_id] = next_due
+        posts = self._take_posts(channel_id)
+        self._mark_dirty()
+        return posts
+    
+    def _take_posts(self, channel_id: str) -> List[Post]:
+        """Empty a channel's pending digest and drop posts no other channel is waiting for."""
+        post_ids = self._pending.get(channel_id)
+        if not post_ids:
+            return []
+        self._pending[channel_id] = {}
+        posts = [self._posts[post_id] for post_id in post_ids]
+        for post_id in post_ids:
+            self._waiting[post_id] -= 1
+            if not self._waiting[post_id]:
+                del self._waiting[post_id]
+                del self._posts[post_id]
+        return posts
+    
+    def to_dict(self) -> Dict:
+        """Return the digest settings and pending posts in the digest file format."""
+        return {
+            'channels': {
+                channel_id: {
+                    'interval': interval,
+                    'next_due': self._next_due[channel_id],
+                    'posts': list(self._pending.get(channel_id, ()))
+                }
+                for channel_id, interval in self._intervals.items()
+            },
+            'posts': {
+                post_id: {'username': post.account.username, 'post': post.to_dict()}
+                for post_id, post in self._posts.items()
+            }
+        }
+    
+    def _mark_dirty(self):
+        """Record a change and schedule a batched write."""
+        self._writer.mark_dirty()
+    
+    async def flush(self):
+        """Write pending changes to disk in a worker thread."""
+        await self._writer.flush()
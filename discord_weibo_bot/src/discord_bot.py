@@ -4,16 +4,43 @@ import asyncio
 import logging
 import sys
 import os
-import json
-from datetime import datetime
-from typing import Dict, List, Optional
+from typing import List, Optional, Tuple
 
 # Add the parent directory to sys.path to import config and weibo_fetcher
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.weibo_fetcher import WeiboFetcher
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.models import Post
+from src.embeds import create_post_embed, create_digest_embeds
+from src.subscription_store import SubscriptionStore
+from src.account_registry import AccountRegistry
+from src.seen_ledger import SeenPostLedger
+from src.poll_scheduler import PollScheduler
+from src.embed_cache import EmbedCache
+from src.delivery import DeliveryDispatcher, discord_files
+from src.media_cache import MediaCache, Attachment
+from src.post_queue import PostQueueServer, queue_address
+from src.post_archive import PostArchive
+from src.html_renderer import render_plain
+from src.warm_start import WarmStartSnapshot
+from src.engagement import EngagementTracker, HAS_NUMPY, parse_window, format_window
+from src.digest import DigestAggregator
+from src import metrics
 from src.config import (
     DISCORD_TOKEN, COMMAND_PREFIX, WEIBO_ACCOUNTS, 
-    FETCH_INTERVAL, EMBED_COLOR, EMBED_FOOTER
+    FETCH_INTERVAL, EMBED_COLOR, EMBED_FOOTER,
+    REQUEST_TIMEOUT, CONNECTION_POOL_SIZE, MAX_CONCURRENT_FETCHES,
+    FETCH_TICK_DEADLINE, CACHE_MAX_ACCOUNTS, CACHE_BACKEND, CACHE_REDIS_URL, SHARED_CACHE_MAX_AGE,
+    REQUESTS_PER_SECOND, REQUEST_BURST, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_MAX_RESET_TIMEOUT, SEEN_POSTS_PER_ACCOUNT, POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL, POLL_REQUEST_BUDGET, SCHEDULER_TICK, EMBED_CACHE_SIZE,
+    DELIVERY_QUEUE_SIZE, DELIVERY_CONCURRENCY, DELIVERY_MAX_ATTEMPTS, ID_RESOLVE_INTERVAL,
+    METRICS_ENABLED, METRICS_HOST, METRICS_PORT, ACCOUNTS_PER_PAGE, SEARCH_RESULTS_PER_PAGE,
+    POLLING_MODE, POST_QUEUE_ADDRESS, MEDIA_CACHE_ENABLED, MEDIA_CACHE_MAX_BYTES,
+    MEDIA_FETCH_CONCURRENCY, MEDIA_GRID_TILE, WARM_START_ENABLED, WARM_START_SNAPSHOT_INTERVAL,
+    BACKFILL_MAX_PAGES, ENGAGEMENT_ENABLED, ENGAGEMENT_MAX_POSTS, ENGAGEMENT_FIRST_RESAMPLE,
+    ENGAGEMENT_RESAMPLE_GROWTH, ENGAGEMENT_TRACK_DURATION, ENGAGEMENT_RESAMPLE_TICK,
+    ENGAGEMENT_RESAMPLE_BATCH, TRENDING_DEFAULT_WINDOW, TRENDING_RESULTS,
+    DIGEST_MIN_INTERVAL, DIGEST_MAX_INTERVAL, DIGEST_TICK
 )
 
 # Set up logging
@@ -23,24 +50,121 @@ logging.basicConfig(
 )
 logger = logging.getLogger('discord_bot')
 
+# Tracked accounts live in a registry seeded from WEIBO_ACCOUNTS on first run
+account_registry = AccountRegistry(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'accounts.db'),
+    seed_accounts=WEIBO_ACCOUNTS
+)
+
 # Create configuration dictionary for the WeiboFetcher
 config = {
-    'WEIBO_ACCOUNTS': WEIBO_ACCOUNTS,
+    'WEIBO_ACCOUNTS': account_registry,
     'WEIBO_API_BASE_URL': 'https://m.weibo.cn/api/container/getIndex',
     'CACHE_DURATION': 300,  # 5 minutes
-    'MAX_POSTS_PER_ACCOUNT': 5
+    'CACHE_MAX_ACCOUNTS': CACHE_MAX_ACCOUNTS,
+    'CACHE_BACKEND': CACHE_BACKEND,
+    'CACHE_PATH': os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'post_cache.db'),
+    'CACHE_REDIS_URL': CACHE_REDIS_URL,
+    'SHARED_CACHE_MAX_AGE': SHARED_CACHE_MAX_AGE,
+    'ID_CACHE_FILE': os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'numeric_ids.json'),
+    'MAX_POSTS_PER_ACCOUNT': 5,
+    'BACKFILL_MAX_PAGES': BACKFILL_MAX_PAGES,
+    'REQUEST_TIMEOUT': REQUEST_TIMEOUT,
+    'CONNECTION_POOL_SIZE': CONNECTION_POOL_SIZE,
+    'MAX_CONCURRENT_FETCHES': MAX_CONCURRENT_FETCHES,
+    'FETCH_TICK_DEADLINE': FETCH_TICK_DEADLINE,
+    'REQUESTS_PER_SECOND': REQUESTS_PER_SECOND,
+    'REQUEST_BURST': REQUEST_BURST,
+    'CIRCUIT_FAILURE_THRESHOLD': CIRCUIT_FAILURE_THRESHOLD,
+    'CIRCUIT_RESET_TIMEOUT': CIRCUIT_RESET_TIMEOUT,
+    'CIRCUIT_MAX_RESET_TIMEOUT': CIRCUIT_MAX_RESET_TIMEOUT
 }
 
 # Initialize the bot with intents
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
+# The built-in help command is replaced by the !help command below
+bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents, help_command=None)
 
 # Initialize the WeiboFetcher
-weibo_fetcher = WeiboFetcher(config)
+weibo_fetcher = AsyncWeiboFetcher(config)
+
+# Load channel subscriptions once; changes are written back in the background
+subscription_store = SubscriptionStore(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
+)
+
+# Record the post IDs already seen per account to avoid duplicates across restarts
+seen_ledger = SeenPostLedger(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seen_posts.db'),
+    max_per_account=SEEN_POSTS_PER_ACCOUNT
+)
 
-# Store the last post IDs to avoid duplicates
-last_post_ids = {}
+# Channels in digest mode collect their new posts here between digests
+digest_aggregator = DigestAggregator(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'digests.json')
+)
+
+# Archive every post for !search; writes are batched in the background
+post_archive = PostArchive(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'posts_archive.db')
+)
+
+# Re-sample the engagement of recent posts for !trending, resuming the history
+# saved at the last shutdown; needs NumPy
+engagement_tracker = EngagementTracker(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'engagement.npz'),
+    max_posts=ENGAGEMENT_MAX_POSTS,
+    first_resample=ENGAGEMENT_FIRST_RESAMPLE,
+    growth=ENGAGEMENT_RESAMPLE_GROWTH,
+    track_duration=ENGAGEMENT_TRACK_DURATION
+) if ENGAGEMENT_ENABLED and HAS_NUMPY else None
+if engagement_tracker:
+    engagement_tracker.load()
+
+# Queue outgoing posts per channel and send them concurrently
+delivery = DeliveryDispatcher(
+    bot.get_channel,
+    queue_size=DELIVERY_QUEUE_SIZE,
+    max_concurrent_sends=DELIVERY_CONCURRENCY,
+    max_attempts=DELIVERY_MAX_ATTEMPTS
+)
+
+# Expose fetcher and delivery state to the metrics endpoint
+metrics.CACHE_HITS.set_function(lambda: weibo_fetcher.cache.hits)
+metrics.CACHE_STALE_HITS.set_function(lambda: weibo_fetcher.cache.stale_hits)
+metrics.CACHE_MISSES.set_function(lambda: weibo_fetcher.cache.misses)
+metrics.CIRCUIT_OPEN.set_function(lambda: int(weibo_fetcher.circuit_breaker.is_open))
+metrics.DELIVERY_QUEUE_DEPTH.set_function(delivery.queue_depth)
+metrics.FETCH_INTERVAL.set(FETCH_INTERVAL)
+metrics_server = metrics.MetricsServer(METRICS_HOST, METRICS_PORT) if METRICS_ENABLED else None
+
+# Resume incremental fetches from the newest post seen before the last restart
+for username in account_registry:
+    if seen_ledger.has_account(username):
+        weibo_fetcher.newest_post_ids[username] = seen_ledger.newest(username)
+
+# Decide when each account is polled next based on how often it posts
+poll_scheduler = PollScheduler(
+    account_registry,
+    default_interval=FETCH_INTERVAL,
+    min_interval=POLL_MIN_INTERVAL,
+    max_interval=POLL_MAX_INTERVAL,
+    max_requests_per_minute=POLL_REQUEST_BUDGET
+)
+
+# Restore the post cache and polling schedule saved before the last restart
+warm_start = WarmStartSnapshot(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'warm_start.json')
+) if WARM_START_ENABLED else None
+if warm_start:
+    warm_start.load(weibo_fetcher, poll_scheduler)
+
+# In partitioned mode poll workers fetch the posts and send them here for delivery
+post_queue_server = PostQueueServer(
+    queue_address(POST_QUEUE_ADDRESS, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    lambda username, posts: deliver_new_posts(username, posts)
+) if POLLING_MODE == "partitioned" else None
 
 @bot.event
 async def on_ready():
@@ -48,263 +172,366 @@ async def on_ready():
     logger.info(f'Logged in as {bot.user.name} ({bot.user.id})')
     logger.info('------')
     
-    # Start the background task to fetch posts
+    # Start the background tasks to save the warm start snapshot, send digests,
+    # re-sample engagement, resolve account IDs and fetch posts
+    if warm_start and not save_warm_start.is_running():
+        save_warm_start.start()
+    if not send_digests.is_running():
+        send_digests.start()
+    if engagement_tracker and not resample_engagement.is_running():
+        resample_engagement.start()
+    if post_queue_server:
+        return  # polling is done by the workers
+    if not resolve_account_ids.is_running():
+        resolve_account_ids.start()
     if not fetch_weibo_posts.is_running():
         fetch_weibo_posts.start()
 
-@tasks.loop(seconds=FETCH_INTERVAL)
+@tasks.loop(seconds=ID_RESOLVE_INTERVAL)
+async def resolve_account_ids():
+    """Background task to look up numeric IDs for accounts configured by screen name only."""
+    try:
+        resolved = await weibo_fetcher.resolve_numeric_ids()
+        for username, numeric_id in resolved.items():
+            account_registry.set_numeric_id(username, numeric_id)
+    except Exception as e:
+        logger.error(f"Error in resolve_account_ids task: {str(e)}")
+
+@tasks.loop(seconds=SCHEDULER_TICK)
 async def fetch_weibo_posts():
-    """Background task to fetch Weibo posts periodically."""
-    logger.info("Fetching Weibo posts...")
+    """Background task to fetch Weibo posts for the accounts that are due."""
+    # While Weibo is throttling us, due accounts wait for the circuit to close
+    if weibo_fetcher.circuit_breaker.is_open:
+        return
+    due_accounts = poll_scheduler.due()
+    if not due_accounts:
+        return
+    logger.info(f"Fetching Weibo posts for {len(due_accounts)} accounts...")
+    await poll_accounts(due_accounts)
+
+async def warm_up():
+    """Poll the accounts that are due while the bot is still connecting to Discord."""
+    due_accounts = poll_scheduler.due()
+    if not due_accounts:
+        return
+    logger.info(f"Warm start: fetching Weibo posts for {len(due_accounts)} accounts while connecting to Discord...")
+    await poll_accounts(due_accounts, hold_until_ready=True)
+
+async def poll_accounts(due_accounts: List[str], hold_until_ready: bool = False):
+    """Fetch the new posts of due accounts concurrently and deliver them.
     
-    try:
-        # Fetch posts for all accounts
-        all_posts = weibo_fetcher.fetch_all_posts()
+    Each account is delivered as soon as its fetch completes, so fast accounts
+    do not wait on slow ones. With hold_until_ready, posts fetched before the
+    bot has connected to Discord are delivered once it is ready.
+    """
+    tick_started = asyncio.get_running_loop().time()
+    pending = set(due_accounts)
+    held = []
+    
+    async def deliver(username: str, posts: List[Post]):
+        new_post_count = await deliver_new_posts(username, posts)
+        pending.discard(username)
+        if username not in account_registry:
+            return  # untracked during this tick
+        poll_scheduler.record(username, new_post_count, error=username in weibo_fetcher.failed_accounts)
         
-        # Check for new posts and send them to subscribed channels
-        for username, posts in all_posts.items():
-            if not posts:
-                continue
-                
-            # Get the latest post ID
-            latest_post_id = posts[0]['id'] if posts else None
-            
-            # If we have a new post, send it to subscribed channels
-            if latest_post_id and username in last_post_ids and latest_post_id != last_post_ids[username]:
-                # Get subscribed channels from the subscription file
-                subscribed_channels = get_subscriptions(username)
-                
-                # Send the new post to all subscribed channels
-                for channel_id in subscribed_channels:
-                    try:
-                        channel = bot.get_channel(int(channel_id))
-                        if channel:
-                            # Find the new posts (those with IDs we haven't seen)
-                            new_posts = []
-                            for post in posts:
-                                if post['id'] not in last_post_ids.get(username, []):
-                                    new_posts.append(post)
-                            
-                            # Send each new post
-                            for post in reversed(new_posts):  # Send oldest first
-                                embed = create_post_embed(post)
-                                await channel.send(embed=embed)
-                    except Exception as e:
-                        logger.error(f"Error sending post to channel {channel_id}: {str(e)}")
-            
-            # Update the last post ID
-            if latest_post_id:
-                last_post_ids[username] = latest_post_id
+    try:
+        # Fetch only the new posts of the due accounts
+        async for username, posts in weibo_fetcher.iter_all_posts(due_accounts, force_refresh=True, incremental=True):
+            if hold_until_ready and not bot.is_ready():
+                held.append((username, posts))
+            else:
+                await deliver(username, posts)
+        if held:
+            await bot.wait_until_ready()
+            for username, posts in held:
+                await deliver(username, posts)
                 
     except Exception as e:
-        logger.error(f"Error in fetch_weibo_posts task: {str(e)}")
+        logger.error(f"Error polling Weibo accounts: {str(e)}")
+    finally:
+        # Accounts cut off by the tick deadline or an error are retried with backoff
+        for username in pending:
+            if username in account_registry:
+                poll_scheduler.record(username, error=True)
+        metrics.TICK_DURATION.set(asyncio.get_running_loop().time() - tick_started)
+
+async def deliver_new_posts(username: str, posts: List[Post]) -> int:
+    """Send an account's unseen posts to its subscribed channels and return how many there were."""
+    if not posts:
+        return 0
+    if engagement_tracker:
+        engagement_tracker.track(posts)
+        
+    # The first time an account is seen, record its current posts
+    # without sending them so existing posts are not re-posted
+    if not seen_ledger.has_account(username):
+        post_archive.add(posts)
+        seen_ledger.mark_seen(username, [post.id for post in posts])
+        return 0
+        
+    # Find the new posts (those with IDs we haven't seen)
+    new_posts = seen_ledger.filter_new(username, posts)
+    if not new_posts:
+        return 0
+        
+    # Get subscribed channels from the subscription index; channels in
+    # digest mode get the posts in their next digest instead
+    subscribed_channels = subscription_store.get_channels(username)
+    live_channels = [channel_id for channel_id in subscribed_channels if not digest_aggregator.is_digest(channel_id)]
+    
+    # Fetch the full text of truncated posts first and archive the expanded
+    # posts, so !search matches their full text. Posts already seen were
+    # archived when they were new; archiving their truncated copies again
+    # would replace the full text.
+    new_posts = await weibo_fetcher.expand_long_texts(new_posts)
+    post_archive.add(new_posts)
+    oldest_first = list(reversed(new_posts))
+    for channel_id in subscribed_channels:
+        digest_aggregator.add(channel_id, oldest_first)
+        
+    # Render each post once and reuse the embed for every channel, then queue
+    # the posts; the dispatcher packs them into as few messages as possible per channel
+    if live_channels:
+        rendered = await render_posts(oldest_first)
+        for channel_id in live_channels:
+            for embed, attachments in rendered:
+                await delivery.enqueue(channel_id, embed, attachments)
+    
+    # Record the new posts as seen; the dispatcher retries sends that fail
+    seen_ledger.mark_seen(username, [post.id for post in new_posts])
+    return len(new_posts)
 
 @fetch_weibo_posts.before_loop
 async def before_fetch_weibo_posts():
     """Wait until the bot is ready before starting the fetch task."""
+    # The first due accounts are polled by warm_up() while the bot connects
     await bot.wait_until_ready()
-    
-    # Initialize last_post_ids with current latest posts
-    try:
-        all_posts = weibo_fetcher.fetch_all_posts()
-        for username, posts in all_posts.items():
-            if posts:
-                last_post_ids[username] = posts[0]['id']
-    except Exception as e:
-        logger.error(f"Error initializing last_post_ids: {str(e)}")
 
-def get_subscriptions(username: str) -> List[str]:
-    """Get the list of channel IDs subscribed to a Weibo account."""
+@tasks.loop(seconds=WARM_START_SNAPSHOT_INTERVAL)
+async def save_warm_start():
+    """Background task to save the warm start snapshot, so a crash loses little."""
     try:
-        subscription_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
-        
-        if not os.path.exists(subscription_file):
-            with open(subscription_file, 'w') as f:
-                json.dump({}, f)
-            return []
-            
-        with open(subscription_file, 'r') as f:
-            subscriptions = json.load(f)
-            
-        return subscriptions.get(username, [])
+        data = warm_start.build(weibo_fetcher, poll_scheduler)
+        await asyncio.get_running_loop().run_in_executor(None, warm_start.write, data)
     except Exception as e:
-        logger.error(f"Error getting subscriptions: {str(e)}")
-        return []
+        logger.error(f"Error saving warm start snapshot: {str(e)}")
 
-def save_subscriptions(subscriptions: Dict[str, List[str]]):
-    """Save the subscription data to a file."""
+@tasks.loop(seconds=ENGAGEMENT_RESAMPLE_TICK)
+async def resample_engagement():
+    """Background task to re-sample the reposts, comments and likes of recent posts that are due."""
+    # Samples that come due while Weibo is throttling us are skipped
+    if weibo_fetcher.circuit_breaker.is_open:
+        return
+    post_ids = engagement_tracker.due(limit=ENGAGEMENT_RESAMPLE_BATCH)
+    if not post_ids:
+        return
     try:
-        subscription_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
-        
-        with open(subscription_file, 'w') as f:
-            json.dump(subscriptions, f)
+        samples = await asyncio.gather(*(weibo_fetcher.fetch_counts(post_id) for post_id in post_ids))
+        for post_id, counts in zip(post_ids, samples):
+            if counts is not None:
+                engagement_tracker.record(post_id, counts)
     except Exception as e:
-        logger.error(f"Error saving subscriptions: {str(e)}")
+        logger.error(f"Error in resample_engagement task: {str(e)}")
 
-def create_post_embed(post: Dict) -> discord.Embed:
-    """Create a Discord embed for a Weibo post."""
-    # Create the embed
-    embed = discord.Embed(
-        title=f"New Weibo post from {post['user']['name']}",
-        description=post['text'],
-        url=post['url'],
-        color=EMBED_COLOR,
-        timestamp=datetime.now()
-    )
-    
-    # Add author info
-    embed.set_author(
-        name=f"{post['user']['screen_name']} ({post['user']['description']})",
-        url=f"https://m.weibo.cn/u/{post['user']['id']}"
-    )
-    
-    # Add post metadata
-    embed.add_field(name="Posted via", value=post['source'], inline=True)
-    embed.add_field(name="Reposts", value=str(post['reposts_count']), inline=True)
-    embed.add_field(name="Comments", value=str(post['comments_count']), inline=True)
-    embed.add_field(name="Likes", value=str(post['attitudes_count']), inline=True)
-    
-    # Add the first image if available
-    if post['images'] and len(post['images']) > 0:
-        embed.set_image(url=post['images'][0])
-        
-        # Add additional images as fields if there are more
-        if len(post['images']) > 1:
-            for i, image_url in enumerate(post['images'][1:], 1):
-                embed.add_field(
-                    name=f"Additional Image {i}",
-                    value=f"[View Image]({image_url})",
-                    inline=False
-                )
-    
-    # Add retweeted content if available
-    if 'retweeted' in post:
-        retweeted = post['retweeted']
-        embed.add_field(
-            name=f"Retweeted from {retweeted['user']['screen_name']}",
-            value=retweeted['text'],
-            inline=False
-        )
-        
-        # Add retweeted image if available
-        if 'images' in retweeted and retweeted['images']:
-            embed.add_field(
-                name="Retweeted Image",
-                value=f"[View Image]({retweeted['images'][0]})",
-                inline=False
-            )
-    
-    # Set footer
-    embed.set_footer(text=EMBED_FOOTER)
-    
-    return embed
+@tasks.loop(seconds=DIGEST_TICK)
+async def send_digests():
+    """Background task to send the digests that are due."""
+    for channel_id in digest_aggregator.due():
+        try:
+            await send_digest(channel_id, digest_aggregator.take(channel_id))
+        except Exception as e:
+            logger.error(f"Error sending digest to channel {channel_id}: {str(e)}")
+
+async def send_digest(channel_id: str, posts: List[Post]):
+    """Queue a digest of posts for a channel, if there are any."""
+    if not posts:
+        return
+    for embed in create_digest_embeds(posts):
+        await delivery.enqueue(channel_id, embed)
+
+@send_digests.before_loop
+async def before_send_digests():
+    """Wait until the bot is ready before starting the digest task."""
+    await bot.wait_until_ready()
+
+# Render each post once and share the embed across channels and !latest
+embed_cache = EmbedCache(create_post_embed, max_size=EMBED_CACHE_SIZE)
+
+# Download post images once and upload them with the embeds
+media_cache = MediaCache(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media_cache'),
+    max_bytes=MEDIA_CACHE_MAX_BYTES,
+    max_concurrent_fetches=MEDIA_FETCH_CONCURRENCY,
+    request_timeout=REQUEST_TIMEOUT,
+    grid_tile=MEDIA_GRID_TILE
+) if MEDIA_CACHE_ENABLED else None
+
+async def render_posts(posts: List[Post]) -> List[Tuple[discord.Embed, List[Attachment]]]:
+    """Return the embed and image attachments for each post, fetching the images concurrently."""
+    if media_cache is None:
+        return [(embed_cache.get(post), []) for post in posts]
+    attachments = await asyncio.gather(*(media_cache.attachment_for(post) for post in posts))
+    return [
+        (embed_cache.get(post, attachment), [attachment] if attachment else [])
+        for post, attachment in zip(posts, attachments)
+    ]
+
+def username_argument(argument: str) -> str:
+    """Command argument converter that normalizes a username the way the account registry stores it."""
+    return account_registry.normalize(argument)
+
+def unknown_account_message(username: str) -> str:
+    """Build the reply for an account that is not tracked, suggesting close matches."""
+    matches, _ = account_registry.search(username[:3], limit=5)
+    message = f"Unknown account: {username}."
+    if matches:
+        message += f" Did you mean: {', '.join(match for match, _ in matches)}?"
+    return message + f" Use {COMMAND_PREFIX}list to see available accounts."
 
 @bot.command(name='subscribe')
-async def subscribe(ctx, username: str):
+async def subscribe(ctx, username: username_argument):
     """Subscribe the current channel to a Weibo account's posts."""
-    if username not in WEIBO_ACCOUNTS:
-        available_accounts = ', '.join(WEIBO_ACCOUNTS.keys())
-        await ctx.send(f"Unknown account: {username}. Available accounts: {available_accounts}")
+    if username not in account_registry:
+        await ctx.send(unknown_account_message(username))
         return
         
     try:
-        # Get current subscriptions
-        subscription_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
-        
-        if os.path.exists(subscription_file):
-            with open(subscription_file, 'r') as f:
-                subscriptions = json.load(f)
-        else:
-            subscriptions = {}
-            
         # Add the current channel to the subscriptions
-        if username not in subscriptions:
-            subscriptions[username] = []
-            
         channel_id = str(ctx.channel.id)
-        if channel_id not in subscriptions[username]:
-            subscriptions[username].append(channel_id)
-            save_subscriptions(subscriptions)
-            await ctx.send(f"Subscribed to {WEIBO_ACCOUNTS[username]['name']}'s Weibo posts!")
+        if subscription_store.add(username, channel_id):
+            await ctx.send(f"Subscribed to {account_registry[username]['name']}'s Weibo posts!")
         else:
-            await ctx.send(f"This channel is already subscribed to {WEIBO_ACCOUNTS[username]['name']}'s Weibo posts.")
+            await ctx.send(f"This channel is already subscribed to {account_registry[username]['name']}'s Weibo posts.")
             
     except Exception as e:
         logger.error(f"Error in subscribe command: {str(e)}")
         await ctx.send("An error occurred while subscribing. Please try again later.")
 
 @bot.command(name='unsubscribe')
-async def unsubscribe(ctx, username: str):
+async def unsubscribe(ctx, username: username_argument):
     """Unsubscribe the current channel from a Weibo account's posts."""
-    if username not in WEIBO_ACCOUNTS:
-        available_accounts = ', '.join(WEIBO_ACCOUNTS.keys())
-        await ctx.send(f"Unknown account: {username}. Available accounts: {available_accounts}")
+    if username not in account_registry:
+        await ctx.send(unknown_account_message(username))
         return
         
     try:
-        # Get current subscriptions
-        subscription_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
-        
-        if not os.path.exists(subscription_file):
-            await ctx.send(f"This channel is not subscribed to {WEIBO_ACCOUNTS[username]['name']}'s Weibo posts.")
-            return
-            
-        with open(subscription_file, 'r') as f:
-            subscriptions = json.load(f)
-            
         # Remove the current channel from the subscriptions
         channel_id = str(ctx.channel.id)
-        if username in subscriptions and channel_id in subscriptions[username]:
-            subscriptions[username].remove(channel_id)
-            save_subscriptions(subscriptions)
-            await ctx.send(f"Unsubscribed from {WEIBO_ACCOUNTS[username]['name']}'s Weibo posts.")
+        if subscription_store.remove(username, channel_id):
+            await ctx.send(f"Unsubscribed from {account_registry[username]['name']}'s Weibo posts.")
         else:
-            await ctx.send(f"This channel is not subscribed to {WEIBO_ACCOUNTS[username]['name']}'s Weibo posts.")
+            await ctx.send(f"This channel is not subscribed to {account_registry[username]['name']}'s Weibo posts.")
             
     except Exception as e:
         logger.error(f"Error in unsubscribe command: {str(e)}")
         await ctx.send("An error occurred while unsubscribing. Please try again later.")
 
 @bot.command(name='list')
-async def list_accounts(ctx):
-    """List all available Weibo accounts."""
+async def list_accounts(ctx, *args: str):
+    """List available Weibo accounts, optionally filtered by a username prefix and paged."""
+    # Arguments can be given in any order: a number is the page, anything else the prefix
+    page = 1
+    prefix = ""
+    for arg in args:
+        if arg.isdigit():
+            page = max(1, int(arg))
+        else:
+            prefix = arg
+            
+    accounts, total = account_registry.search(prefix, offset=(page - 1) * ACCOUNTS_PER_PAGE, limit=ACCOUNTS_PER_PAGE)
+    pages = max(1, -(-total // ACCOUNTS_PER_PAGE))
+    if not accounts:
+        await ctx.send(f"No accounts found{f' starting with {prefix}' if prefix else ''} on page {page}.")
+        return
+        
     embed = discord.Embed(
         title="Available Weibo Accounts",
         description="Here are all the Weibo accounts you can subscribe to:",
         color=EMBED_COLOR
     )
     
-    for username, account in WEIBO_ACCOUNTS.items():
+    for username, account in accounts:
         embed.add_field(
             name=f"{account['name']} ({username})",
             value=f"Weibo ID: {account['weibo_id']}\nDescription: {account['description']}",
             inline=False
         )
     
-    embed.set_footer(text=f"Use {COMMAND_PREFIX}subscribe <username> to subscribe to an account.")
+    embed.set_footer(
+        text=f"Page {page}/{pages} ({total} accounts). Use {COMMAND_PREFIX}list [prefix] [page] to browse "
+             f"and {COMMAND_PREFIX}subscribe <username> to subscribe to an account."
+    )
     await ctx.send(embed=embed)
 
+@bot.command(name='track')
+@commands.has_permissions(administrator=True)
+async def track_account(ctx, username: username_argument, weibo_id: str, numeric_id: Optional[str] = None, *, name: Optional[str] = None):
+    """Start tracking a Weibo account (administrators only)."""
+    if numeric_id is not None and not numeric_id.isdigit():
+        # The numeric ID was left out and the name starts here
+        name = f"{numeric_id} {name}" if name else numeric_id
+        numeric_id = None
+        
+    try:
+        if not account_registry.add(username, weibo_id, numeric_id, name):
+            await ctx.send(f"{username} or Weibo account {weibo_id} is already tracked.")
+            return
+            
+        poll_scheduler.add(username)
+        if not numeric_id:
+            resolved = await weibo_fetcher.resolve_numeric_ids([username])
+            if username in resolved:
+                account_registry.set_numeric_id(username, resolved[username])
+                
+        await ctx.send(f"Now tracking {account_registry[username]['name']} ({username}).")
+        
+    except Exception as e:
+        logger.error(f"Error in track command: {str(e)}")
+        await ctx.send("An error occurred while tracking the account. Please try again later.")
+
+@bot.command(name='untrack')
+@commands.has_permissions(administrator=True)
+async def untrack_account(ctx, username: username_argument):
+    """Stop tracking a Weibo account and remove its subscriptions (administrators only)."""
+    if username not in account_registry:
+        await ctx.send(unknown_account_message(username))
+        return
+        
+    try:
+        name = account_registry[username]['name']
+        account_registry.remove(username)
+        poll_scheduler.remove(username)
+        weibo_fetcher.forget_account(username)
+        for channel_id in subscription_store.get_channels(username):
+            subscription_store.remove(username, channel_id)
+        await ctx.send(f"Stopped tracking {name} ({username}).")
+        
+    except Exception as e:
+        logger.error(f"Error in untrack command: {str(e)}")
+        await ctx.send("An error occurred while untracking the account. Please try again later.")
+
+@track_account.error
+@untrack_account.error
+async def admin_command_error(ctx, error):
+    """Explain why an admin command was rejected."""
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("Only server administrators can change the tracked accounts.")
+    elif isinstance(error, commands.MissingRequiredArgument):
+        await ctx.send(f"Usage: {COMMAND_PREFIX}track <username> <weibo_id> [numeric_id] [name] or {COMMAND_PREFIX}untrack <username>")
+    else:
+        logger.error(f"Error in {ctx.command} command: {str(error)}")
+
 @bot.command(name='subscriptions')
 async def list_subscriptions(ctx):
     """List all subscriptions for the current channel."""
     try:
-        # Get current subscriptions
-        subscription_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'subscriptions.json')
-        
-        if not os.path.exists(subscription_file):
-            await ctx.send("This channel is not subscribed to any Weibo accounts.")
-            return
-            
-        with open(subscription_file, 'r') as f:
-            subscriptions = json.load(f)
-            
         # Find subscriptions for the current channel
         channel_id = str(ctx.channel.id)
-        channel_subscriptions = []
-        
-        for username, channels in subscriptions.items():
-            if channel_id in channels:
-                channel_subscriptions.append(username)
+        channel_subscriptions = [
+            username for username in subscription_store.get_accounts(channel_id)
+            if username in account_registry
+        ]
                 
         if not channel_subscriptions:
             await ctx.send("This channel is not subscribed to any Weibo accounts.")
@@ -318,7 +545,7 @@ async def list_subscriptions(ctx):
         )
         
         for username in channel_subscriptions:
-            account = WEIBO_ACCOUNTS[username]
+            account = account_registry[username]
             embed.add_field(
                 name=f"{account['name']} ({username})",
                 value=f"Weibo ID: {account['weibo_id']}\nDescription: {account['description']}",
@@ -333,32 +560,171 @@ async def list_subscriptions(ctx):
         await ctx.send("An error occurred while fetching subscriptions. Please try again later.")
 
 @bot.command(name='latest')
-async def latest_posts(ctx, username: str):
+async def latest_posts(ctx, username: username_argument):
     """Show the latest posts from a Weibo account."""
-    if username not in WEIBO_ACCOUNTS:
-        available_accounts = ', '.join(WEIBO_ACCOUNTS.keys())
-        await ctx.send(f"Unknown account: {username}. Available accounts: {available_accounts}")
+    if username not in account_registry:
+        await ctx.send(unknown_account_message(username))
         return
         
     try:
-        # Fetch the latest posts
-        posts = weibo_fetcher.fetch_posts(username, force_refresh=True)
+        # Fetch the latest posts, answering from the cache right away and
+        # refreshing in the background if the cached posts have expired
+        posts = await weibo_fetcher.fetch_posts(username, allow_stale=True)
         
         if not posts:
-            await ctx.send(f"No posts found for {WEIBO_ACCOUNTS[username]['name']}.")
+            await ctx.send(f"No posts found for {account_registry[username]['name']}.")
             return
             
         # Send the latest posts
-        await ctx.send(f"Latest posts from {WEIBO_ACCOUNTS[username]['name']}:")
+        await ctx.send(f"Latest posts from {account_registry[username]['name']}:")
         
-        for post in posts[:3]:  # Show up to 3 latest posts
-            embed = create_post_embed(post)
-            await ctx.send(embed=embed)
+        posts = await weibo_fetcher.expand_long_texts(posts[:3])  # Show up to 3 latest posts
+        for embed, attachments in await render_posts(posts):
+            await ctx.send(embed=embed, files=discord_files(attachments))
             
     except Exception as e:
         logger.error(f"Error in latest command: {str(e)}")
         await ctx.send("An error occurred while fetching the latest posts. Please try again later.")
 
+@bot.command(name='search')
+async def search_posts(ctx, *args: str):
+    """Search archived posts, optionally from one account, with results paged."""
+    # A trailing number is the page and a trailing tracked username the account;
+    # everything before them is the query
+    args = list(args)
+    page = 1
+    username = None
+    if len(args) > 1 and args[-1].isdigit():
+        page = max(1, int(args.pop()))
+    if len(args) > 1 and args[-1] in account_registry:
+        username = account_registry.normalize(args.pop())
+    query = ' '.join(args)
+    if not query:
+        await ctx.send(f"Usage: {COMMAND_PREFIX}search <query> [username] [page]")
+        return
+        
+    try:
+        posts, has_more = post_archive.search(
+            query, username, offset=(page - 1) * SEARCH_RESULTS_PER_PAGE, limit=SEARCH_RESULTS_PER_PAGE
+        )
+        if not posts:
+            await ctx.send(f"No archived posts found for \"{query}\"{f' from {username}' if username else ''} on page {page}.")
+            return
+            
+        embed = discord.Embed(
+            title=f"Search results for \"{query}\"",
+            description=f"Posts from {account_registry[username]['name']}" if username else None,
+            color=EMBED_COLOR
+        )
+        
+        for post in posts:
+            text = render_plain(post.text) or render_plain(post.retweeted.text if post.retweeted else '')
+            if len(text) > 200:
+                text = text[:199] + '…'
+            embed.add_field(
+                name=f"{post.account.name} ({post.account.username}) · {post.created_at}",
+                value=f"{discord.utils.escape_markdown(text) or '(no text)'}\n[View on Weibo]({post.url})",
+                inline=False
+            )
+        
+        footer = f"Page {page}."
+        if has_more:
+            args = [query] + ([username] if username else []) + [str(page + 1)]
+            footer += f" Use {COMMAND_PREFIX}search {' '.join(args)} for more results."
+        embed.set_footer(text=footer)
+        await ctx.send(embed=embed)
+        
+    except Exception as e:
+        logger.error(f"Error in search command: {str(e)}")
+        await ctx.send("An error occurred while searching posts. Please try again later.")
+
+@bot.command(name='trending')
+async def trending_posts(ctx, window: str = TRENDING_DEFAULT_WINDOW):
+    """Show the posts gaining reposts, comments and likes fastest across all accounts."""
+    if engagement_tracker is None:
+        await ctx.send("Trending posts are not available: engagement tracking is disabled or numpy is not installed.")
+        return
+    seconds = parse_window(window)
+    if seconds is None:
+        await ctx.send(f"Usage: {COMMAND_PREFIX}trending [window], for example {COMMAND_PREFIX}trending 30m, 6h or 1d")
+        return
+        
+    try:
+        trends = engagement_tracker.trending(seconds, limit=TRENDING_RESULTS)
+        if not trends:
+            await ctx.send(f"No tracked posts gained reposts, comments or likes in the last {format_window(seconds)}.")
+            return
+            
+        embed = discord.Embed(
+            title=f"Trending posts in the last {format_window(seconds)}",
+            color=EMBED_COLOR
+        )
+        
+        posts = post_archive.get(trend.post_id for trend in trends)
+        for rank, trend in enumerate(trends, 1):
+            post = posts.get(trend.post_id)
+            name = account_registry[trend.username]['name'] if trend.username in account_registry else trend.username
+            text = ''
+            if post is not None:
+                text = render_plain(post.text) or render_plain(post.retweeted.text if post.retweeted else '')
+                if len(text) > 150:
+                    text = text[:149] + '…'
+            reposts, comments, likes = trend.counts
+            embed.add_field(
+                name=f"{rank}. {name} ({trend.username}) · +{trend.per_hour:.0f} per hour",
+                value=(
+                    f"{discord.utils.escape_markdown(text) or '(no text)'}\n"
+                    f"Reposts {reposts} · Comments {comments} · Likes {likes} · "
+                    f"[View on Weibo](https://m.weibo.cn/detail/{trend.post_id})"
+                ),
+                inline=False
+            )
+        
+        embed.set_footer(text="Ranked by reposts + comments + likes gained per hour within the window.")
+        await ctx.send(embed=embed)
+        
+    except Exception as e:
+        logger.error(f"Error in trending command: {str(e)}")
+        await ctx.send("An error occurred while ranking trending posts. Please try again later.")
+
+@bot.command(name='digest')
+async def digest_mode(ctx, setting: Optional[str] = None):
+    """Show or change whether the current channel gets each post as it arrives or a digest every few minutes."""
+    channel_id = str(ctx.channel.id)
+    if setting is None:
+        interval = digest_aggregator.interval(channel_id)
+        if interval is None:
+            await ctx.send(f"This channel gets each post as it arrives. Use {COMMAND_PREFIX}digest <minutes> to get a digest instead.")
+        else:
+            await ctx.send(
+                f"This channel gets a digest every {interval / 60:.0f} minutes. The next one is due "
+                f"<t:{int(digest_aggregator.next_due(channel_id))}:R> with {digest_aggregator.pending_count(channel_id)} posts so far. "
+                f"Use {COMMAND_PREFIX}digest off to get each post as it arrives."
+            )
+        return
+        
+    try:
+        if setting.lower() == 'off':
+            if not digest_aggregator.is_digest(channel_id):
+                await ctx.send("This channel already gets each post as it arrives.")
+                return
+            # Posts waiting for the digest are sent straight away rather than dropped
+            posts = digest_aggregator.disable(channel_id)
+            await send_digest(channel_id, posts)
+            await ctx.send("This channel will get each post as it arrives again.")
+            return
+            
+        if not setting.isdigit() or not DIGEST_MIN_INTERVAL <= int(setting) <= DIGEST_MAX_INTERVAL:
+            await ctx.send(f"Usage: {COMMAND_PREFIX}digest <minutes|off>, with {DIGEST_MIN_INTERVAL} to {DIGEST_MAX_INTERVAL} minutes between digests")
+            return
+        minutes = int(setting)
+        digest_aggregator.enable(channel_id, minutes * 60)
+        await ctx.send(f"This channel will get a digest of new posts from its subscriptions every {minutes} minutes.")
+        
+    except Exception as e:
+        logger.error(f"Error in digest command: {str(e)}")
+        await ctx.send("An error occurred while changing the digest setting. Please try again later.")
+
 @bot.command(name='help')
 async def help_command(ctx):
     """Show help information for the bot."""
@@ -381,8 +747,14 @@ async def help_command(ctx):
     )
     
     embed.add_field(
-        name=f"{COMMAND_PREFIX}list",
-        value="List all available Weibo accounts.",
+        name=f"{COMMAND_PREFIX}digest [minutes|off]",
+        value="Get new posts in the current channel as a digest every few minutes instead of one by one, or turn that off.",
+        inline=False
+    )
+    
+    embed.add_field(
+        name=f"{COMMAND_PREFIX}list [prefix] [page]",
+        value="List available Weibo accounts, optionally filtered by a username prefix.",
         inline=False
     )
     
@@ -398,6 +770,30 @@ async def help_command(ctx):
         inline=False
     )
     
+    embed.add_field(
+        name=f"{COMMAND_PREFIX}search <query> [username] [page]",
+        value="Search archived posts, optionally from one account.",
+        inline=False
+    )
+    
+    embed.add_field(
+        name=f"{COMMAND_PREFIX}trending [window]",
+        value="Show the posts gaining reposts, comments and likes fastest, e.g. over the last 30m, 6h or 1d.",
+        inline=False
+    )
+    
+    embed.add_field(
+        name=f"{COMMAND_PREFIX}track <username> <weibo_id> [numeric_id] [name]",
+        value="Start tracking a Weibo account (administrators only).",
+        inline=False
+    )
+    
+    embed.add_field(
+        name=f"{COMMAND_PREFIX}untrack <username>",
+        value="Stop tracking a Weibo account (administrators only).",
+        inline=False
+    )
+    
     embed.add_field(
         name=f"{COMMAND_PREFIX}help",
         value="Show this help message.",
@@ -407,9 +803,56 @@ async def help_command(ctx):
     embed.set_footer(text=EMBED_FOOTER)
     await ctx.send(embed=embed)
 
+async def start_bot():
+    """Start the Discord bot and release the Weibo connection pool on shutdown."""
+    lag_monitor = None
+    if metrics_server:
+        await metrics_server.start()
+        lag_monitor = asyncio.ensure_future(metrics.monitor_event_loop_lag())
+    if post_queue_server:
+        await post_queue_server.start()
+    warm_up_task = None
+    try:
+        async with bot:
+            # Start polling while the gateway connection is set up rather than after it
+            if not post_queue_server:
+                warm_up_task = asyncio.ensure_future(warm_up())
+            await bot.start(DISCORD_TOKEN)
+    finally:
+        if warm_up_task:
+            warm_up_task.cancel()
+        if metrics_server:
+            lag_monitor.cancel()
+            await metrics_server.stop()
+        if post_queue_server:
+            await post_queue_server.stop()
+        await delivery.close()
+        await subscription_store.flush()
+        await digest_aggregator.flush()
+        await post_archive.flush()
+        if warm_start:
+            try:
+                warm_start.save(weibo_fetcher, poll_scheduler)
+            except Exception as e:
+                logger.error(f"Error saving warm start snapshot: {str(e)}")
+        if engagement_tracker:
+            try:
+                engagement_tracker.save()
+            except Exception as e:
+                logger.error(f"Error saving engagement history: {str(e)}")
+        await weibo_fetcher.close()
+        if media_cache:
+            await media_cache.close()
+        seen_ledger.close()
+        post_archive.close()
+        account_registry.close()
+
 def run_bot():
     """Run the Discord bot."""
-    bot.run(DISCORD_TOKEN)
+    try:
+        asyncio.run(start_bot())
+    except KeyboardInterrupt:
+        logger.info("Discord bot stopped")
 
 if __name__ == '__main__':
     run_bot()
@@ -0,0 +1,62 @@
+import logging
+import sys
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Post
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('embed_cache')
+
+class EmbedCache:
+    """Bounded LRU cache of rendered post embeds.
+    
+    Entries are keyed by post ID and the post's rendered fields themselves
+    (including its counts), so a post is rendered once and the same embed is
+    reused for every channel until the post changes. Keying on the fields
+    rather than their hash means two posts can never share an entry. Extra render arguments (such as
+    an image attachment) are part of the key.
+    """
+    
+    def __init__(self, render: Callable[..., Any], max_size: int = 512):
+        """Initialize the cache with the function that renders a post."""
+        self.render = render
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._embeds = OrderedDict()
+        
+    @staticmethod
+    def key(post: Post) -> Tuple[str, Hashable]:
+        """Return the cache key for a post."""
+        content = (
+            post.created_at, post.text, post.source, post.reposts_count, post.comments_count,
+            post.attitudes_count, post.account, post.images, post.retweeted
+        )
+        return post.id, content
+    
+    def get(self, post: Post, *args: Hashable) -> Any:
+        """Return the embed for a post, rendering it on first use."""
+        key = self.key(post) + args
+        embed = self._embeds.get(key)
+        if embed is not None:
+            self._embeds.move_to_end(key)
+            self.hits += 1
+            return embed
+            
+        self.misses += 1
+        embed = self.render(post, *args)
+        self._embeds[key] = embed
+        if len(self._embeds) > self.max_size:
+            self._embeds.popitem(last=False)
+        return embed
+    
+    def __len__(self) -> int:
+        return len(self._embeds)
@@ -0,0 +1,144 @@
+import discord
+import sys
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add the parent directory to sys.path to import config and the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Post
+from src.media_cache import Attachment
+from src.html_renderer import renderer, render_plain, MAX_DESCRIPTION_LENGTH, MAX_FIELD_LENGTH
+from src.delivery import MAX_EMBED_CHARS_PER_MESSAGE
+from src.config import EMBED_COLOR, EMBED_FOOTER
+
+# Longest preview of a post's text in a digest
+DIGEST_PREVIEW_LENGTH = 120
+# Characters of each digest message left for the title and footer
+DIGEST_MESSAGE_OVERHEAD = 300
+
+def post_timestamp(post: Post) -> datetime:
+    """Return the time a post was created, falling back to now if it cannot be parsed."""
+    try:
+        return datetime.strptime(post.created_at, '%a %b %d %H:%M:%S %z %Y')
+    except ValueError:
+        return datetime.now()
+
+def create_post_embed(post: Post, attachment: Optional[Attachment] = None) -> discord.Embed:
+    """Create a Discord embed for a Weibo post, showing an uploaded image attachment if given."""
+    # Create the embed. It is cached and reused, so it carries the post's
+    # own creation time rather than the time it was rendered.
+    embed = discord.Embed(
+        title=f"New Weibo post from {post.account.name}",
+        description=renderer.render(post.id, post.text),
+        url=post.url,
+        color=EMBED_COLOR,
+        timestamp=post_timestamp(post)
+    )
+    
+    # Add author info
+    embed.set_author(
+        name=f"{post.account.screen_name} ({post.account.description})",
+        url=f"https://m.weibo.cn/u/{post.account.id}"
+    )
+    
+    # Add post metadata
+    embed.add_field(name="Posted via", value=post.source, inline=True)
+    embed.add_field(name="Reposts", value=str(post.reposts_count), inline=True)
+    embed.add_field(name="Comments", value=str(post.comments_count), inline=True)
+    embed.add_field(name="Likes", value=str(post.attitudes_count), inline=True)
+    
+    # Add the uploaded image (or grid of images) if available, otherwise link the first image
+    if attachment is not None:
+        embed.set_image(url=f"attachment://{attachment.filename}")
+    elif post.images:
+        embed.set_image(url=post.images[0])
+        
+    # Add images not shown in the embed image as fields
+    if post.images:
+        shown = attachment.image_count if attachment is not None else 1
+        if len(post.images) > shown:
+            for i, image_url in enumerate(post.images[shown:], shown):
+                embed.add_field(
+                    name=f"Additional Image {i}",
+                    value=f"[View Image]({image_url})",
+                    inline=False
+                )
+    
+    # Add retweeted content if available
+    if post.retweeted is not None:
+        retweeted = post.retweeted
+        embed.add_field(
+            name=f"Retweeted from {retweeted.screen_name}",
+            value=renderer.render(retweeted.id, retweeted.text, MAX_FIELD_LENGTH),
+            inline=False
+        )
+        
+        # Add retweeted image if available
+        if retweeted.images:
+            embed.add_field(
+                name="Retweeted Image",
+                value=f"[View Image]({retweeted.images[0]})",
+                inline=False
+            )
+    
+    # Set footer
+    embed.set_footer(text=EMBED_FOOTER)
+    
+    return embed
+
+def digest_line(post: Post) -> str:
+    """Return a post's one-line entry in a digest: its time linking to the post and a text preview."""
+    text = render_plain(post.text)
+    if post.retweeted is not None:
+        text = f"{text} (repost of {post.retweeted.screen_name}: {render_plain(post.retweeted.text)})".strip()
+    text = ' '.join(text.split())
+    if len(text) > DIGEST_PREVIEW_LENGTH:
+        text = text[:DIGEST_PREVIEW_LENGTH - 1] + '…'
+    line = f"• [{post_timestamp(post):%m-%d %H:%M}]({post.url}) {discord.utils.escape_markdown(text) or '(no text)'}"
+    if post.images:
+        line += f" ({len(post.images)} {'image' if len(post.images) == 1 else 'images'})"
+    return line
+
+def create_digest_embeds(posts: List[Post]) -> List[discord.Embed]:
+    """Create the embeds of a digest of posts, grouped by account and oldest first within each.
+    
+    Entries fill one message's worth of characters before the next message
+    is started, and each message's entries are split into embeds of at most
+    MAX_DESCRIPTION_LENGTH, so the dispatcher sends the digest in as few
+    messages as Discord allows.
+    """
+    by_account: Dict[str, List[Post]] = {}
+    for post in posts:
+        by_account.setdefault(post.account.username, []).append(post)
+    entries = []
+    for account_posts in by_account.values():
+        account = account_posts[0].account
+        # The account heading stays in the same embed as its first post
+        heading = f"**{discord.utils.escape_markdown(account.name)}** ({account.username})\n"
+        entries.append(heading + digest_line(account_posts[0]))
+        entries.extend(digest_line(post) for post in account_posts[1:])
+    
+    message_budget = MAX_EMBED_CHARS_PER_MESSAGE - DIGEST_MESSAGE_OVERHEAD
+    descriptions = []
+    lines = []
+    length = 0  # characters in the embed being filled
+    message_length = 0  # characters in the finished embeds of the message being filled
+    for entry in entries:
+        added = len(entry) + 1 if lines else len(entry)
+        if lines:
+            new_message = message_length + length + added > message_budget
+            if new_message or length + added > MAX_DESCRIPTION_LENGTH:
+                descriptions.append('\n'.join(lines))
+                message_length = 0 if new_message else message_length + length
+                lines, length, added = [], 0, len(entry)
+        lines.append(entry)
+        length += added
+    if lines:
+        descriptions.append('\n'.join(lines))
+    
+    embeds = [discord.Embed(description=description, color=EMBED_COLOR) for description in descriptions]
+    if embeds:
+        embeds[0].title = f"Weibo digest: {len(posts)} new {'post' if len(posts) == 1 else 'posts'} from {len(by_account)} {'account' if len(by_account) == 1 else 'accounts'}"
+        embeds[-1].set_footer(text=EMBED_FOOTER)
+    return embeds
@@ -0,0 +1,327 @@
+import importlib.util
+import re
+import time
+import logging
+import sys
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Post
+
+# NumPy is optional; without it engagement is not tracked and !trending is unavailable.
+# It is imported when the first post is tracked rather than at startup.
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('engagement')
+
+# Rows are allocated in chunks of this many posts until max_posts is reached
+INITIAL_CAPACITY = 1024
+
+# Counts are (reposts, comments, likes)
+COUNT_FIELDS = ('reposts_count', 'comments_count', 'attitudes_count')
+
+WINDOW_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+def parse_count(value) -> int:
+    """Convert a Weibo count to an int; large counts come as strings like "100万+"."""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().rstrip('+')
+    try:
+        if text.endswith('万'):
+            return int(float(text[:-1]) * 10000)
+        if text.endswith('亿'):
+            return int(float(text[:-1]) * 100000000)
+        return int(float(text or 0))
+    except ValueError:
+        return 0
+
+def parse_window(text: str) -> Optional[float]:
+    """Parse a window like "30m", "6h" or "1d" (a bare number is hours) into seconds."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhd]?)', text.strip().lower())
+    if not match:
+        return None
+    seconds = float(match.group(1)) * WINDOW_UNITS[match.group(2) or 'h']
+    return seconds if seconds > 0 else None
+
+def format_window(seconds: float) -> str:
+    """Format a window in seconds the way parse_window accepts it."""
+    for unit in ('d', 'h', 'm'):
+        if seconds >= WINDOW_UNITS[unit] and seconds % WINDOW_UNITS[unit] == 0:
+            return f"{int(seconds // WINDOW_UNITS[unit])}{unit}"
+    return f"{seconds / 60:.0f}m"
+
+@dataclass(frozen=True)
+class Trend:
+    """How fast a post gained engagement within a trending window."""
+    __slots__ = ('post_id', 'username', 'per_hour', 'gain', 'counts')
+    
+    post_id: str
+    username: str
+    per_hour: float  # reposts + comments + likes gained per hour
+    gain: int  # reposts + comments + likes gained between the two samples compared
+    counts: Tuple[int, int, int]  # latest (reposts, comments, likes)
+
+class EngagementTracker:
+    """Engagement time series for recently seen posts.
+    
+    Each post gets a row of sample slots in preallocated NumPy arrays
+    (sample times and repost/comment/like counts), so tens of thousands of
+    posts take a few MB and ranking them is a handful of array operations
+    rather than a loop over posts. A post is re-sampled first_resample
+    seconds after it is first seen, then at intervals that grow by growth,
+    until it is track_duration seconds old. Once max_posts posts are
+    tracked, the row of the post seen longest ago is reused.
+    """
+    
+    def __init__(self, path: str, max_posts: int = 50000, first_resample: float = 300,
+                 growth: float = 2.0, track_duration: float = 86400):
+        """Initialize an empty tracker saved at path; the arrays are allocated when the first post is tracked."""
+        self.path = path
+        self.max_posts = max_posts
+        self.first_resample = first_resample
+        self.track_duration = track_duration
+        # Ages (seconds since first seen) at which a post is re-sampled
+        ages = []
+        age = first_resample
+        while age < track_duration:
+            ages.append(age)
+            age *= growth
+        ages.append(track_duration)
+        self._ages = ages
+        self.samples_per_post = len(ages) + 1
+        
+        self._rows: Dict[str, int] = {}  # post ID -> row
+        self._post_ids: List[Optional[str]] = []  # row -> post ID
+        self._username_codes: Dict[str, int] = {}
+        self._usernames: List[str] = []
+        self._size = 0  # rows in use
+        self._oldest = 0  # next row to reuse once max_posts rows are in use
+        self._times = None  # (rows, samples) sample times, inf where not sampled yet
+        self._counts = None  # (rows, samples, 3) reposts, comments and likes
+        self._sample_counts = None  # (rows,) samples taken
+        self._first_seen = None  # (rows,)
+        self._next_due = None  # (rows,) when the next sample is due, inf once done
+        self._accounts = None  # (rows,) username codes
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._rows
+    
+    def _allocate(self, capacity: int):
+        """Grow the arrays to hold capacity posts."""
+        import numpy as np
+        old_capacity = 0 if self._times is None else len(self._times)
+        times = np.full((capacity, self.samples_per_post), np.inf)
+        counts = np.zeros((capacity, self.samples_per_post, 3), dtype=np.int32)
+        sample_counts = np.zeros(capacity, dtype=np.int16)
+        first_seen = np.zeros(capacity)
+        next_due = np.full(capacity, np.inf)
+        accounts = np.zeros(capacity, dtype=np.int32)
+        if old_capacity:
+            times[:old_capacity] = self._times
+            counts[:old_capacity] = self._counts
+            sample_counts[:old_capacity] = self._sample_counts
+            first_seen[:old_capacity] = self._first_seen
+            next_due[:old_capacity] = self._next_due
+            accounts[:old_capacity] = self._accounts
+        self._times, self._counts, self._sample_counts = times, counts, sample_counts
+        self._first_seen, self._next_due, self._accounts = first_seen, next_due, accounts
+        self._post_ids.extend([None] * (capacity - old_capacity))
+    
+    def _new_row(self) -> int:
+        """Return a free row, reusing the oldest post's row when max_posts are tracked."""
+        if self._size < self.max_posts:
+            if self._times is None or self._size == len(self._times):
+                capacity = INITIAL_CAPACITY if self._times is None else len(self._times) * 2
+                self._allocate(min(capacity, self.max_posts))
+            self._size += 1
+            return self._size - 1
+        row = self._oldest
+        self._oldest = (self._oldest + 1) % self.max_posts
+        del self._rows[self._post_ids[row]]
+        return row
+    
+    def _username_code(self, username: str) -> int:
+        """Return the integer code stored for an account."""
+        code = self._username_codes.get(username)
+        if code is None:
+            code = self._username_codes[username] = len(self._usernames)
+            self._usernames.append(username)
+        return code
+    
+    def track(self, posts: Iterable[Post], now: Optional[float] = None):
+        """Start tracking posts not tracked yet, with their current counts as the first sample."""
+        now = time.time() if now is None else now
+        for post in posts:
+            if not post.id or post.id in self._rows:
+                continue
+            row = self._new_row()
+            self._rows[post.id] = row
+            self._post_ids[row] = post.id
+            self._times[row] = float('inf')
+            self._times[row, 0] = now
+            self._counts[row] = 0
+            self._counts[row, 0] = [parse_count(getattr(post, field)) for field in COUNT_FIELDS]
+            self._sample_counts[row] = 1
+            self._first_seen[row] = now
+            self._next_due[row] = now + self._ages[0]
+            self._accounts[row] = self._username_code(post.account.username)
+    
+    def due(self, now: Optional[float] = None, limit: int = 20) -> List[str]:
+        """Return the IDs of up to limit posts due for a sample, most overdue first.
+        
+        Their next sample is scheduled straight away, so a post whose sample
+        fails or comes late is not re-sampled more often than its schedule.
+        """
+        if not self._size:
+            return []
+        import numpy as np
+        now = time.time() if now is None else now
+        next_due = self._next_due[:self._size]
+        rows = np.flatnonzero(next_due <= now)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(next_due[rows], limit - 1)[:limit]]
+        rows = rows[np.argsort(next_due[rows], kind='stable')]
+        
+        # Samples whose time has already passed are skipped
+        ages = np.asarray(self._ages)
+        position = np.searchsorted(ages, now - self._first_seen[rows], side='right')
+        done = position >= len(ages)
+        next_due[rows] = np.where(done, np.inf, self._first_seen[rows] + ages[np.minimum(position, len(ages) - 1)])
+        return [self._post_ids[row] for row in rows]
+    
+    def record(self, post_id: str, counts: Tuple[int, int, int], now: Optional[float] = None):
+        """Add a sample of a post's (reposts, comments, likes)."""
+        row = self._rows.get(post_id)
+        if row is None:
+            return  # no longer tracked
+        sample = int(self._sample_counts[row])
+        if sample >= self.samples_per_post:
+            return
+        self._times[row, sample] = time.time() if now is None else now
+        self._counts[row, sample] = [parse_count(count) for count in counts]
+        self._sample_counts[row] = sample + 1
+    
+    def trending(self, window: float, limit: int = 10, now: Optional[float] = None) -> List[Trend]:
+        """Return the posts that gained engagement fastest within the last window seconds.
+        
+        A post's gain is measured from its last sample before the window (or
+        its first sample, if it was first seen within the window) to its
+        latest sample, over the time between them; spans shorter than the
+        first re-sample interval count as that long so a single early
+        sample cannot dominate.
+        """
+        if not self._size:
+            return []
+        import numpy as np
+        now = time.time() if now is None else now
+        cutoff = now - window
+        times = self._times[:self._size]
+        last = self._sample_counts[:self._size].astype(np.intp) - 1
+        # Posts sampled at least twice, most recently within the window
+        rows = np.flatnonzero(last >= 1)
+        rows = rows[times[rows, last[rows]] >= cutoff]
+        if not len(rows):
+            return []
+        last = last[rows]
+        base = np.maximum(np.count_nonzero(times[rows] <= cutoff, axis=1) - 1, 0)
+        
+        counts = self._counts[rows, last]
+        gain = counts.sum(axis=1, dtype=np.int64) - self._counts[rows, base].sum(axis=1, dtype=np.int64)
+        span = times[rows, last] - times[rows, base]
+        per_hour = gain * 3600 / np.maximum(span, self.first_resample)
+        
+        gaining = np.flatnonzero(gain > 0)
+        if len(gaining) > limit:
+            gaining = gaining[np.argpartition(-per_hour[gaining], limit - 1)[:limit]]
+        gaining = gaining[np.argsort(-per_hour[gaining], kind='stable')]
+        return [
+            Trend(
+                post_id=self._post_ids[rows[i]],
+                username=self._usernames[self._accounts[rows[i]]],
+                per_hour=float(per_hour[i]),
+                gain=int(gain[i]),
+                counts=tuple(int(count) for count in counts[i])
+            )
+            for i in gaining
+        ]
+    
+    def save(self):
+        """Write the tracked posts to the .npz file atomically."""
+        if not self._rows:
+            return
+        import numpy as np
+        size = self._size
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    post_ids=np.array([post_id or '' for post_id in self._post_ids[:size]]),
+                    usernames=np.array(self._usernames or ['']),
+                    times=self._times[:size],
+                    counts=self._counts[:size],
+                    sample_counts=self._sample_counts[:size],
+                    first_seen=self._first_seen[:size],
+                    next_due=self._next_due[:size],
+                    accounts=self._accounts[:size]
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def load(self) -> int:
+        """Resume tracking the posts saved by save() that are still within track_duration.
+        
+        Returns the number of posts restored.
+        """
+        if not os.path.exists(self.path) or not HAS_NUMPY:
+            return 0
+        import numpy as np
+        try:
+            with np.load(self.path) as data:
+                saved = {name: data[name] for name in data.files}
+        except Exception as e:
+            logger.error(f"Error loading engagement history from {self.path}: {str(e)}")
+            return 0
+        if saved['times'].shape[1:] != (self.samples_per_post,):
+            logger.warning("Engagement history was saved with a different schedule and is ignored")
+            return 0
+        
+        # Keep the most recently seen posts that are still being tracked or ranked
+        keep = np.flatnonzero(saved['first_seen'] >= time.time() - self.track_duration)
+        keep = keep[np.argsort(saved['first_seen'][keep], kind='stable')][-self.max_posts:]
+        if not len(keep):
+            return 0
+        self._allocate(max(INITIAL_CAPACITY, min(self.max_posts, len(keep))))
+        size = len(keep)
+        self._times[:size] = saved['times'][keep]
+        self._counts[:size] = saved['counts'][keep]
+        self._sample_counts[:size] = saved['sample_counts'][keep]
+        self._first_seen[:size] = saved['first_seen'][keep]
+        self._next_due[:size] = saved['next_due'][keep]
+        usernames = [str(username) for username in saved['usernames']]
+        self._accounts[:size] = [self._username_code(usernames[code]) for code in saved['accounts'][keep]]
+        for row, post_id in enumerate(saved['post_ids'][keep]):
+            self._rows[str(post_id)] = row
+            self._post_ids[row] = str(post_id)
+        self._size = size
+        logger.info(f"Restored engagement history of {size} posts")
+        return size
@@ -0,0 +1,164 @@
+import html
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# One scanner for everything the renderer cares about: tags, character
+# references and characters that are markdown syntax in Discord
+TOKEN_PATTERN = re.compile(
+    r'<(?P<close>/?)(?P<tag>[a-zA-Z]+)(?P<attrs>[^>]*)>'
+    r'|&(?P<entity>#?\w+);'
+    r'|(?P<markdown>[\\*_~`|\[\]])'
+)
+ATTR_PATTERN = re.compile(r'([a-zA-Z-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+ENTITY_PATTERN = re.compile(r'&#?\w+;')
+MARKDOWN_CHARACTERS = frozenset('\\*_~`|[]')
+
+# Weibo links without a host are relative to the mobile site
+WEIBO_BASE_URL = 'https://m.weibo.cn'
+
+# Discord embed limits
+MAX_DESCRIPTION_LENGTH = 4096
+MAX_FIELD_LENGTH = 1024
+
+def _attrs(raw: str) -> dict:
+    """Parse a tag's attributes, quoted or not."""
+    return {
+        match.group(1).lower(): next(value for value in match.groups()[1:] if value is not None)
+        for match in ATTR_PATTERN.finditer(raw)
+    }
+
+def _link_target(href: str) -> str:
+    """Return where a Weibo link really points, unwrapping sinaurl redirects."""
+    # Only complete references are decoded; a bare "&times" in a query string is not one
+    href = ENTITY_PATTERN.sub(lambda match: html.unescape(match.group(0)), href)
+    if href.startswith('/'):
+        href = WEIBO_BASE_URL + href
+    parts = urlsplit(href)
+    if parts.path.endswith('/sinaurl'):
+        target = parse_qs(parts.query).get('u')
+        if target:
+            href = target[0]
+    # Parentheses would end the markdown link early
+    return href.replace('(', '%28').replace(')', '%29')
+
+def tokenize(text: str, markdown: bool = True) -> List[Tuple[str, str]]:
+    """Convert Weibo HTML into (kind, value) pieces in a single pass.
+    
+    Kinds are 'text' (escaped for markdown), 'break' and 'link' (value is
+    the complete markdown link). Without markdown, nothing is escaped and
+    links are reduced to their text.
+    """
+    pieces = []
+    link_href: Optional[str] = None
+    link_text: List[str] = []
+    position = 0
+    
+    def emit(value: str):
+        if link_href is not None:
+            link_text.append(value)
+        elif value:
+            pieces.append(('text', value))
+    
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.start() > position:
+            emit(text[position:match.start()])
+        position = match.end()
+        
+        if match.group('entity') is not None:
+            value = html.unescape(match.group(0))
+            emit('\\' + value if markdown and value in MARKDOWN_CHARACTERS else value)
+        elif match.group('markdown') is not None:
+            emit('\\' + match.group('markdown') if markdown else match.group('markdown'))
+        else:
+            tag = match.group('tag').lower()
+            closing = match.group('close') == '/'
+            if tag == 'br':
+                if link_href is not None:
+                    link_text.append(' ')
+                else:
+                    pieces.append(('break', '\n'))
+            elif tag == 'a':
+                if not closing:
+                    link_href = _link_target(_attrs(match.group('attrs')).get('href', ''))
+                    link_text = []
+                elif link_href is not None:
+                    label = ''.join(link_text).strip()
+                    if label:
+                        pieces.append(('link', f"[{label}]({link_href})" if markdown and link_href else label))
+                    link_href = None
+            elif tag == 'img':
+                # Emoticons carry their name as alt text, e.g. [二哈]; link icons have none
+                alt = _attrs(match.group('attrs')).get('alt')
+                if alt:
+                    emit(alt.replace('[', '\\[').replace(']', '\\]') if markdown else alt)
+            # Any other tag (spans, <image> icons) is dropped, keeping its text
+    
+    if position < len(text):
+        emit(text[position:])
+    if link_href is not None and link_text:
+        pieces.append(('text', ''.join(link_text)))
+    return pieces
+
+def render_markdown(text: str, limit: int = MAX_DESCRIPTION_LENGTH) -> str:
+    """Render Weibo HTML as Discord markdown of at most limit characters.
+    
+    Truncation only happens between pieces, so a link is never cut in half.
+    """
+    output = []
+    length = 0
+    truncated = False
+    for kind, value in tokenize(text):
+        if length + len(value) > limit - 1:
+            if kind == 'text':
+                # Never leave a dangling escape before the ellipsis
+                output.append(value[:limit - 1 - length].rstrip('\\'))
+            truncated = True
+            break
+        output.append(value)
+        length += len(value)
+    rendered = ''.join(output).strip()
+    return rendered + '…' if truncated else rendered
+
+def render_plain(text: str) -> str:
+    """Render Weibo HTML as plain text, for search and previews."""
+    return ''.join(value for _, value in tokenize(text, markdown=False)).strip()
+
+class HtmlRenderer:
+    """Renders post text to Discord markdown, memoized by post ID.
+    
+    Each entry remembers the HTML it was rendered from, so a post whose text
+    changes (such as a truncated post expanded to its full text) is rendered
+    again.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        """Initialize the renderer with the number of rendered texts to keep."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._rendered = OrderedDict()  # (post ID, limit) -> (source HTML, markdown)
+    
+    def render(self, post_id: str, text: str, limit: int = MAX_DESCRIPTION_LENGTH) -> str:
+        """Return the markdown for a post's HTML text."""
+        key = (post_id, limit)
+        entry = self._rendered.get(key)
+        if entry is not None and entry[0] == text:
+            self._rendered.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        rendered = render_markdown(text, limit)
+        self._rendered[key] = (text, rendered)
+        self._rendered.move_to_end(key)
+        if len(self._rendered) > self.max_size:
+            self._rendered.popitem(last=False)
+        return rendered
+    
+    def __len__(self) -> int:
+        return len(self._rendered)
+
+# Shared by everything that renders posts
+renderer = HtmlRenderer()
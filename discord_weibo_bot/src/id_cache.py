@@ -0,0 +1,70 @@
+import time
+import logging
+import sys
+import os
+from typing import Any, Dict, Optional
+
+# Add the parent directory to sys.path to import storage helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage import load_json, atomic_write_json
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('id_cache')
+
+class NumericIdCache:
+    """Persistent cache of resolved numeric Weibo IDs.
+    
+    Failed lookups are cached too, with an exponential backoff before the
+    next attempt, so unresolvable accounts are not searched on every tick.
+    """
+    
+    def __init__(self, path: str, retry_base: float = 600, retry_max: float = 86400):
+        """Load cached IDs from the given JSON file."""
+        self.path = path
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._entries: Dict[str, Dict] = load_json(path, {})
+        
+    def get(self, username: str, weibo_id: str) -> Optional[Any]:
+        """Return the cached numeric ID for an account, if its screen name still matches."""
+        entry = self._entries.get(username)
+        if entry and entry.get('weibo_id') == weibo_id:
+            return entry.get('numeric_id')
+        return None
+    
+    def should_retry(self, username: str, weibo_id: str) -> bool:
+        """Check whether an unresolved account is due for another lookup."""
+        entry = self._entries.get(username)
+        if not entry or entry.get('weibo_id') != weibo_id:
+            return True
+        return time.time() >= entry.get('retry_at', 0)
+    
+    def record_success(self, username: str, weibo_id: str, numeric_id: Any):
+        """Cache a resolved numeric ID."""
+        self._entries[username] = {'weibo_id': weibo_id, 'numeric_id': numeric_id}
+    
+    def record_failure(self, username: str, weibo_id: str):
+        """Cache a failed lookup and schedule the next attempt with backoff."""
+        entry = self._entries.get(username)
+        failures = 1
+        if entry and entry.get('weibo_id') == weibo_id:
+            failures = entry.get('failures', 0) + 1
+        delay = min(self.retry_max, self.retry_base * 2 ** (failures - 1))
+        self._entries[username] = {
+            'weibo_id': weibo_id,
+            'numeric_id': None,
+            'failures': failures,
+            'retry_at': time.time() + delay
+        }
+        logger.info(f"Next numeric ID lookup for {username} in {int(delay)}s")
+    
+    def save(self):
+        """Atomically write the cache to disk."""
+        try:
+            atomic_write_json(self.path, self._entries)
+        except Exception as e:
+            logger.error(f"Error saving numeric ID cache: {str(e)}")
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """
 Main entry point for the Discord Weibo Bot.
-This script initializes and runs the Discord bot.
+This script initializes and runs the Discord bot, or a poll worker
+when started with --worker in partitioned polling mode.
 """
 
 import os
 import sys
 import logging
-from src.discord_bot import run_bot
+import argparse
 
 # Set up logging
 logging.basicConfig(
@@ -21,7 +22,22 @@ logging.basicConfig(
 logger = logging.getLogger('main')
 
 def main():
-    """Main function to run the Discord bot."""
+    """Main function to run the Discord bot or a poll worker."""
+    parser = argparse.ArgumentParser(description="Discord Weibo Bot")
+    parser.add_argument('--worker', metavar='ID', help="run a poll worker with this ID instead of the bot")
+    args = parser.parse_args()
+    
+    if args.worker:
+        from src.poll_worker import run_worker
+        logger.info(f"Starting poll worker {args.worker}...")
+        try:
+            run_worker(args.worker)
+        except Exception as e:
+            logger.error(f"Error running poll worker: {str(e)}")
+            sys.exit(1)
+        return
+    
+    from src.discord_bot import run_bot
     logger.info("Starting Discord Weibo Bot...")
     
     try:
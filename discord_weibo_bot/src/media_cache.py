@@ -0,0 +1,231 @@
+import aiohttp
+import asyncio
+import hashlib
+import importlib.util
+import io
+import math
+import logging
+import sys
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Post
+
+# Pillow is optional; without it multi-image posts attach only their first image.
+# It is imported when the first grid is built rather than at startup.
+HAS_PILLOW = importlib.util.find_spec('PIL') is not None
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('media_cache')
+
+# Weibo's image hosts refuse requests that do not come from a Weibo page
+IMAGE_HEADERS = {
+    'Referer': 'https://weibo.com/',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Images shown in a grid thumbnail (Weibo posts have at most nine)
+MAX_GRID_IMAGES = 9
+
+@dataclass(frozen=True)
+class Attachment:
+    """A locally cached image to upload with a post's embed."""
+    __slots__ = ('filename', 'path', 'size', 'image_count')
+    
+    filename: str  # name the embed refers to as attachment://filename
+    path: str
+    size: int
+    image_count: int  # how many of the post's images the attachment shows
+
+def build_grid(paths: List[str], tile: int) -> bytes:
+    """Combine images into one JPEG grid of square tiles."""
+    from PIL import Image, ImageOps
+    tiles = []
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                tiles.append(ImageOps.fit(image.convert('RGB'), (tile, tile)))
+        except Exception as e:
+            logger.warning(f"Skipping unreadable image {path}: {str(e)}")
+    if not tiles:
+        raise ValueError("No readable images for the grid")
+    
+    columns = 2 if len(tiles) in (2, 4) else min(3, len(tiles))
+    rows = math.ceil(len(tiles) / columns)
+    grid = Image.new('RGB', (columns * tile, rows * tile), (255, 255, 255))
+    for index, image in enumerate(tiles):
+        grid.paste(image, ((index % columns) * tile, (index // columns) * tile))
+    
+    buffer = io.BytesIO()
+    grid.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+class MediaCache:
+    """Size-bounded disk LRU cache of post images.
+    
+    Images are fetched concurrently with the headers Weibo's image hosts
+    expect and uploaded to Discord as attachments, since Discord often cannot
+    load sinaimg.cn links itself. Multi-image posts get a single grid
+    thumbnail when Pillow is installed.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int = 500 * 1024 * 1024, max_concurrent_fetches: int = 8,
+                 request_timeout: float = 10, grid_tile: int = 300):
+        """Initialize the cache in a directory, keeping at most max_bytes of images."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.request_timeout = request_timeout
+        self.grid_tile = grid_tile
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._files = OrderedDict()  # filename -> size, least recently used first
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._fetch_slots: Optional[asyncio.Semaphore] = None
+        self._session = None
+        
+        # Rebuild the LRU order from modification times, which are refreshed on use
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.tmp'):
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, filename, size in sorted(entries):
+            self._files[filename] = size
+            self.total_bytes += size
+        self._evict()
+    
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+    
+    def _touch(self, filename: str) -> str:
+        """Mark a cached file as recently used and return its path."""
+        self._files.move_to_end(filename)
+        path = self._path(filename)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+    
+    def _write(self, filename: str, data: bytes):
+        """Write a file atomically so a crash never leaves a partial image."""
+        tmp_path = self._path(filename) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(filename))
+    
+    def _add(self, filename: str, size: int):
+        """Index a newly written file and evict the least recently used ones over the size bound."""
+        self.total_bytes += size - self._files.pop(filename, 0)
+        self._files[filename] = size
+        self._evict()
+    
+    def _evict(self):
+        """Remove the least recently used files until the cache fits in max_bytes."""
+        while self.total_bytes > self.max_bytes and self._files:
+            filename, size = self._files.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(filename))
+            except FileNotFoundError:
+                pass
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared image session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers=IMAGE_HEADERS
+            )
+        return self._session
+    
+    async def fetch(self, url: str) -> Optional[str]:
+        """Return the local path of an image, downloading it on first use."""
+        extension = os.path.splitext(url.split('?', 1)[0])[1].lower() or '.jpg'
+        filename = hashlib.sha1(url.encode('utf-8')).hexdigest() + extension
+        if filename in self._files:
+            self.hits += 1
+            return self._touch(filename)
+        
+        # Posts sharing an image (or channels racing) share one download
+        task = self._in_flight.get(filename)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._download(url, filename))
+            self._in_flight[filename] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(filename, None))
+        return await asyncio.shield(task)
+    
+    async def _download(self, url: str, filename: str) -> Optional[str]:
+        """Download an image into the cache."""
+        if self._fetch_slots is None:
+            self._fetch_slots = asyncio.Semaphore(self.max_concurrent_fetches)
+        try:
+            async with self._fetch_slots:
+                session = await self._get_session()
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+            if len(data) > self.max_bytes:
+                raise ValueError(f"image of {len(data)} bytes does not fit in the cache")
+            await asyncio.get_running_loop().run_in_executor(None, self._write, filename, data)
+            self._add(filename, len(data))
+            return self._path(filename)
+        except Exception as e:
+            logger.warning(f"Error fetching image {url}: {str(e)}")
+            return None
+    
+    async def attachment_for(self, post: Post) -> Optional[Attachment]:
+        """Return the image attachment for a post, or None if it has no images or they cannot be fetched."""
+        if not post.images:
+            return None
+        
+        if len(post.images) == 1 or not HAS_PILLOW:
+            path = await self.fetch(post.images[0])
+            size = self._files.get(os.path.basename(path)) if path else None
+            if size is None:
+                return None
+            extension = os.path.splitext(path)[1]
+            return Attachment(f"weibo_{post.id}{extension}", path, size, 1)
+        
+        # Multi-image posts are combined into one grid thumbnail
+        images = post.images[:MAX_GRID_IMAGES]
+        filename = 'grid_' + hashlib.sha1('\n'.join(images).encode('utf-8')).hexdigest() + '.jpg'
+        if filename in self._files:
+            self.hits += 1
+            path = self._touch(filename)
+        else:
+            paths = [path for path in await asyncio.gather(*(self.fetch(url) for url in images)) if path]
+            if not paths:
+                return None
+            try:
+                data = await asyncio.get_running_loop().run_in_executor(None, build_grid, paths, self.grid_tile)
+                await asyncio.get_running_loop().run_in_executor(None, self._write, filename, data)
+            except Exception as e:
+                logger.warning(f"Error building image grid for post {post.id}: {str(e)}")
+                return None
+            self._add(filename, len(data))
+            path = self._path(filename)
+        size = self._files.get(filename)
+        if size is None:
+            return None
+        return Attachment(f"weibo_{post.id}.jpg", path, size, len(images))
+    
+    async def close(self):
+        """Close the image session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
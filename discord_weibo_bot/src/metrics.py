@@ -0,0 +1,195 @@
+import asyncio
+import bisect
+import logging
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('metrics')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label pairs in the Prometheus text format."""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class _Metric:
+    """Base class for metrics with optional labels.
+    
+    Updating a metric is a dict lookup and an addition, cheap enough to
+    leave on in production. A metric can instead read its value from a
+    function at scrape time, for state that is already counted elsewhere.
+    """
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+        
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabelled) value from a function at scrape time."""
+        self._function = function
+    
+    def _samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """Yield (suffix, label names, label values, value) for every sample."""
+        if self._function is not None:
+            yield '', (), (), self._function()
+            return
+        for labels, value in self._values.items():
+            yield '', self.labelnames, labels, value
+    
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, labels)} {value}")
+        return lines
+
+class Counter(_Metric):
+    """A value that only goes up."""
+    kind = 'counter'
+    
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+    kind = 'gauge'
+    
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+class Histogram(_Metric):
+    """Counts observations in buckets, e.g. request latencies."""
+    kind = 'histogram'
+    
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+        
+    def observe(self, value: float, *labels: str):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+    
+    def _samples(self):
+        bucket_names = self.labelnames + ('le',)
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else str(bound)
+                yield '_bucket', bucket_names, labels + (le,), cumulative
+            yield '_sum', self.labelnames, labels, self._sums[labels]
+            yield '_count', self.labelnames, labels, cumulative
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for a scrape."""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+# Weibo fetching
+FETCH_LATENCY = registry.register(Histogram(
+    'weibo_fetch_duration_seconds', 'Time to fetch and parse an account timeline', ('account',)))
+FETCH_ERRORS = registry.register(Counter(
+    'weibo_fetch_errors_total', 'Failed Weibo requests by error type', ('type',)))
+CACHE_HITS = registry.register(Counter(
+    'weibo_cache_hits_total', 'Post cache reads answered with fresh posts'))
+CACHE_STALE_HITS = registry.register(Counter(
+    'weibo_cache_stale_hits_total', 'Post cache reads answered with expired posts'))
+CACHE_MISSES = registry.register(Counter(
+    'weibo_cache_misses_total', 'Post cache reads with nothing cached'))
+
+# Polling
+CIRCUIT_OPEN = registry.register(Gauge(
+    'weibo_circuit_open', 'Whether requests to Weibo are paused after repeated throttling (1) or not (0)'))
+TICK_DURATION = registry.register(Gauge(
+    'weibo_poll_tick_duration_seconds', 'Duration of the most recent polling tick'))
+FETCH_INTERVAL = registry.register(Gauge(
+    'weibo_fetch_interval_seconds', 'Configured default fetch interval'))
+EVENT_LOOP_LAG = registry.register(Gauge(
+    'event_loop_lag_seconds', 'How late the event loop woke up for the most recent lag probe'))
+
+# Discord delivery
+DELIVERY_QUEUE_DEPTH = registry.register(Gauge(
+    'discord_delivery_queue_depth', 'Embeds waiting to be sent across all channels'))
+SEND_LATENCY = registry.register(Histogram(
+    'discord_send_duration_seconds', 'Time for one channel.send call'))
+DELIVERY_LATENCY = registry.register(Histogram(
+    'discord_delivery_latency_seconds', 'Time from queueing an embed to it being sent'))
+
+async def monitor_event_loop_lag(interval: float = 1.0):
+    """Measure how late the event loop wakes up from a sleep, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - started - interval))
+
+class MetricsServer:
+    """Local HTTP server exposing the registry at /metrics.
+    
+    aiohttp's server side is imported on start, so it costs nothing at
+    startup when metrics are disabled.
+    """
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 9108, metrics: MetricsRegistry = registry):
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self._runner = None
+        
+    async def handle_metrics(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+        return web.Response(text=self.metrics.render(), content_type='text/plain', charset='utf-8')
+    
+    async def start(self):
+        """Start serving in the current event loop."""
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+# Weibo posts are kept in memory for many accounts at once, so these types use
+# __slots__ and tuples instead of per-post dicts and lists.
+
+@dataclass(frozen=True)
+class Account:
+    """A tracked Weibo account, shared by every post from that account."""
+    __slots__ = ('username', 'id', 'screen_name', 'name', 'description')
+    
+    username: str
+    id: Any
+    screen_name: str
+    name: str
+    description: str
+    
+    @classmethod
+    def from_config(cls, username: str, account_info: Dict) -> 'Account':
+        """Build an Account from a WEIBO_ACCOUNTS entry."""
+        return cls(
+            username=username,
+            id=account_info['numeric_id'],
+            screen_name=account_info['weibo_id'],
+            name=account_info['name'],
+            description=account_info['description']
+        )
+    
+    @classmethod
+    def from_dict(cls, username: str, user: Dict) -> 'Account':
+        """Build an Account from a post 'user' dict."""
+        return cls(
+            username=username,
+            id=user['id'],
+            screen_name=user['screen_name'],
+            name=user['name'],
+            description=user['description']
+        )
+    
+    def to_dict(self) -> Dict:
+        """Return the account in the post 'user' dict format."""
+        return {
+            'id': self.id,
+            'screen_name': self.screen_name,
+            'name': self.name,
+            'description': self.description
+        }
+
+@dataclass(frozen=True)
+class Retweet:
+    """The original post quoted by a repost."""
+    __slots__ = ('id', 'created_at', 'text', 'screen_name', 'images')
+    
+    id: str
+    created_at: str
+    text: str
+    screen_name: str
+    images: Optional[Tuple[str, ...]]  # None when the original had no pictures field
+    
+    @classmethod
+    def from_dict(cls, retweeted: Dict) -> 'Retweet':
+        """Build a Retweet from its dict format."""
+        images = retweeted.get('images')
+        return cls(
+            id=retweeted['id'],
+            created_at=retweeted['created_at'],
+            text=retweeted['text'],
+            screen_name=retweeted['user']['screen_name'],
+            images=tuple(images) if images is not None else None
+        )
+    
+    def to_dict(self) -> Dict:
+        """Return the retweet in the original dict format."""
+        retweeted = {
+            'id': self.id,
+            'created_at': self.created_at,
+            'text': self.text,
+            'user': {
+                'screen_name': self.screen_name
+            }
+        }
+        if self.images is not None:
+            retweeted['images'] = list(self.images)
+        return retweeted
+
+@dataclass(frozen=True)
+class Post:
+    """A Weibo post parsed from the container API."""
+    __slots__ = (
+        'id', 'created_at', 'text', 'source', 'reposts_count', 'comments_count',
+        'attitudes_count', 'account', 'images', 'retweeted', 'is_long_text'
+    )
+    
+    id: str
+    created_at: str
+    text: str
+    source: str
+    reposts_count: int
+    comments_count: int
+    attitudes_count: int  # likes
+    account: Account
+    images: Tuple[str, ...]
+    retweeted: Optional[Retweet]
+    is_long_text: bool  # text is truncated with a 全文 link; the full text is fetched on demand
+    
+    @property
+    def url(self) -> str:
+        """Link to the post on m.weibo.cn."""
+        return f"https://m.weibo.cn/detail/{self.id}"
+    
+    @classmethod
+    def from_dict(cls, post: Dict, account: Account) -> 'Post':
+        """Build a Post from its dict format, attaching the shared Account object."""
+        retweeted = post.get('retweeted')
+        return cls(
+            id=post['id'],
+            created_at=post['created_at'],
+            text=post['text'],
+            source=post['source'],
+            reposts_count=post['reposts_count'],
+            comments_count=post['comments_count'],
+            attitudes_count=post['attitudes_count'],
+            account=account,
+            images=tuple(post['images']),
+            retweeted=Retweet.from_dict(retweeted) if retweeted is not None else None,
+            is_long_text=post.get('is_long_text', False)
+        )
+    
+    def to_dict(self) -> Dict:
+        """Return the post in the original dict format (as saved in test_results.json)."""
+        post = {
+            'id': self.id,
+            'created_at': self.created_at,
+            'text': self.text,
+            'source': self.source,
+            'reposts_count': self.reposts_count,
+            'comments_count': self.comments_count,
+            'attitudes_count': self.attitudes_count,
+            'user': self.account.to_dict(),
+            'url': self.url,
+            'images': list(self.images)
+        }
+        if self.retweeted is not None:
+            post['retweeted'] = self.retweeted.to_dict()
+        if self.is_long_text:
+            post['is_long_text'] = True
+        return post
@@ -0,0 +1,104 @@
+import bisect
+import hashlib
+import json
+import os
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('partition')
+
+def _hash(key: str) -> int:
+    """Map a key to a position on the ring."""
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+class ConsistentHashRing:
+    """Consistent hash ring assigning accounts to poll workers.
+    
+    Each worker owns many virtual points on the ring, so when a worker joins
+    or leaves only about 1/N of the accounts move to a different worker.
+    """
+    
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        """Build the ring for the given worker IDs."""
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+            
+    def add(self, node: str):
+        """Add a worker to the ring."""
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+    
+    def remove(self, node: str):
+        """Remove a worker from the ring."""
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                del self._points[bisect.bisect_left(self._points, point)]
+    
+    def node_for(self, key: str) -> Optional[str]:
+        """Return the worker that owns a key."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+class WorkerMembership:
+    """Tracks live poll workers through heartbeat files in a shared directory."""
+    
+    def __init__(self, directory: str, worker_id: str, ttl: float = 30):
+        """Use the given directory for heartbeats; workers silent for ttl seconds are dropped."""
+        self.directory = directory
+        self.worker_id = worker_id
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        
+    @property
+    def _heartbeat_path(self) -> str:
+        return os.path.join(self.directory, f"{self.worker_id}.json")
+    
+    def heartbeat(self):
+        """Announce that this worker is alive."""
+        tmp_path = self._heartbeat_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'worker_id': self.worker_id, 'pid': os.getpid(), 'time': time.time()}, f)
+        os.replace(tmp_path, self._heartbeat_path)
+    
+    def leave(self):
+        """Remove this worker's heartbeat so the others rebalance right away."""
+        try:
+            os.remove(self._heartbeat_path)
+        except FileNotFoundError:
+            pass
+    
+    def live_workers(self) -> List[str]:
+        """Return the IDs of workers that sent a heartbeat within the TTL."""
+        now = time.time()
+        workers = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                if now - entry.stat().st_mtime <= self.ttl:
+                    workers.append(entry.name[:-len('.json')])
+            except FileNotFoundError:
+                continue
+        return sorted(workers)
@@ -0,0 +1,156 @@
+import heapq
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('poll_scheduler')
+
+class PollScheduler:
+    """Priority-queue scheduler that decides when each account is polled next.
+    
+    Each account's interval follows its observed posting rate (busy accounts
+    are polled more often) and backs off after errors, within min/max bounds.
+    A global budget caps how many polls are started per minute.
+    """
+    
+    def __init__(self, usernames: Iterable[str], default_interval: float = 600,
+                 min_interval: float = 60, max_interval: float = 3600,
+                 max_requests_per_minute: int = 30, smoothing: float = 0.3):
+        """Schedule every account for its first poll, spread over the first tick."""
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_requests_per_minute = max_requests_per_minute
+        self.smoothing = smoothing
+        self._heap = []
+        self._next_poll: Dict[str, float] = {}
+        self._last_poll: Dict[str, float] = {}
+        self._post_rate: Dict[str, float] = {}  # EWMA of new posts per second
+        self._errors: Dict[str, int] = {}
+        self._recent_polls = deque()
+        for username in usernames:
+            self.add(username)
+        
+    def add(self, username: str, delay: float = 0):
+        """Start scheduling an account, polling it after the given delay."""
+        if username in self._next_poll:
+            return
+        self._push(username, time.time() + delay)
+    
+    def remove(self, username: str):
+        """Stop scheduling an account. Its heap entry is dropped lazily."""
+        self._next_poll.pop(username, None)
+        self._last_poll.pop(username, None)
+        self._post_rate.pop(username, None)
+        self._errors.pop(username, None)
+    
+    def _push(self, username: str, when: float):
+        """Put an account on the heap for the given time."""
+        self._next_poll[username] = when
+        heapq.heappush(self._heap, (when, username))
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return each account's schedule and learned posting rate as JSON-serializable data."""
+        return {
+            username: {
+                'next_poll': next_poll,
+                'last_poll': self._last_poll.get(username),
+                'post_rate': self._post_rate.get(username),
+                'errors': self._errors.get(username, 0)
+            }
+            for username, next_poll in self._next_poll.items()
+        }
+    
+    def restore(self, snapshot: Dict[str, Dict]) -> int:
+        """Resume the schedule saved by snapshot() for accounts that are still scheduled.
+        
+        Accounts whose saved poll time has passed are due at once; the rest
+        keep their place instead of all being polled on the first tick.
+        Returns the number of accounts restored.
+        """
+        latest = time.time() + self.max_interval
+        restored = 0
+        for username, state in snapshot.items():
+            if username not in self._next_poll:
+                continue
+            if state.get('last_poll') is not None:
+                self._last_poll[username] = state['last_poll']
+            if state.get('post_rate') is not None:
+                self._post_rate[username] = state['post_rate']
+            if state.get('errors'):
+                self._errors[username] = state['errors']
+            self._push(username, min(state['next_poll'], latest))
+            restored += 1
+        return restored
+    
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Pop the accounts that are due now, most overdue first, within the request budget.
+        
+        Every returned account must be passed back to record() to be rescheduled.
+        """
+        now = time.time() if now is None else now
+        while self._recent_polls and self._recent_polls[0] <= now - 60:
+            self._recent_polls.popleft()
+            
+        usernames = []
+        while self._heap and self._heap[0][0] <= now:
+            if len(self._recent_polls) >= self.max_requests_per_minute:
+                break
+            when, username = heapq.heappop(self._heap)
+            # Skip stale entries left by remove() or rescheduling
+            if self._next_poll.get(username) != when:
+                continue
+            del self._next_poll[username]
+            self._recent_polls.append(now)
+            usernames.append(username)
+        return usernames
+    
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Return the seconds until the next account is due, or None if nothing is scheduled."""
+        now = time.time() if now is None else now
+        while self._heap and self._next_poll.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+    
+    def interval(self, username: str) -> float:
+        """Return the current polling interval for an account."""
+        rate = self._post_rate.get(username)
+        if rate is None:
+            interval = self.default_interval
+        elif rate <= 0:
+            interval = self.max_interval
+        else:
+            # Aim for roughly one new post per poll
+            interval = 1.0 / rate
+            
+        errors = self._errors.get(username, 0)
+        if errors:
+            interval *= 2 ** min(errors, 6)
+            
+        return min(self.max_interval, max(self.min_interval, interval))
+    
+    def record(self, username: str, new_posts: int = 0, error: bool = False,
+               now: Optional[float] = None):
+        """Record the outcome of a poll and schedule the account's next one."""
+        now = time.time() if now is None else now
+        
+        if error:
+            self._errors[username] = self._errors.get(username, 0) + 1
+        else:
+            self._errors.pop(username, None)
+            last_poll = self._last_poll.get(username)
+            if last_poll is not None and now > last_poll:
+                observed = new_posts / (now - last_poll)
+                previous = self._post_rate.get(username, 1.0 / self.default_interval)
+                self._post_rate[username] = self.smoothing * observed + (1 - self.smoothing) * previous
+            self._last_poll[username] = now
+            
+        self._push(username, now + self.interval(username))
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import sys
+import os
+from typing import Set
+
+# Add the parent directory to sys.path to import config and weibo_fetcher
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.account_registry import AccountRegistry
+from src.poll_scheduler import PollScheduler
+from src.partition import ConsistentHashRing, WorkerMembership
+from src.post_queue import PostQueueClient, queue_address
+from src.config import (
+    WEIBO_ACCOUNTS, FETCH_INTERVAL, REQUEST_TIMEOUT, CONNECTION_POOL_SIZE,
+    MAX_CONCURRENT_FETCHES, FETCH_TICK_DEADLINE, CACHE_MAX_ACCOUNTS,
+    CACHE_BACKEND, CACHE_REDIS_URL, SHARED_CACHE_MAX_AGE, REQUESTS_PER_SECOND, REQUEST_BURST,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, CIRCUIT_MAX_RESET_TIMEOUT,
+    POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_REQUEST_BUDGET, SCHEDULER_TICK,
+    ID_RESOLVE_INTERVAL, POST_QUEUE_ADDRESS, WORKER_DIR, WORKER_HEARTBEAT_INTERVAL, WORKER_TTL,
+    BACKFILL_MAX_PAGES
+)
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('poll_worker')
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class PollWorker:
+    """Polls the share of the tracked accounts assigned to this worker.
+    
+    Workers find each other through heartbeat files and split the accounts
+    with a consistent hash ring, so adding or losing a worker only moves the
+    accounts that belonged to it. New posts are sent to the bot process.
+    """
+    
+    def __init__(self, worker_id: str):
+        """Initialize the worker with a unique ID."""
+        self.worker_id = worker_id
+        self.account_registry = AccountRegistry(os.path.join(BASE_DIR, 'accounts.db'), seed_accounts=WEIBO_ACCOUNTS)
+        self.weibo_fetcher = AsyncWeiboFetcher({
+            'WEIBO_ACCOUNTS': self.account_registry,
+            'WEIBO_API_BASE_URL': 'https://m.weibo.cn/api/container/getIndex',
+            'CACHE_DURATION': 300,  # 5 minutes
+            'CACHE_MAX_ACCOUNTS': CACHE_MAX_ACCOUNTS,
+            'CACHE_BACKEND': CACHE_BACKEND,
+            'CACHE_PATH': os.path.join(BASE_DIR, 'post_cache.db'),
+            'CACHE_REDIS_URL': CACHE_REDIS_URL,
+            'SHARED_CACHE_MAX_AGE': SHARED_CACHE_MAX_AGE,
+            'ID_CACHE_FILE': os.path.join(BASE_DIR, f'numeric_ids.{worker_id}.json'),
+            'MAX_POSTS_PER_ACCOUNT': 5,
+            'BACKFILL_MAX_PAGES': BACKFILL_MAX_PAGES,
+            'REQUEST_TIMEOUT': REQUEST_TIMEOUT,
+            'CONNECTION_POOL_SIZE': CONNECTION_POOL_SIZE,
+            'MAX_CONCURRENT_FETCHES': MAX_CONCURRENT_FETCHES,
+            'FETCH_TICK_DEADLINE': FETCH_TICK_DEADLINE,
+            'REQUESTS_PER_SECOND': REQUESTS_PER_SECOND,
+            'REQUEST_BURST': REQUEST_BURST,
+            'CIRCUIT_FAILURE_THRESHOLD': CIRCUIT_FAILURE_THRESHOLD,
+            'CIRCUIT_RESET_TIMEOUT': CIRCUIT_RESET_TIMEOUT,
+            'CIRCUIT_MAX_RESET_TIMEOUT': CIRCUIT_MAX_RESET_TIMEOUT
+        })
+        self.poll_scheduler = PollScheduler(
+            [],
+            default_interval=FETCH_INTERVAL,
+            min_interval=POLL_MIN_INTERVAL,
+            max_interval=POLL_MAX_INTERVAL,
+            max_requests_per_minute=POLL_REQUEST_BUDGET
+        )
+        self.membership = WorkerMembership(os.path.join(BASE_DIR, WORKER_DIR), worker_id, ttl=WORKER_TTL)
+        self.ring = ConsistentHashRing()
+        self.post_queue = PostQueueClient(queue_address(POST_QUEUE_ADDRESS, BASE_DIR))
+        self.owned: Set[str] = set()
+    
+    def rebalance(self):
+        """Announce this worker and take over the accounts the ring assigns to it."""
+        self.membership.heartbeat()
+        self.account_registry.reload()
+        
+        live_workers = set(self.membership.live_workers())
+        for worker_id in self.ring.nodes - live_workers:
+            self.ring.remove(worker_id)
+        for worker_id in live_workers - self.ring.nodes:
+            self.ring.add(worker_id)
+        
+        # The request budget and rate limit are shared between all live workers
+        self.poll_scheduler.max_requests_per_minute = max(1, POLL_REQUEST_BUDGET // len(live_workers))
+        if self.weibo_fetcher.rate_limiter:
+            self.weibo_fetcher.rate_limiter.rate = REQUESTS_PER_SECOND / len(live_workers)
+        
+        owned = {username for username in self.account_registry if self.ring.node_for(username) == self.worker_id}
+        for username in self.owned - owned:
+            self.poll_scheduler.remove(username)
+            self.weibo_fetcher.forget_account(username)
+        for username in owned - self.owned:
+            self.poll_scheduler.add(username)
+        if owned != self.owned:
+            logger.info(f"Worker {self.worker_id} now polls {len(owned)} of {len(self.account_registry)} accounts "
+                        f"({len(live_workers)} workers live)")
+        self.owned = owned
+    
+    async def resolve_account_ids(self):
+        """Look up numeric IDs for owned accounts configured by screen name only."""
+        try:
+            resolved = await self.weibo_fetcher.resolve_numeric_ids(self.owned)
+            for username, numeric_id in resolved.items():
+                self.account_registry.set_numeric_id(username, numeric_id)
+        except Exception as e:
+            logger.error(f"Error resolving account IDs: {str(e)}")
+    
+    async def poll_due_accounts(self):
+        """Fetch the new posts of the owned accounts that are due and send them to the bot."""
+        # While Weibo is throttling us, due accounts wait for the circuit to close
+        if self.weibo_fetcher.circuit_breaker.is_open:
+            return
+        due_accounts = self.poll_scheduler.due()
+        if not due_accounts:
+            return
+        logger.info(f"Fetching Weibo posts for {len(due_accounts)} accounts...")
+        
+        # Accounts polled for the first time return their latest posts rather than new ones
+        primed = {username for username in due_accounts if username in self.weibo_fetcher.newest_post_ids}
+        pending = set(due_accounts)
+        try:
+            async for username, posts in self.weibo_fetcher.iter_all_posts(due_accounts, force_refresh=True, incremental=True):
+                if posts:
+                    await self.post_queue.send(username, posts)
+                pending.discard(username)
+                if username not in self.owned:
+                    continue  # handed to another worker during this tick
+                new_post_count = len(posts) if username in primed else 0
+                self.poll_scheduler.record(username, new_post_count, error=username in self.weibo_fetcher.failed_accounts)
+        except Exception as e:
+            logger.error(f"Error polling accounts: {str(e)}")
+        finally:
+            # Accounts cut off by the tick deadline or an error are retried with backoff
+            for username in pending & self.owned:
+                self.poll_scheduler.record(username, error=True)
+    
+    async def _heartbeat_loop(self):
+        """Rebalance every heartbeat interval, independently of slow polling ticks."""
+        while True:
+            try:
+                self.rebalance()
+            except Exception as e:
+                logger.error(f"Error rebalancing accounts: {str(e)}")
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+    
+    async def run(self):
+        """Poll until cancelled, resolving IDs every ID_RESOLVE_INTERVAL."""
+        loop = asyncio.get_running_loop()
+        logger.info(f"Starting poll worker {self.worker_id}")
+        self.rebalance()
+        heartbeat = asyncio.ensure_future(self._heartbeat_loop())
+        next_resolve = loop.time()
+        try:
+            while True:
+                if loop.time() >= next_resolve:
+                    await self.resolve_account_ids()
+                    next_resolve = loop.time() + ID_RESOLVE_INTERVAL
+                await self.poll_due_accounts()
+                await asyncio.sleep(SCHEDULER_TICK)
+        finally:
+            # Leave the ring right away so the other workers take over this worker's accounts
+            heartbeat.cancel()
+            self.membership.leave()
+            await self.post_queue.close()
+            await self.weibo_fetcher.close()
+            self.account_registry.close()
+
+def run_worker(worker_id: str):
+    """Run a poll worker."""
+    try:
+        asyncio.run(PollWorker(worker_id).run())
+    except KeyboardInterrupt:
+        logger.info(f"Poll worker {worker_id} stopped")
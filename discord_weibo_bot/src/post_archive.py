@@ -0,0 +1,233 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import logging
+import sys
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Account, Post
+from src.html_renderer import render_plain
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('post_archive')
+
+# The trigram tokenizer indexes every three-character sequence, which works
+# for Chinese text without word segmentation but cannot match shorter terms;
+# those (two-character names are common) use a second index of bigrams
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+def bigrams(text: str) -> str:
+    """Split text into the space-separated bigrams indexed for short search terms.
+    
+    The last character of each word is also emitted on its own, so a
+    one-character term can be found as a prefix of some bigram.
+    """
+    return ' '.join(word[i:i + 2] for word in text.lower().split() for i in range(len(word)))
+
+class PostArchive:
+    """Searchable SQLite archive of every post the bot has seen.
+    
+    Posts are keyed by their numeric ID, so the newest posts come first
+    without sorting, and their text is indexed with FTS5's trigram
+    tokenizer plus a contentless bigram index for shorter terms. Archived
+    posts are buffered and written in batches by a worker thread so
+    archiving never holds up a polling tick.
+    """
+    
+    def __init__(self, path: str, flush_delay: float = 2.0):
+        """Open the archive database."""
+        self.path = path
+        self.flush_delay = flush_delay
+        self._pending: Dict[int, Tuple[str, str, str, str]] = {}  # rowid -> (username, created_at, body, data)
+        self._flush_handle = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._write_lock = threading.Lock()
+        
+        # Writes happen in worker threads; searches use their own connection on the event loop
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            "rowid INTEGER PRIMARY KEY, username TEXT NOT NULL, created_at TEXT NOT NULL, "
+            "body TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._writer.execute("CREATE INDEX IF NOT EXISTS idx_posts_username ON posts (username, rowid)")
+        self._writer.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+            "body, content='posts', content_rowid='rowid', tokenize='trigram')"
+        )
+        self._writer.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_bigrams USING fts5(grams, content='', prefix='1')"
+        )
+        self._writer.commit()
+        self._reader = sqlite3.connect(path)
+    
+    def add(self, posts: Iterable[Post]):
+        """Queue posts for archiving; a newer copy of a post replaces the archived one."""
+        for post in posts:
+            try:
+                rowid = int(post.id)
+            except ValueError:
+                continue
+            body = render_plain(post.text)
+            if post.retweeted is not None:
+                body += '\n' + render_plain(post.retweeted.text)
+            self._pending[rowid] = (
+                post.account.username, post.created_at, body,
+                json.dumps(post.to_dict(), ensure_ascii=False)
+            )
+        if self._pending:
+            self._mark_dirty()
+    
+    def _mark_dirty(self):
+        """Schedule a batched write."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write straight away
+            self._write(self._take_pending())
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+    
+    def _start_flush(self):
+        """Timer callback that starts a background flush."""
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
+    
+    def _take_pending(self) -> Dict[int, Tuple[str, str, str, str]]:
+        """Return the buffered posts and start a new buffer."""
+        pending, self._pending = self._pending, {}
+        return pending
+    
+    def _write(self, batch: Dict[int, Tuple[str, str, str, str]]):
+        """Write a batch of posts in one transaction, keeping the full-text index in step."""
+        if not batch:
+            return
+        with self._write_lock, self._writer:
+            rowids = list(batch)
+            existing = {}
+            for start in range(0, len(rowids), 500):
+                chunk = rowids[start:start + 500]
+                existing.update(self._writer.execute(
+                    f"SELECT rowid, body FROM posts WHERE rowid IN ({','.join('?' * len(chunk))})", chunk
+                ))
+            for rowid, (username, created_at, body, data) in batch.items():
+                old_body = existing.get(rowid)
+                if old_body is not None and old_body != body:
+                    self._writer.execute(
+                        "INSERT INTO posts_fts (posts_fts, rowid, body) VALUES ('delete', ?, ?)", (rowid, old_body)
+                    )
+                    self._writer.execute(
+                        "INSERT INTO posts_bigrams (posts_bigrams, rowid, grams) VALUES ('delete', ?, ?)",
+                        (rowid, bigrams(old_body))
+                    )
+                self._writer.execute(
+                    "INSERT OR REPLACE INTO posts (rowid, username, created_at, body, data) VALUES (?, ?, ?, ?, ?)",
+                    (rowid, username, created_at, body, data)
+                )
+                if old_body != body:
+                    self._writer.execute("INSERT INTO posts_fts (rowid, body) VALUES (?, ?)", (rowid, body))
+                    self._writer.execute("INSERT INTO posts_bigrams (rowid, grams) VALUES (?, ?)", (rowid, bigrams(body)))
+    
+    async def flush(self):
+        """Write buffered posts to disk in a worker thread."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batch = self._take_pending()
+            if not batch:
+                return
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+            except Exception as e:
+                logger.error(f"Error archiving posts: {str(e)}")
+                batch.update(self._pending)
+                self._pending = batch
+    
+    def search(self, query: str, username: Optional[str] = None,
+               offset: int = 0, limit: int = 5) -> Tuple[List[Post], bool]:
+        """Return a page of archived posts containing every term of the query, newest first.
+        
+        Also returns whether there are more results after this page.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return [], False
+        long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM_LENGTH]
+        short_terms = [term for term in terms if len(term) < MIN_TRIGRAM_TERM_LENGTH]
+        
+        # The full-text index drives the query in descending rowid order, so
+        # SQLite stops reading as soon as the page is full
+        if long_terms:
+            table = 'posts_fts'
+            match = ' AND '.join('"' + term.replace('"', '""') + '"' for term in long_terms)
+        else:
+            table = 'posts_bigrams'
+            # A one-character term matches any bigram starting with it (prefix='1' indexes those)
+            match = ' AND '.join(
+                '"' + term.replace('"', '""') + '"' + ('*' if len(term) == 1 else '') for term in short_terms
+            )
+        conditions = [f"{table} MATCH ?"]
+        params: List = [match]
+        if long_terms:
+            # Short terms only need checking against posts that already match the long ones
+            for term in short_terms:
+                conditions.append("p.body LIKE ? ESCAPE '\\'")
+                params.append('%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if username:
+            conditions.append("p.username = ?")
+            params.append(username)
+        rows = self._reader.execute(
+            f"SELECT p.username, p.data FROM {table} f JOIN posts p ON p.rowid = f.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY f.rowid DESC LIMIT ? OFFSET ?",
+            params + [limit + 1, offset]
+        ).fetchall()
+        return self._posts_from_rows(rows[:limit]), len(rows) > limit
+    
+    def get(self, post_ids: Iterable[str]) -> Dict[str, Post]:
+        """Return the archived posts with the given IDs, keyed by ID."""
+        rowids = [int(post_id) for post_id in post_ids if post_id.isdigit()]
+        if not rowids:
+            return {}
+        rows = self._reader.execute(
+            f"SELECT username, data FROM posts WHERE rowid IN ({','.join('?' * len(rowids))})", rowids
+        ).fetchall()
+        return {post.id: post for post in self._posts_from_rows(rows)}
+    
+    @staticmethod
+    def _posts_from_rows(rows: Iterable[Tuple[str, str]]) -> List[Post]:
+        """Decode (username, data) rows into Posts, sharing one Account per username."""
+        posts = []
+        accounts: Dict[str, Account] = {}
+        for username, data in rows:
+            post = json.loads(data)
+            account = accounts.get(username)
+            if account is None:
+                account = accounts[username] = Account.from_dict(username, post['user'])
+            posts.append(Post.from_dict(post, account))
+        return posts
+    
+    def __len__(self) -> int:
+        return self._reader.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    
+    def close(self):
+        """Write any buffered posts and close the archive."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._write(self._take_pending())
+        self._reader.close()
+        self._writer.close()
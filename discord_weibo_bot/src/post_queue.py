@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import sys
+import os
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Account, Post
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('post_queue')
+
+# Messages are newline-delimited JSON: {"username": ..., "posts": [post dicts]}.
+# An address containing ':' is host:port over TCP, anything else a Unix socket path.
+
+def _split_address(address: str):
+    """Return (host, port) for a TCP address, or None for a Unix socket path."""
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return None
+
+def queue_address(address: str, base_dir: str) -> str:
+    """Resolve a relative Unix socket path against base_dir; TCP addresses are returned as is."""
+    if _split_address(address):
+        return address
+    return os.path.join(base_dir, address)
+
+class PostQueueServer:
+    """Receives new posts from poll workers in the Discord-connected process."""
+    
+    def __init__(self, address: str, handler: Callable[[str, List[Post]], Awaitable]):
+        """Initialize the server with the coroutine that handles each account's posts."""
+        self.address = address
+        self.handler = handler
+        self._server = None
+        self._connections = set()
+        self._accounts: Dict[str, Account] = {}  # one shared Account object per username
+        
+    async def start(self):
+        """Start listening for workers."""
+        tcp = _split_address(self.address)
+        if tcp:
+            self._server = await asyncio.start_server(self._handle_connection, *tcp)
+        else:
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            self._server = await asyncio.start_unix_server(self._handle_connection, self.address)
+        logger.info(f"Listening for poll workers on {self.address}")
+    
+    async def stop(self):
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            
+    def _account(self, username: str, user: Dict) -> Account:
+        """Return the shared Account object for a username."""
+        account = Account.from_dict(username, user)
+        if self._accounts.get(username) != account:
+            self._accounts[username] = account
+        return self._accounts[username]
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read messages from one worker until it disconnects."""
+        self._connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    username = message['username']
+                    posts = [Post.from_dict(post, self._account(username, post['user'])) for post in message['posts']]
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Invalid message from poll worker: {str(e)}")
+                    continue
+                await self.handler(username, posts)
+        except Exception as e:
+            logger.error(f"Error reading from poll worker: {str(e)}")
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+class PostQueueClient:
+    """Sends new posts from a poll worker to the Discord-connected process.
+    
+    Messages that cannot be sent are kept in a bounded buffer and retried on
+    the next send, so a restart of the bot process loses nothing recent.
+    """
+    
+    def __init__(self, address: str, max_buffered: int = 10000):
+        """Initialize the client for the server's address."""
+        self.address = address
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._buffer = deque(maxlen=max_buffered)
+        
+    async def _connect(self) -> asyncio.StreamWriter:
+        """Connect to the server if not already connected."""
+        if self._writer is None or self._writer.is_closing():
+            tcp = _split_address(self.address)
+            if tcp:
+                _, self._writer = await asyncio.open_connection(*tcp)
+            else:
+                _, self._writer = await asyncio.open_unix_connection(self.address)
+        return self._writer
+    
+    async def send(self, username: str, posts: List[Post]):
+        """Queue an account's new posts and flush the buffer to the server."""
+        message = json.dumps({'username': username, 'posts': [post.to_dict() for post in posts]}, ensure_ascii=False)
+        self._buffer.append(message.encode('utf-8') + b'\n')
+        try:
+            writer = await self._connect()
+            while self._buffer:
+                writer.write(self._buffer[0])
+                await writer.drain()
+                self._buffer.popleft()
+        except (OSError, ConnectionError) as e:
+            logger.warning(f"Bot process unavailable, {len(self._buffer)} messages buffered: {str(e)}")
+            self._writer = None
+    
+    async def close(self):
+        """Close the connection."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
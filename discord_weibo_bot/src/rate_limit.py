@@ -0,0 +1,113 @@
+import asyncio
+import random
+import time
+import logging
+from typing import Optional
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('rate_limit')
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Return an exponential backoff delay with full jitter for the given attempt (1-based)."""
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+class TokenBucket:
+    """Token bucket limiting the request rate to Weibo across all accounts.
+    
+    Callers reserve a token and sleep until it is available, so waiting
+    requests are released in order at a steady rate after a burst.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket with its refill rate (tokens per second) and burst capacity."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+    
+    def reserve(self) -> float:
+        """Take a token and return how long to wait (in seconds) before using it."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while Weibo is throttling us."""
+
+class CircuitBreaker:
+    """Stops all requests to Weibo after repeated throttling responses.
+    
+    After failure_threshold consecutive failures the circuit opens for a
+    jittered, exponentially growing period. Then a single probe request is
+    let through: success closes the circuit, failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60, max_reset_timeout: float = 1800):
+        """Initialize the breaker with its trip threshold and open period bounds in seconds."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failures = 0
+        self.trips = 0  # consecutive times the circuit opened without a successful probe
+        self._open_until: Optional[float] = None
+        self._probing = False
+    
+    @property
+    def is_open(self) -> bool:
+        """Whether requests are currently blocked (a probe may still be pending)."""
+        return self._open_until is not None and (time.monotonic() < self._open_until or self._probing)
+    
+    @property
+    def probing(self) -> bool:
+        """Whether the probe request after an open period has been claimed and not answered yet."""
+        return self._probing
+    
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now, claiming the probe when the open period has ended."""
+        if self._open_until is None:
+            return True
+        if time.monotonic() < self._open_until or self._probing:
+            return False
+        self._probing = True
+        return True
+    
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        if self._open_until is not None:
+            logger.info("Weibo requests succeeded again, closing circuit")
+        self.failures = 0
+        self.trips = 0
+        self._open_until = None
+        self._probing = False
+    
+    def record_failure(self):
+        """Count a throttling response, opening the circuit when the threshold is reached."""
+        self.failures += 1
+        if self._probing or (self._open_until is None and self.failures >= self.failure_threshold):
+            self.trips += 1
+            # Jitter keeps instances and restarts from probing in lockstep
+            open_for = max(self.reset_timeout / 2, backoff_delay(self.trips, self.reset_timeout, self.max_reset_timeout))
+            self._open_until = time.monotonic() + open_for
+            self._probing = False
+            logger.warning(f"Weibo is throttling requests, pausing for {open_for:.0f} seconds")
+    
+    def record_error(self):
+        """Note a request that failed for another reason; a failed probe opens the circuit again."""
+        if self._probing:
+            self.record_failure()
+    
+    def release_probe(self):
+        """Give up a probe that was cancelled before Weibo answered, so the next request probes instead."""
+        self._probing = False
@@ -0,0 +1,98 @@
+import sqlite3
+import time
+import logging
+import sys
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Post
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('seen_ledger')
+
+class SeenPostLedger:
+    """Bounded per-account record of post IDs that have already been seen.
+    
+    IDs are kept in memory for O(1) membership checks and persisted in
+    SQLite, so the bot can resume after a restart without re-posting.
+    """
+    
+    def __init__(self, path: str, max_per_account: int = 200):
+        """Open the ledger database and load the seen IDs into memory."""
+        self.path = path
+        self.max_per_account = max_per_account
+        self._seen: Dict[str, OrderedDict] = {}
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_posts ("
+            "username TEXT NOT NULL, post_id TEXT NOT NULL, seen_at REAL NOT NULL, "
+            "PRIMARY KEY (username, post_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_posts_age ON seen_posts (username, seen_at)")
+        self._conn.commit()
+        self._load()
+        
+    def _load(self):
+        """Load every account's seen IDs, oldest first."""
+        rows = self._conn.execute("SELECT username, post_id FROM seen_posts ORDER BY seen_at, rowid")
+        for username, post_id in rows:
+            self._seen.setdefault(username, OrderedDict())[post_id] = None
+        logger.info(f"Loaded seen posts for {len(self._seen)} accounts")
+    
+    def has_account(self, username: str) -> bool:
+        """Check whether any posts have been recorded for an account."""
+        return username in self._seen
+    
+    def is_seen(self, username: str, post_id: str) -> bool:
+        """Check whether a post has already been seen."""
+        return post_id in self._seen.get(username, ())
+    
+    def filter_new(self, username: str, posts: Iterable[Post]) -> List[Post]:
+        """Return the posts that have not been seen yet, in their original order."""
+        seen = self._seen.get(username, ())
+        return [post for post in posts if post.id not in seen]
+    
+    def newest(self, username: str) -> Optional[str]:
+        """Return the newest seen post ID for an account; IDs that are not numeric are skipped."""
+        numeric_ids = [post_id for post_id in self._seen.get(username, ()) if post_id.isdigit()]
+        if not numeric_ids:
+            return None
+        return max(numeric_ids, key=int)
+    
+    def mark_seen(self, username: str, post_ids: Iterable[str]):
+        """Record posts as seen, dropping the oldest IDs beyond the per-account bound."""
+        seen = self._seen.setdefault(username, OrderedDict())
+        now = time.time()
+        added = [post_id for post_id in post_ids if post_id and post_id not in seen]
+        for post_id in added:
+            seen[post_id] = None
+            
+        evicted = []
+        while len(seen) > self.max_per_account:
+            evicted.append(seen.popitem(last=False)[0])
+            
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO seen_posts (username, post_id, seen_at) VALUES (?, ?, ?)",
+                    [(username, post_id, now) for post_id in added]
+                )
+                self._conn.executemany(
+                    "DELETE FROM seen_posts WHERE username = ? AND post_id = ?",
+                    [(username, post_id) for post_id in evicted]
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error saving seen posts for {username}: {str(e)}")
+    
+    def close(self):
+        """Close the ledger database."""
+        self._conn.close()
@@ -0,0 +1,287 @@
+import json
+import sqlite3
+import time
+import logging
+import sys
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Account, Post
+from src.ttl_cache import TTLCache
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('shared_cache')
+
+def _encode(posts: List[Post]) -> str:
+    """Serialize an account's posts for a shared store."""
+    return json.dumps([post.to_dict() for post in posts], ensure_ascii=False)
+
+def _decode(username: str, value: str) -> List[Post]:
+    """Rebuild an account's posts from a shared store, sharing one Account object."""
+    account = None
+    posts = []
+    for post in json.loads(value):
+        if account is None:
+            account = Account.from_dict(username, post['user'])
+        posts.append(Post.from_dict(post, account))
+    return posts
+
+class SQLiteCache:
+    """Post cache in a SQLite database shared by every bot instance on the machine.
+
+    Has the same interface as TTLCache. Lease rows let one instance fetch an
+    account while the others wait for its result instead of asking Weibo too.
+    Calls block on disk I/O and lock waits, so the fetcher makes them from a
+    single worker thread rather than the event loop.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_size: int = 1024, ttl: float = 300):
+        """Open the cache database with its size bound and time-to-live in seconds."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._decoded: Dict[str, Tuple[float, List[Post]]] = {}  # username -> (stored_at, posts) last read
+        # Opened here but used from the fetcher's cache thread
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS post_cache ("
+            "username TEXT PRIMARY KEY, stored_at REAL NOT NULL, posts TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_post_cache_stored_at ON post_cache (stored_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetch_leases ("
+            "username TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _read(self, username: str) -> Optional[Tuple[float, List[Post]]]:
+        """Return (stored_at, posts) for an account, decoding each stored row only once."""
+        row = self._conn.execute("SELECT stored_at, posts FROM post_cache WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            self._decoded.pop(username, None)
+            return None
+        stored_at, value = row
+        entry = self._decoded.get(username)
+        if entry is None or entry[0] != stored_at:
+            entry = (stored_at, _decode(username, value))
+            self._decoded[username] = entry
+        return entry
+
+    def get(self, username: str) -> Optional[Tuple[List[Post], bool]]:
+        """Return (posts, is_fresh) for an account, or None if it is not cached."""
+        entry = self._read(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, posts = entry
+        fresh = time.time() - stored_at < self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return posts, fresh
+
+    def peek(self, username: str) -> Optional[List[Post]]:
+        """Return cached posts without updating the hit counters."""
+        entry = self._read(username)
+        return entry[1] if entry is not None else None
+
+    def recent(self, username: str, max_age: float) -> Optional[List[Post]]:
+        """Return cached posts if any instance stored them within max_age seconds."""
+        entry = self._read(username)
+        if entry is None or time.time() - entry[0] >= max_age:
+            return None
+        return entry[1]
+
+    def set(self, username: str, posts: List[Post], stored_at: Optional[float] = None):
+        """Store an account's posts, evicting the oldest accounts if the cache is full."""
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO post_cache (username, stored_at, posts) VALUES (?, ?, ?)",
+                (username, stored_at, _encode(posts))
+            )
+            self._conn.execute(
+                "DELETE FROM post_cache WHERE username IN "
+                "(SELECT username FROM post_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,)
+            )
+        self._decoded[username] = (stored_at, posts)
+
+    def pop(self, username: str) -> Optional[List[Post]]:
+        """Remove an account and return its posts, if cached."""
+        posts = self.peek(username)
+        with self._conn:
+            self._conn.execute("DELETE FROM post_cache WHERE username = ?", (username,))
+        self._decoded.pop(username, None)
+        return posts
+
+    def items(self) -> Iterator[Tuple[str, float, List[Post]]]:
+        """Iterate over (username, stored_at, posts), least recently stored first."""
+        rows = self._conn.execute("SELECT username, stored_at, posts FROM post_cache ORDER BY stored_at").fetchall()
+        for username, stored_at, value in rows:
+            yield username, stored_at, _decode(username, value)
+
+    def acquire_lease(self, username: str, owner: str, duration: float) -> bool:
+        """Claim the right to fetch an account unless another owner holds an unexpired lease."""
+        now = time.time()
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO fetch_leases (username, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE fetch_leases.expires_at < ? OR fetch_leases.owner = excluded.owner",
+                (username, owner, now + duration, now)
+            )
+        return cursor.rowcount > 0
+
+    def release_lease(self, username: str, owner: str):
+        """Give up a lease so waiting instances stop waiting."""
+        with self._conn:
+            self._conn.execute("DELETE FROM fetch_leases WHERE username = ? AND owner = ?", (username, owner))
+
+    def close(self):
+        """Close the cache database."""
+        self._conn.close()
+
+    def __contains__(self, username: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM post_cache WHERE username = ?", (username,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM post_cache").fetchone()[0]
+
+class RedisCache:
+    """Post cache in Redis, shared by bot instances on any machine.
+
+    Same interface as SQLiteCache, and likewise called from the fetcher's
+    cache thread. Requires the redis package. Entries expire on their own
+    after retention seconds, so there is no size bound.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, ttl: float = 300, retention: float = 86400, prefix: str = 'weibo_bot:'):
+        """Connect to Redis at url."""
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis cache backend requires the redis package (pip install redis)")
+        self.ttl = ttl
+        self.retention = retention
+        self.prefix = prefix
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._decoded: Dict[str, Tuple[float, List[Post]]] = {}
+        self._redis = redis.Redis.from_url(url, socket_timeout=2)
+
+    def _key(self, kind: str, username: str) -> str:
+        return f"{self.prefix}{kind}:{username}"
+
+    def _read(self, username: str) -> Optional[Tuple[float, List[Post]]]:
+        """Return (stored_at, posts) for an account, decoding each stored value only once."""
+        value = self._redis.get(self._key('posts', username))
+        if value is None:
+            self._decoded.pop(username, None)
+            return None
+        stored_at, posts = value.decode('utf-8').split('\n', 1)
+        stored_at = float(stored_at)
+        entry = self._decoded.get(username)
+        if entry is None or entry[0] != stored_at:
+            entry = (stored_at, _decode(username, posts))
+            self._decoded[username] = entry
+        return entry
+
+    def get(self, username: str) -> Optional[Tuple[List[Post], bool]]:
+        """Return (posts, is_fresh) for an account, or None if it is not cached."""
+        entry = self._read(username)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, posts = entry
+        fresh = time.time() - stored_at < self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return posts, fresh
+
+    def peek(self, username: str) -> Optional[List[Post]]:
+        """Return cached posts without updating the hit counters."""
+        entry = self._read(username)
+        return entry[1] if entry is not None else None
+
+    def recent(self, username: str, max_age: float) -> Optional[List[Post]]:
+        """Return cached posts if any instance stored them within max_age seconds."""
+        entry = self._read(username)
+        if entry is None or time.time() - entry[0] >= max_age:
+            return None
+        return entry[1]
+
+    def set(self, username: str, posts: List[Post], stored_at: Optional[float] = None):
+        """Store an account's posts."""
+        stored_at = time.time() if stored_at is None else stored_at
+        self._redis.set(self._key('posts', username), f"{stored_at}\n{_encode(posts)}", ex=int(self.retention))
+        self._decoded[username] = (stored_at, posts)
+
+    def pop(self, username: str) -> Optional[List[Post]]:
+        """Remove an account and return its posts, if cached."""
+        posts = self.peek(username)
+        self._redis.delete(self._key('posts', username))
+        self._decoded.pop(username, None)
+        return posts
+
+    def items(self) -> Iterator[Tuple[str, float, List[Post]]]:
+        """Iterate over (username, stored_at, posts) in no particular order."""
+        for key in self._redis.scan_iter(match=self._key('posts', '*')):
+            username = key.decode('utf-8')[len(self._key('posts', '')):]
+            entry = self._read(username)
+            if entry is not None:
+                yield username, entry[0], entry[1]
+
+    def acquire_lease(self, username: str, owner: str, duration: float) -> bool:
+        """Claim the right to fetch an account unless another owner holds an unexpired lease."""
+        key = self._key('lease', username)
+        if self._redis.set(key, owner, nx=True, px=int(duration * 1000)):
+            return True
+        return self._redis.get(key) == owner.encode('utf-8')
+
+    def release_lease(self, username: str, owner: str):
+        """Give up a lease so waiting instances stop waiting."""
+        key = self._key('lease', username)
+        if self._redis.get(key) == owner.encode('utf-8'):
+            self._redis.delete(key)
+
+    def close(self):
+        """Close the Redis connection."""
+        self._redis.close()
+
+    def __contains__(self, username: str) -> bool:
+        return bool(self._redis.exists(self._key('posts', username)))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._redis.scan_iter(match=self._key('posts', '*')))
+
+def create_cache(config: Dict) -> Any:
+    """Create the post cache selected by the CACHE_BACKEND setting ("memory", "sqlite" or "redis")."""
+    backend = config.get('CACHE_BACKEND', 'memory')
+    max_size = config.get('CACHE_MAX_ACCOUNTS', 1024)
+    ttl = config['CACHE_DURATION']
+    if backend == 'memory':
+        return TTLCache(max_size=max_size, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteCache(config['CACHE_PATH'], max_size=max_size, ttl=ttl)
+    if backend == 'redis':
+        return RedisCache(config['CACHE_REDIS_URL'], ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
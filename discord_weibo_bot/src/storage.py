@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import tempfile
+import logging
+from typing import Any, Callable, Optional
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('storage')
+
+def load_json(path: str, default: Any) -> Any:
+    """Load a JSON file, returning the default if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading {path}: {str(e)}")
+        return default
+
+def atomic_write_json(path: str, data: Any):
+    """Write JSON to a temporary file and rename it over the target.
+    
+    Readers never see a half-written file, even if the process dies mid-write.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class WriteBehindJSON:
+    """Batched, atomic writes of an in-memory store's JSON snapshot.
+    
+    The store calls mark_dirty() after each change. The snapshot function
+    is called and written to path with atomic_write_json at most once per
+    flush_delay seconds, in a worker thread, or straight away when there is
+    no event loop (scripts). A failed write is retried at the next flush.
+    """
+    
+    def __init__(self, path: str, snapshot: Callable[[], Any], flush_delay: float = 2.0, name: str = 'data'):
+        """Initialize the writer with the function that returns the data to save."""
+        self.path = path
+        self.snapshot = snapshot
+        self.flush_delay = flush_delay
+        self.name = name  # what is being saved, for log messages
+        self._dirty = False
+        self._flush_handle = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+    
+    def mark_dirty(self):
+        """Record a change and schedule a batched write."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write straight away
+            atomic_write_json(self.path, self.snapshot())
+            self._dirty = False
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+    
+    def _start_flush(self):
+        """Timer callback that starts a background flush."""
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
+    
+    async def flush(self):
+        """Write pending changes to disk in a worker thread."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = self.snapshot()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, atomic_write_json, self.path, data)
+            except Exception as e:
+                logger.error(f"Error saving {self.name}: {str(e)}")
+                self._dirty = True
@@ -0,0 +1,92 @@
+import logging
+import sys
+import os
+from typing import Dict, List, Set, Tuple
+
+# Add the parent directory to sys.path to import storage helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage import load_json, WriteBehindJSON
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('subscription_store')
+
+class SubscriptionStore:
+    """In-memory index of channel subscriptions with write-behind persistence.
+    
+    The subscription file is parsed once at startup. Changes are applied to
+    forward (account -> channels) and reverse (channel -> accounts) indexes
+    and written back in batches, off the event loop.
+    """
+    
+    def __init__(self, path: str, flush_delay: float = 2.0):
+        """Load subscriptions from the given JSON file."""
+        self.path = path
+        self.flush_delay = flush_delay
+        self._channels_by_account: Dict[str, Set[str]] = {}
+        self._accounts_by_channel: Dict[str, Set[str]] = {}
+        self._writer = WriteBehindJSON(path, self.to_dict, flush_delay, name='subscriptions')
+        self._load()
+        
+    def _load(self):
+        """Build both indexes from the subscription file."""
+        subscriptions = load_json(self.path, {})
+        for username, channels in subscriptions.items():
+            for channel_id in channels:
+                self._index(username, str(channel_id))
+        logger.info(f"Loaded {sum(len(c) for c in self._channels_by_account.values())} subscriptions")
+    
+    def _index(self, username: str, channel_id: str):
+        """Add a subscription to both indexes."""
+        self._channels_by_account.setdefault(username, set()).add(channel_id)
+        self._accounts_by_channel.setdefault(channel_id, set()).add(username)
+    
+    def get_channels(self, username: str) -> Tuple[str, ...]:
+        """Get the channel IDs subscribed to a Weibo account."""
+        return tuple(self._channels_by_account.get(username, ()))
+    
+    def get_accounts(self, channel_id: str) -> Tuple[str, ...]:
+        """Get the Weibo accounts a channel is subscribed to."""
+        return tuple(self._accounts_by_channel.get(channel_id, ()))
+    
+    def is_subscribed(self, username: str, channel_id: str) -> bool:
+        """Check whether a channel is subscribed to a Weibo account."""
+        return channel_id in self._channels_by_account.get(username, ())
+    
+    def add(self, username: str, channel_id: str) -> bool:
+        """Subscribe a channel to an account. Returns False if it already was."""
+        if self.is_subscribed(username, channel_id):
+            return False
+        self._index(username, channel_id)
+        self._mark_dirty()
+        return True
+    
+    def remove(self, username: str, channel_id: str) -> bool:
+        """Unsubscribe a channel from an account. Returns False if it was not subscribed."""
+        if not self.is_subscribed(username, channel_id):
+            return False
+        channels = self._channels_by_account[username]
+        channels.discard(channel_id)
+        if not channels:
+            del self._channels_by_account[username]
+        accounts = self._accounts_by_channel[channel_id]
+        accounts.discard(username)
+        if not accounts:
+            del self._accounts_by_channel[channel_id]
+        self._mark_dirty()
+        return True
+    
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Return the subscriptions in the subscription file format."""
+        return {username: sorted(channels) for username, channels in self._channels_by_account.items()}
+    
+    def _mark_dirty(self):
+        """Record a change and schedule a batched write."""
+        self._writer.mark_dirty()
+    
+    async def flush(self):
+        """Write pending changes to disk in a worker thread."""
+        await self._writer.flush()
@@ -29,6 +29,9 @@ def test_weibo_fetcher():
     # Initialize the WeiboFetcher
     weibo_fetcher = WeiboFetcher(config)
     
+    # Resolve the numeric IDs of accounts configured by screen name only
+    weibo_fetcher.resolve_numeric_ids()
+    
     # Test fetching posts for each account
     results = {}
     
@@ -55,7 +58,7 @@ def test_weibo_fetcher():
             results[username] = {
                 'status': 'success',
                 'message': f'Fetched {len(posts)} posts',
-                'posts': posts
+                'posts': [post.to_dict() for post in posts]
             }
         else:
             logger.warning(f"No posts found for {username}")
@@ -65,6 +68,8 @@ def test_weibo_fetcher():
                 'posts': []
             }
     
+    weibo_fetcher.close()
+    
     # Save results to a file
     with open('test_results.json', 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
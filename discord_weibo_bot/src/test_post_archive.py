@@ -0,0 +1,58 @@
+import sys
+import os
+import asyncio
+import logging
+import tempfile
+
+# Add the parent directory to sys.path to import the fetcher and post archive
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.weibo_fetcher import AsyncWeiboFetcher
+from src.post_archive import PostArchive
+from src.models import Account, Post
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('test_post_archive')
+
+def test_long_text_search():
+    """Test that a truncated post can be found by a word that appears only in its full text."""
+    account = Account('snh48', 1, 'snh48', 'SNH48', '')
+    post = Post(
+        id='5200000000000001', created_at='', text='今天的公演 ...全文', source='',
+        reposts_count=0, comments_count=0, attitudes_count=0,
+        account=account, images=(), retweeted=None, is_long_text=True
+    )
+    config = {
+        'WEIBO_ACCOUNTS': {},
+        'WEIBO_API_BASE_URL': 'https://m.weibo.cn/api/container/getIndex',
+        'CACHE_DURATION': 300,
+        'MAX_POSTS_PER_ACCOUNT': 5
+    }
+    weibo_fetcher = AsyncWeiboFetcher(config)
+    
+    async def get_json(url):
+        return {'ok': 1, 'data': {'longTextContent': '今天的公演 encore setlist'}}
+    weibo_fetcher._get_json = get_json
+    
+    async def deliver():
+        # The same steps deliver_new_posts takes for a new post
+        expanded = await weibo_fetcher.expand_long_texts([post])
+        post_archive.add(expanded)
+        await post_archive.flush()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        post_archive = PostArchive(os.path.join(directory, 'posts_archive.db'))
+        try:
+            asyncio.run(deliver())
+            posts, has_more = post_archive.search('encore')
+            assert [found.id for found in posts] == [post.id], posts
+            assert not has_more
+        finally:
+            post_archive.close()
+    logger.info("Truncated post is searchable by its full text")
+
+if __name__ == "__main__":
+    test_long_text_search()
@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries go stale after a time-to-live.
+    
+    Stale entries are kept (until evicted) so callers can serve them while
+    a fresh value is fetched.
+    """
+    
+    shared = False  # only visible to this process; see shared_cache for shared backends
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 300):
+        """Initialize the cache with its size bound and time-to-live in seconds."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        
+    def get(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """Return (value, is_fresh) for a key, or None if it is not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        stored_at, value = entry
+        fresh = time.time() - stored_at < self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return value, fresh
+    
+    def peek(self, key: Hashable) -> Any:
+        """Return a cached value without updating its recency or the hit counters."""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+    
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        """Store a value, evicting the least recently used entry if the cache is full."""
+        self._entries[key] = (time.time() if stored_at is None else stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> Any:
+        """Remove a key and return its value, if cached."""
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+    
+    def items(self) -> Iterator[Tuple[Hashable, float, Any]]:
+        """Iterate over (key, stored_at, value), least recently used first."""
+        for key, (stored_at, value) in self._entries.items():
+            yield key, stored_at, value
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,67 @@
+import time
+import logging
+import sys
+import os
+from typing import Any, Optional
+
+# Add the parent directory to sys.path to import the storage helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.storage import load_json, atomic_write_json
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('warm_start')
+
+# Bumped whenever the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+class WarmStartSnapshot:
+    """Local snapshot of the state the bot would otherwise rebuild by polling.
+    
+    Holds the fetcher's post cache and the poll scheduler's schedule and
+    learned posting rates. Seen posts are not included: the seen-post
+    ledger is already persistent.
+    """
+    
+    def __init__(self, path: str):
+        """Initialize the snapshot stored at path."""
+        self.path = path
+    
+    def build(self, fetcher: Any, scheduler: Any) -> dict:
+        """Collect the current state; cheap enough to run on the event loop."""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'fetcher': fetcher.snapshot(),
+            'scheduler': scheduler.snapshot()
+        }
+    
+    def write(self, data: dict):
+        """Write collected state to disk atomically (blocking; run it in an executor from the bot)."""
+        atomic_write_json(self.path, data)
+    
+    def save(self, fetcher: Any, scheduler: Any):
+        """Collect and write the current state."""
+        self.write(self.build(fetcher, scheduler))
+    
+    def load(self, fetcher: Any, scheduler: Any) -> Optional[float]:
+        """Restore the saved state into the fetcher and scheduler.
+        
+        Returns the age of the snapshot in seconds, or None if there was no
+        usable snapshot.
+        """
+        data = load_json(self.path, None)
+        if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+            return None
+        try:
+            cached = fetcher.restore(data.get('fetcher', {}))
+            scheduled = scheduler.restore(data.get('scheduler', {}))
+        except Exception as e:
+            logger.error(f"Error restoring warm start snapshot: {str(e)}")
+            return None
+        age = max(0.0, time.time() - data['saved_at'])
+        logger.info(f"Warm start: restored cached posts for {cached} accounts and the schedule of {scheduled} accounts ({age:.0f}s old)")
+        return age
@@ -1,8 +1,24 @@
-import requests
+import aiohttp
+import asyncio
 import time
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import sys
+import os
+import uuid
+import dataclasses
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Any, Tuple
+
+# Add the parent directory to sys.path to import the post models
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import Account, Post, Retweet
+from src.shared_cache import create_cache
+from src.id_cache import NumericIdCache
+from src.rate_limit import TokenBucket, CircuitBreaker, CircuitOpenError
+from src.metrics import FETCH_LATENCY, FETCH_ERRORS
 
 # Set up logging
 logging.basicConfig(
@@ -11,172 +27,663 @@ logging.basicConfig(
 )
 logger = logging.getLogger('weibo_fetcher')
 
-class WeiboFetcher:
-    """Class to fetch posts from Weibo accounts."""
+# Full texts of truncated posts kept so each post is expanded only once
+LONG_TEXT_CACHE_SIZE = 512
+
+# HTTP statuses m.weibo.cn answers with when it is throttling us
+THROTTLE_STATUSES = (403, 418, 429)
+
+class AsyncWeiboFetcher:
+    """Class to fetch posts from Weibo accounts without blocking the event loop."""
     
     def __init__(self, config: Dict):
-        """Initialize the WeiboFetcher with configuration."""
+        """Initialize the AsyncWeiboFetcher with configuration."""
         self.config = config
         self.weibo_accounts = config['WEIBO_ACCOUNTS']
         self.api_base_url = config['WEIBO_API_BASE_URL']
         self.max_posts = config['MAX_POSTS_PER_ACCOUNT']
-        self.cache = {}
+        self.backfill_pages = config.get('BACKFILL_MAX_PAGES', 0)  # timeline pages read per account to close a gap
         self.cache_duration = config['CACHE_DURATION']
+        self.cache = create_cache(config)
+        # Shared caches do blocking I/O, so their calls run on one dedicated thread
+        self._cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='post_cache') if self.cache.shared else None
+        self.shared_max_age = config.get('SHARED_CACHE_MAX_AGE', 60)  # reuse posts another instance fetched this recently
+        self.instance_id = uuid.uuid4().hex  # lease owner in a shared cache
+        self._in_flight = {}  # username -> shared refresh task (single-flight)
+        self.failed_accounts = set()  # accounts whose most recent fetch failed
+        self._accounts = {}  # one shared Account object per username
+        self.newest_post_ids = {}  # newest post ID returned per account by incremental fetches
+        self.long_text_url = config.get('WEIBO_LONG_TEXT_URL', self.api_base_url.split('/api/', 1)[0] + '/statuses/extend')
+        self._long_texts = OrderedDict()  # post ID -> full text of a truncated post
+        self.status_url = config.get('WEIBO_STATUS_URL', self.api_base_url.split('/api/', 1)[0] + '/statuses/show')
+        self.request_timeout = config.get('REQUEST_TIMEOUT', 10)
+        self.pool_size = config.get('CONNECTION_POOL_SIZE', 20)
+        self.max_concurrent_fetches = config.get('MAX_CONCURRENT_FETCHES', 5)
+        self.tick_deadline = config.get('FETCH_TICK_DEADLINE')
         self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        self._session = None
         
-    def get_user_info(self, username: str) -> Optional[Dict]:
-        """Get user information for a Weibo account."""
+        # All requests to Weibo share one rate limit and one circuit breaker
+        requests_per_second = config.get('REQUESTS_PER_SECOND')
+        self.rate_limiter = TokenBucket(requests_per_second, config.get('REQUEST_BURST', 5)) if requests_per_second else None
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=config.get('CIRCUIT_FAILURE_THRESHOLD', 5),
+            reset_timeout=config.get('CIRCUIT_RESET_TIMEOUT', 60),
+            max_reset_timeout=config.get('CIRCUIT_MAX_RESET_TIMEOUT', 1800)
+        )
+        
+        # Numeric IDs resolved by earlier runs, so polling never has to search
+        id_cache_file = config.get('ID_CACHE_FILE')
+        self.id_cache = NumericIdCache(id_cache_file) if id_cache_file else None
+        if self.id_cache:
+            for username, account_info in self.weibo_accounts.items():
+                if not account_info['numeric_id']:
+                    account_info['numeric_id'] = self.id_cache.get(username, account_info['weibo_id'])
+        
+    def forget_account(self, username: str):
+        """Drop everything cached for an account that is no longer tracked."""
+        if self._cache_executor:
+            self._cache_executor.submit(self.cache.pop, username)
+        else:
+            self.cache.pop(username)
+        self._accounts.pop(username, None)
+        self.newest_post_ids.pop(username, None)
+        self.failed_accounts.discard(username)
+    
+    def snapshot(self) -> Dict:
+        """Return the cached posts as JSON-serializable data for a warm start."""
+        # A shared cache is already persistent
+        if self.cache.shared:
+            return {'posts': []}
+        return {'posts': [
+            [username, stored_at, [post.to_dict() for post in posts]]
+            for username, stored_at, posts in self.cache.items()
+        ]}
+    
+    def restore(self, snapshot: Dict) -> int:
+        """Reload cached posts saved by snapshot() and return how many accounts were restored."""
+        if self.cache.shared:
+            return 0
+        restored = 0
+        for username, stored_at, posts in snapshot.get('posts', []):
+            if username not in self.weibo_accounts or not posts:
+                continue
+            account = Account.from_dict(username, posts[0]['user'])
+            self.cache.set(username, [Post.from_dict(post, account) for post in posts], stored_at=stored_at)
+            restored += 1
+        return restored
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # limit_per_host caps how many requests are in flight against m.weibo.cn
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.max_concurrent_fetches,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={'User-Agent': self.user_agent}
+            )
+        return self._session
+    
+    async def _get_json(self, url: str) -> Dict:
+        """Send a rate-limited GET request through the shared session and decode the JSON body.
+        
+        Raises CircuitOpenError without sending anything while Weibo is throttling us.
+        """
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("Weibo requests are paused after repeated throttling")
+        probe = self.circuit_breaker.probing
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status in THROTTLE_STATUSES:
+                    self.circuit_breaker.record_failure()
+                response.raise_for_status()
+                # m.weibo.cn does not always send an application/json content type
+                data = await response.json(content_type=None)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in THROTTLE_STATUSES:
+                self.circuit_breaker.record_error()
+            raise
+        except Exception:
+            self.circuit_breaker.record_error()
+            raise
+        except BaseException:
+            # Cancelled by the tick deadline or shutdown while waiting for a
+            # token or an answer; a probe must not stay claimed forever
+            if probe:
+                self.circuit_breaker.release_probe()
+            raise
+            
+        # Weibo also throttles with ok != 1 in a normal response
+        if data.get('ok') == 1:
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_failure()
+        return data
+    
+    async def close(self):
+        """Close the shared session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._cache_executor:
+            await self._cache_call(self.cache.close)
+            self._cache_executor.shutdown()
+    
+    async def _cache_call(self, method: Callable, *args) -> Any:
+        """Call a cache method, on the cache thread for a shared cache so its I/O does not block the event loop."""
+        if self._cache_executor is None:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._cache_executor, functools.partial(method, *args))
+        
+    async def get_user_info(self, username: str) -> Optional[Dict]:
+        """Get user information for a Weibo account.
+        
+        This never searches Weibo; unresolved numeric IDs are filled in by
+        resolve_numeric_ids().
+        """
         if username not in self.weibo_accounts:
             logger.error(f"Unknown Weibo account: {username}")
             return None
             
-        account_info = self.weibo_accounts[username]
-        
-        # If we already have the numeric ID, return the account info
-        if account_info['numeric_id']:
-            return account_info
-            
-        # Otherwise, try to fetch the numeric ID
+        return self.weibo_accounts[username]
+    
+    async def _search_numeric_id(self, username: str, weibo_id: str) -> Optional[Any]:
+        """Search Weibo for an account's numeric ID by its screen name."""
         try:
             # For accounts where we only have the display name, we need to search
-            search_url = f"https://m.weibo.cn/api/container/getIndex?containerid=100103type%3D3%26q%3D{account_info['weibo_id']}&page_type=searchall"
-            headers = {'User-Agent': self.user_agent}
-            
-            response = requests.get(search_url, headers=headers)
-            data = response.json()
+            search_url = f"{self.api_base_url}?containerid=100103type%3D3%26q%3D{weibo_id}&page_type=searchall"
+            data = await self._get_json(search_url)
             
             if data['ok'] == 1 and 'cards' in data['data']:
                 for card in data['data']['cards']:
                     if card.get('card_type') == 11 and 'card_group' in card:
                         for user in card['card_group']:
-                            if user.get('user', {}).get('screen_name') == account_info['weibo_id']:
-                                account_info['numeric_id'] = user['user']['id']
-                                return account_info
+                            if user.get('user', {}).get('screen_name') == weibo_id:
+                                return user['user']['id']
             
-            logger.warning(f"Could not find numeric ID for {username} ({account_info['weibo_id']})")
-            return account_info
+            logger.warning(f"Could not find numeric ID for {username} ({weibo_id})")
+            return None
             
         except Exception as e:
             logger.error(f"Error fetching user info for {username}: {str(e)}")
-            return account_info
+            return None
     
-    def fetch_posts(self, username: str, force_refresh: bool = False) -> List[Dict]:
-        """Fetch posts for a specific Weibo account."""
+    async def resolve_numeric_ids(self, usernames: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Concurrently look up the numeric IDs of accounts that do not have one yet.
+        
+        Results, including failures, are persisted in the ID cache. Returns the
+        IDs that were resolved.
+        """
+        if usernames is None:
+            usernames = list(self.weibo_accounts)
+        unresolved = [
+            username for username in usernames
+            if username in self.weibo_accounts
+            and not self.weibo_accounts[username]['numeric_id']
+            and (self.id_cache is None or self.id_cache.should_retry(username, self.weibo_accounts[username]['weibo_id']))
+        ]
+        if not unresolved or self.circuit_breaker.is_open:
+            return {}
+            
+        logger.info(f"Resolving numeric IDs for {len(unresolved)} accounts...")
+        results = await asyncio.gather(*(
+            self._search_numeric_id(username, self.weibo_accounts[username]['weibo_id'])
+            for username in unresolved
+        ))
+        
+        resolved = {}
+        for username, numeric_id in zip(unresolved, results):
+            account_info = self.weibo_accounts[username]
+            if numeric_id:
+                account_info['numeric_id'] = numeric_id
+                resolved[username] = numeric_id
+                if self.id_cache:
+                    self.id_cache.record_success(username, account_info['weibo_id'], numeric_id)
+            elif self.id_cache:
+                self.id_cache.record_failure(username, account_info['weibo_id'])
+                
+        if self.id_cache:
+            await asyncio.get_running_loop().run_in_executor(None, self.id_cache.save)
+        logger.info(f"Resolved {len(resolved)} of {len(unresolved)} numeric IDs")
+        return resolved
+    
+    async def fetch_posts(self, username: str, force_refresh: bool = False,
+                          incremental: bool = False, allow_stale: bool = False) -> List[Post]:
+        """Fetch posts for a specific Weibo account.
+        
+        In incremental mode only posts newer than the newest one returned by
+        the previous incremental fetch are parsed and returned. With
+        allow_stale, expired cached posts are returned immediately while a
+        refresh runs in the background.
+        """
         # Check cache first if not forcing refresh
-        if not force_refresh and username in self.cache:
-            cache_time, posts = self.cache[username]
-            if time.time() - cache_time < self.cache_duration:
-                logger.info(f"Using cached posts for {username}")
-                return posts
+        if not force_refresh and not incremental:
+            cached = await self._cache_call(self.cache.get, username)
+            if cached is not None:
+                posts, fresh = cached
+                if fresh:
+                    logger.info(f"Using cached posts for {username}")
+                    return posts
+                if allow_stale:
+                    logger.info(f"Using stale cached posts for {username} while refreshing")
+                    self._refresh_shared(username)
+                    return posts
+            # Concurrent callers for the same account share one request
+            return await asyncio.shield(self._refresh_shared(username))
+            
+        return await self._fetch_from_weibo(username, incremental)
+    
+    def _refresh_shared(self, username: str) -> asyncio.Future:
+        """Start a refresh for an account, or join the one already in flight."""
+        task = self._in_flight.get(username)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_from_weibo(username, False))
+            self._in_flight[username] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(username, None))
+        return task
+    
+    async def _fetch_from_weibo(self, username: str, incremental: bool) -> List[Post]:
+        """Request an account's posts from Weibo and update the cache."""
+        newest_seen = self.newest_post_ids.get(username) if incremental else None
         
         # Get user info
-        user_info = self.get_user_info(username)
+        user_info = await self.get_user_info(username)
         if not user_info:
             return []
             
         # If we don't have a numeric ID, we can't fetch posts
         if not user_info['numeric_id']:
             logger.warning(f"No numeric ID available for {username}, cannot fetch posts")
+            self.failed_accounts.add(username)
+            FETCH_ERRORS.inc('no_numeric_id')
             return []
             
-        try:
-            # Construct the API URL
-            user_id = user_info['numeric_id']
-            container_id = f"107603{user_id}"
-            url = f"{self.api_base_url}?type=uid&value={user_id}&containerid={container_id}"
+        # With a shared cache, use posts another instance just fetched, or wait
+        # for the one fetching now, instead of asking Weibo again
+        if self.cache.shared:
+            latest = await self._shared_posts(username)
+            if latest is not None:
+                posts = self._newer_than(latest, newest_seen)
+                # Every shared post is new, so there may be a gap behind them; the
+                # cursor after those posts is not shared, so page from the top
+                if incremental and newest_seen and self.backfill_pages and posts and len(posts) == len(latest):
+                    fetched_ids = {post.id for post in posts}
+                    async for page in self.iter_backfill(username, newest_seen, None):
+                        posts.extend(post for post in page if post.id not in fetched_ids)
+                self.failed_accounts.discard(username)
+                if incremental:
+                    self._advance_watermark(username, posts)
+                logger.info(f"Using {len(posts)} {'new ' if incremental else ''}posts for {username} fetched by another instance")
+                return posts
             
-            headers = {'User-Agent': self.user_agent}
-            response = requests.get(url, headers=headers)
-            data = response.json()
+        started = time.monotonic()
+        try:
+            data = await self._get_json(self._timeline_url(user_info['numeric_id']))
             
             if data['ok'] != 1:
                 logger.error(f"Error fetching posts for {username}: {data.get('msg', 'Unknown error')}")
+                self.failed_accounts.add(username)
+                FETCH_ERRORS.inc('not_ok')
                 return []
                 
-            posts = []
-            if 'cards' in data['data']:
-                for card in data['data']['cards']:
-                    # Only process blog posts (card_type 9)
-                    if card.get('card_type') == 9:
-                        post = self._parse_post(card, user_info)
-                        if post:
-                            posts.append(post)
-                            if len(posts) >= self.max_posts:
-                                break
-            
-            # Update cache
-            self.cache[username] = (time.time(), posts)
-            logger.info(f"Fetched {len(posts)} posts for {username}")
+            account = self._get_account(username, user_info)
+            # After downtime more posts than usual may be new, so read all of them
+            backfill = bool(incremental and newest_seen and self.backfill_pages)
+            # A shared cache stores the full latest page so each instance can apply its own watermark
+            posts, reached = self._parse_cards(
+                data['data'].get('cards', []), account, newest_seen,
+                stop=not self.cache.shared, limit=None if backfill else self.max_posts
+            )
+            
+            # Update cache, keeping previously fetched posts behind the new ones
+            if self.cache.shared:
+                await self._cache_call(self.cache.set, username, posts[:self.max_posts])
+                posts = self._newer_than(posts, newest_seen)
+            else:
+                cached_posts = posts
+                previous = self.cache.peek(username) if newest_seen else None
+                if previous:
+                    new_ids = {post.id for post in posts}
+                    previous = [post for post in previous if post.id not in new_ids]
+                    cached_posts = (posts + previous)[:self.max_posts]
+                self.cache.set(username, cached_posts[:self.max_posts])
+            
+            # The first page did not reach the newest post seen before, so page
+            # back through the timeline for the posts in between
+            if backfill and not reached:
+                cursor = (data['data'].get('cardlistInfo') or {}).get('since_id')
+                if cursor:
+                    async for page in self.iter_backfill(username, newest_seen, cursor):
+                        posts.extend(page)
+            self.failed_accounts.discard(username)
+            
+            if incremental:
+                self._advance_watermark(username, posts)
+                    
+            FETCH_LATENCY.observe(time.monotonic() - started, username)
+            logger.info(f"Fetched {len(posts)} {'new ' if incremental else ''}posts for {username}")
             return posts
             
+        except CircuitOpenError:
+            # Serve the last good posts until Weibo stops throttling us
+            self.failed_accounts.add(username)
+            FETCH_ERRORS.inc('circuit_open')
+            return self._newer_than(await self._cache_call(self.cache.peek, username) or [], newest_seen)
+            
         except Exception as e:
             logger.error(f"Error fetching posts for {username}: {str(e)}")
+            self.failed_accounts.add(username)
+            FETCH_ERRORS.inc(self._error_type(e))
             return []
+        finally:
+            if self.cache.shared:
+                await self._cache_call(self.cache.release_lease, username, self.instance_id)
+    
+    def _timeline_url(self, user_id: Any, since_id: Optional[Any] = None) -> str:
+        """Build the container API URL for a page of an account's timeline."""
+        url = f"{self.api_base_url}?type=uid&value={user_id}&containerid=107603{user_id}"
+        if since_id:
+            url += f"&since_id={since_id}"
+        return url
     
-    def _parse_post(self, card: Dict, user_info: Dict) -> Optional[Dict]:
+    def _parse_cards(self, cards: List[Dict], account: Account, newest_seen: Optional[str],
+                     stop: bool = True, limit: Optional[int] = None) -> Tuple[List[Post], bool]:
+        """Parse the posts on a timeline page, newest first.
+        
+        Also returns whether the page reached newest_seen, i.e. holds a post
+        that is not newer and not pinned. With stop, parsing ends there.
+        """
+        posts = []
+        reached = False
+        for card in cards:
+            # Only process blog posts (card_type 9)
+            if card.get('card_type') != 9:
+                continue
+            mblog = card.get('mblog') or {}
+            if newest_seen and not self._is_newer(mblog.get('id', ''), newest_seen):
+                # Pinned posts sit above newer posts, so they do not mark the end
+                pinned = self._is_pinned(mblog)
+                reached = reached or not pinned
+                if stop:
+                    if pinned:
+                        continue
+                    break
+            post = self._parse_post(card, account)
+            if post:
+                posts.append(post)
+                if limit and len(posts) >= limit:
+                    break
+        return posts, reached
+    
+    async def iter_backfill(self, username: str, newest_seen: str, cursor: Optional[Any],
+                            max_pages: Optional[int] = None) -> AsyncIterator[List[Post]]:
+        """Page back through an account's timeline, yielding the posts newer than newest_seen.
+        
+        Pages are requested lazily one at a time, starting at cursor (the
+        since_id of the page before, or None for the first page), so only
+        one page is held at a time. Each page's posts are yielded newest
+        first. Stops at newest_seen, at the end of the timeline or after
+        max_pages requests; every request goes through the shared rate limit.
+        """
+        user_info = self.weibo_accounts.get(username)
+        if not user_info or not user_info['numeric_id']:
+            return
+        account = self._get_account(username, user_info)
+        max_pages = self.backfill_pages if max_pages is None else max_pages
+        for page in range(max_pages):
+            data = await self._get_json(self._timeline_url(user_info['numeric_id'], cursor))
+            if data.get('ok') != 1:
+                raise ValueError(f"backfill page {page + 1} failed: {data.get('msg', 'Unknown error')}")
+            posts, reached = self._parse_cards(data['data'].get('cards', []), account, newest_seen)
+            if posts:
+                yield posts
+            cursor = (data['data'].get('cardlistInfo') or {}).get('since_id')
+            if reached or not cursor:
+                logger.info(f"Backfilled {username} from {page + 1} more pages")
+                return
+        logger.warning(f"Backfill for {username} stopped after {max_pages} pages; older posts were skipped")
+    
+    async def _shared_posts(self, username: str) -> Optional[List[Post]]:
+        """Return posts another instance fetched recently, waiting while one is fetching.
+        
+        Returns None when this instance should fetch the account itself.
+        """
+        lease_duration = self.request_timeout * 2
+        deadline = time.monotonic() + lease_duration
+        while True:
+            posts = await self._cache_call(self.cache.recent, username, self.shared_max_age)
+            if posts is not None:
+                return posts
+            leased = await self._cache_call(self.cache.acquire_lease, username, self.instance_id, lease_duration)
+            if leased or time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.5)
+    
+    def _newer_than(self, posts: List[Post], newest_seen: Optional[str]) -> List[Post]:
+        """Return the posts newer than newest_seen, or all of them if it is not set."""
+        if not newest_seen:
+            return posts
+        return [post for post in posts if self._is_newer(post.id, newest_seen)]
+    
+    def _advance_watermark(self, username: str, posts: List[Post]):
+        """Remember the newest post returned to incremental fetches of an account."""
+        newest_seen = self.newest_post_ids.get(username)
+        for post in posts:
+            if not newest_seen or self._is_newer(post.id, newest_seen):
+                newest_seen = post.id
+        if newest_seen:
+            self.newest_post_ids[username] = newest_seen
+    
+    @staticmethod
+    def _error_type(error: Exception) -> str:
+        """Classify a fetch error for the error metrics."""
+        if isinstance(error, asyncio.TimeoutError):
+            return 'timeout'
+        if isinstance(error, aiohttp.ClientResponseError):
+            return f"http_{error.status}"
+        if isinstance(error, aiohttp.ClientError):
+            return 'connection'
+        if isinstance(error, ValueError):
+            return 'invalid_response'
+        return 'other'
+    
+    @staticmethod
+    def _is_newer(post_id: str, other_id: str) -> bool:
+        """Compare two Weibo post IDs, which increase over time."""
+        try:
+            return int(post_id) > int(other_id)
+        except (TypeError, ValueError):
+            return post_id != other_id
+    
+    @staticmethod
+    def _is_pinned(mblog: Dict) -> bool:
+        """Check whether a post is pinned to the top of the account's timeline."""
+        return bool(mblog.get('isTop')) or mblog.get('title', {}).get('text') == '置顶'
+    
+    def _get_account(self, username: str, user_info: Dict) -> Account:
+        """Return the shared Account object for a username."""
+        account = self._accounts.get(username)
+        if account is None or account.id != user_info['numeric_id']:
+            account = Account.from_config(username, user_info)
+            self._accounts[username] = account
+        return account
+    
+    @staticmethod
+    def _parse_images(pics: List[Dict]) -> Tuple[str, ...]:
+        """Extract the large image URLs from a post's pictures."""
+        images = []
+        for pic in pics:
+            if 'large' in pic:
+                images.append(pic['large']['url'])
+            elif 'url' in pic:
+                images.append(pic['url'])
+        return tuple(images)
+    
+    def _parse_post(self, card: Dict, account: Account) -> Optional[Post]:
         """Parse a Weibo post from the API response."""
         try:
             mblog = card.get('mblog', {})
             if not mblog:
                 return None
                 
-            # Extract basic post info
-            post = {
-                'id': mblog.get('id', ''),
-                'created_at': mblog.get('created_at', ''),
-                'text': mblog.get('text', ''),
-                'source': mblog.get('source', ''),
-                'reposts_count': mblog.get('reposts_count', 0),
-                'comments_count': mblog.get('comments_count', 0),
-                'attitudes_count': mblog.get('attitudes_count', 0),  # likes
-                'user': {
-                    'id': user_info['numeric_id'],
-                    'screen_name': user_info['weibo_id'],
-                    'name': user_info['name'],
-                    'description': user_info['description']
-                },
-                'url': f"https://m.weibo.cn/detail/{mblog.get('id', '')}",
-                'images': []
-            }
-            
-            # Extract images if available
-            if 'pics' in mblog:
-                for pic in mblog['pics']:
-                    if 'large' in pic:
-                        post['images'].append(pic['large']['url'])
-                    elif 'url' in pic:
-                        post['images'].append(pic['url'])
-            
             # Handle retweeted content
+            retweeted = None
             if 'retweeted_status' in mblog:
-                retweeted = mblog['retweeted_status']
-                post['retweeted'] = {
-                    'id': retweeted.get('id', ''),
-                    'created_at': retweeted.get('created_at', ''),
-                    'text': retweeted.get('text', ''),
-                    'user': {
-                        'screen_name': retweeted.get('user', {}).get('screen_name', 'Unknown')
-                    }
-                }
+                original = mblog['retweeted_status']
+                retweeted = Retweet(
+                    id=original.get('id', ''),
+                    created_at=original.get('created_at', ''),
+                    text=original.get('text', ''),
+                    screen_name=(original.get('user') or {}).get('screen_name', 'Unknown'),
+                    images=self._parse_images(original['pics']) if 'pics' in original else None
+                )
                 
-                # Extract retweeted images if available
-                if 'pics' in retweeted:
-                    post['retweeted']['images'] = []
-                    for pic in retweeted['pics']:
-                        if 'large' in pic:
-                            post['retweeted']['images'].append(pic['large']['url'])
-                        elif 'url' in pic:
-                            post['retweeted']['images'].append(pic['url'])
-            
-            return post
+            return Post(
+                id=mblog.get('id', ''),
+                created_at=mblog.get('created_at', ''),
+                text=mblog.get('text', ''),
+                source=mblog.get('source', ''),
+                reposts_count=mblog.get('reposts_count', 0),
+                comments_count=mblog.get('comments_count', 0),
+                attitudes_count=mblog.get('attitudes_count', 0),
+                account=account,
+                images=self._parse_images(mblog.get('pics') or []),
+                retweeted=retweeted,
+                is_long_text=bool(mblog.get('isLongText'))
+            )
             
         except Exception as e:
             logger.error(f"Error parsing post: {str(e)}")
             return None
     
-    def fetch_all_posts(self, force_refresh: bool = False) -> Dict[str, List[Dict]]:
+    async def expand_long_texts(self, posts: List[Post]) -> List[Post]:
+        """Return the posts with truncated (全文) texts replaced by their full text.
+        
+        Full texts are only requested for posts about to be shown, concurrently,
+        and are cached so each post is expanded once.
+        """
+        return list(await asyncio.gather(*(self._expand_long_text(post) for post in posts)))
+    
+    async def _expand_long_text(self, post: Post) -> Post:
+        """Return a post with its full text, or unchanged if it is not truncated or the request fails."""
+        if not post.is_long_text:
+            return post
+        text = self._long_texts.get(post.id)
+        if text is not None:
+            self._long_texts.move_to_end(post.id)
+        else:
+            try:
+                data = await self._get_json(f"{self.long_text_url}?id={post.id}")
+                text = (data.get('data') or {}).get('longTextContent')
+            except Exception as e:
+                logger.warning(f"Error fetching full text of post {post.id}: {str(e)}")
+                return post
+            if not text:
+                return post
+            self._long_texts[post.id] = text
+            if len(self._long_texts) > LONG_TEXT_CACHE_SIZE:
+                self._long_texts.popitem(last=False)
+        return dataclasses.replace(post, text=text, is_long_text=False)
+    
+    async def fetch_counts(self, post_id: str) -> Optional[Tuple[Any, Any, Any]]:
+        """Return a post's current (reposts, comments, likes), or None if the request fails."""
+        try:
+            data = await self._get_json(f"{self.status_url}?id={post_id}")
+        except Exception as e:
+            logger.warning(f"Error fetching counts of post {post_id}: {str(e)}")
+            return None
+        mblog = data.get('data') if data.get('ok') == 1 else None
+        if not mblog:
+            return None
+        return mblog.get('reposts_count', 0), mblog.get('comments_count', 0), mblog.get('attitudes_count', 0)
+    
+    async def _fetch_named(self, username: str, force_refresh: bool,
+                           incremental: bool) -> Tuple[str, List[Post]]:
+        """Fetch posts for an account and tag the result with its username."""
+        return username, await self.fetch_posts(username, force_refresh, incremental)
+    
+    async def iter_all_posts(self, usernames: Optional[Iterable[str]] = None,
+                             force_refresh: bool = False,
+                             deadline: Optional[float] = None,
+                             incremental: bool = False) -> AsyncIterator[Tuple[str, List[Post]]]:
+        """Fetch accounts concurrently and yield (username, posts) as each one completes.
+        
+        Accounts still in flight when the deadline (in seconds) passes are
+        cancelled and skipped for this tick.
+        """
+        if usernames is None:
+            usernames = list(self.weibo_accounts)
+        if deadline is None:
+            deadline = self.tick_deadline
+            
+        pending = [
+            asyncio.ensure_future(self._fetch_named(username, force_refresh, incremental))
+            for username in usernames
+        ]
+        try:
+            for future in asyncio.as_completed(pending, timeout=deadline):
+                try:
+                    username, posts = await future
+                except asyncio.TimeoutError:
+                    unfinished = sum(1 for task in pending if not task.done())
+                    logger.warning(f"Fetch deadline of {deadline}s reached, skipping {unfinished} accounts")
+                    break
+                yield username, posts
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def fetch_all_posts(self, force_refresh: bool = False) -> Dict[str, List[Post]]:
         """Fetch posts for all configured Weibo accounts."""
         all_posts = {}
-        for username in self.weibo_accounts:
-            all_posts[username] = self.fetch_posts(username, force_refresh)
+        async for username, posts in self.iter_all_posts(force_refresh=force_refresh):
+            all_posts[username] = posts
         return all_posts
+
+
+class WeiboFetcher:
+    """Synchronous wrapper around AsyncWeiboFetcher for scripts and tests."""
+    
+    def __init__(self, config: Dict):
+        """Initialize the WeiboFetcher with configuration."""
+        self._fetcher = AsyncWeiboFetcher(config)
+        # A private loop keeps the pooled session alive between calls
+        self._loop = asyncio.new_event_loop()
+        
+    def __getattr__(self, name: str) -> Any:
+        """Expose the async fetcher's state (cache, accounts, settings)."""
+        return getattr(self._fetcher, name)
+    
+    def _run(self, coro):
+        """Run a coroutine to completion on the private event loop."""
+        return self._loop.run_until_complete(coro)
+    
+    def get_user_info(self, username: str) -> Optional[Dict]:
+        """Get user information for a Weibo account."""
+        return self._run(self._fetcher.get_user_info(username))
+    
+    def fetch_posts(self, username: str, force_refresh: bool = False,
+                    incremental: bool = False) -> List[Post]:
+        """Fetch posts for a specific Weibo account."""
+        return self._run(self._fetcher.fetch_posts(username, force_refresh, incremental))
+    
+    def fetch_all_posts(self, force_refresh: bool = False) -> Dict[str, List[Post]]:
+        """Fetch posts for all configured Weibo accounts."""
+        return self._run(self._fetcher.fetch_all_posts(force_refresh))
+    
+    def resolve_numeric_ids(self, usernames: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Look up the numeric IDs of accounts that do not have one yet."""
+        return self._run(self._fetcher.resolve_numeric_ids(usernames))
+    
+    def close(self):
+        """Close the underlying session and event loop."""
+        self._run(self._fetcher.close())
+        self._loop.close()